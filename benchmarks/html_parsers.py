@@ -0,0 +1,106 @@
+"""
+HTML 解析器效能比較（每個擷取器一組數據）
+
+使用方式：
+    1. 將各來源的頁面另存成 HTML（瀏覽器「另存新檔」或 page.content()），放在同一個資料夾：
+       roic_quote.html / seekingalpha.html / tradingview.html / beta.html / barchart.html / earningshub.html
+    2. python benchmarks/html_parsers.py --html-dir saved_pages --repeat 20
+
+缺少的檔案會略過；未安裝的解析器也會略過。
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stock_class.HtmlParser import HtmlParser, available_backends
+
+
+# 每個擷取器的解析工作（與 StockScraper 內的查詢一致）
+def _roic_quote(parser, content):
+    soup = parser.soup(content)
+    container = soup.find('div', {'data-cy': 'company_header_ratios'})
+    return container.find_all('div', class_='shrink-0 flex-col') if container else []
+
+
+def _seekingalpha(parser, content):
+    soup = parser.soup(content)
+    section = soup.find('section', {'data-test-id': 'card-container-growth-rates'})
+    return section.find('table', {'data-test-id': 'table'}) if section else None
+
+
+def _tradingview(parser, content):
+    soup = parser.soup(content)
+    years = soup.find_all('div', class_='value-OxVAcLqi')
+    containers = [soup.find('div', {'data-name': name}) for name in ('Reported', 'Estimate', 'Surprise')]
+    return years, containers
+
+
+def _beta(parser, content):
+    soup = parser.soup(content)
+    return [w.find('div', class_='value-QCJM7wcY') for w in soup.find_all('div', class_='wrapper-QCJM7wcY')]
+
+
+def _barchart(parser, content):
+    return parser.select_text(content, 'div.bc-datatable-toolbar.bc-options-toolbar.volatility')
+
+
+def _earningshub(parser, content):
+    soup = parser.soup(content)
+    return soup.find_all('div', class_='MuiAlert-root')
+
+
+EXTRACTORS = {
+    'get_combined_data': ('roic_quote.html', _roic_quote),
+    'get_seekingalpha_html': ('seekingalpha.html', _seekingalpha),
+    '_extract_tradingview_from_page': ('tradingview.html', _tradingview),
+    '_extract_beta_from_page': ('beta.html', _beta),
+    'get_barchart_html': ('barchart.html', _barchart),
+    'get_earnings_date_earningshub': ('earningshub.html', _earningshub),
+}
+
+
+def bench(parser, workload, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        workload(parser, content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='HTML 解析器效能比較')
+    arg_parser.add_argument('--html-dir', required=True, help='存放頁面 HTML 的資料夾')
+    arg_parser.add_argument('--repeat', type=int, default=10, help='每組重複次數（取中位數）')
+    args = arg_parser.parse_args()
+
+    backends = available_backends()
+    parsers = {backend: HtmlParser(backend) for backend in backends}
+    print(f"可用解析器：{', '.join(backends)}\n")
+
+    header = f"{'擷取器':<34}{'大小':>10}" + ''.join(f"{backend:>17}" for backend in backends)
+    print(header)
+    print('-' * len(header))
+
+    for name, (filename, workload) in EXTRACTORS.items():
+        path = os.path.join(args.html_dir, filename)
+        if not os.path.exists(path):
+            print(f"{name:<34}{'(缺少 ' + filename + ')':>10}")
+            continue
+
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+
+        results = [bench(parsers[backend], workload, content, args.repeat) for backend in backends]
+        baseline = results[-1]  # html.parser
+        cells = ''.join(f"{ms:>9.1f} ms {baseline / ms if ms else 0:>3.0f}x" for ms in results)
+        print(f"{name:<34}{len(content) // 1024:>8} KB{cells}")
+
+
+if __name__ == '__main__':
+    main()
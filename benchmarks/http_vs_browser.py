@@ -0,0 +1,103 @@
+"""
+HTTP 快速路徑 vs 瀏覽器（每個支援 http_fast_path 的來源一組數據）
+
+使用方式：
+    python benchmarks/http_vs_browser.py --stocks AAPL MSFT NVDA --repeat 3
+    python benchmarks/http_vs_browser.py --sources barchart wacc --stocks AAPL
+
+每支股票分別以 HttpFetcher（aiohttp）與 Playwright 取得頁面，
+檢查 SourceProfiles 宣告的 selector 是否存在，輸出中位數耗時與 HTTP 命中率。
+HTTP 命中率低的來源代表頁面需要 JavaScript 渲染，應從 SourceProfiles 移除 http_fast_path。
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stock_class.BrowserSessionManager import BrowserSessionManager
+from stock_class.DomExtractor import extract_fragment
+from stock_class.HtmlParser import HtmlParser
+from stock_class.HttpFetcher import HttpFetcher, fast_path_url, http_available, http_fast_path
+from stock_class.SourceProfiles import SOURCE_PROFILES
+
+
+async def time_http(http, parser, source, url, selector):
+    start = time.perf_counter()
+    content = await http.fetch(source, url)
+    found = content is not None and bool(parser.select_texts(content, selector))
+    return (time.perf_counter() - start) * 1000, found
+
+
+async def time_browser(pool, url, selector):
+    start = time.perf_counter()
+    async with pool.leased() as page:
+        await page.goto(url, wait_until='domcontentloaded', timeout=60000)
+        try:
+            await page.wait_for_selector(selector, timeout=15000)
+        except Exception:
+            pass
+        found = bool(await extract_fragment(page, selector))
+    return (time.perf_counter() - start) * 1000, found
+
+
+def summarize(samples):
+    timings = [ms for ms, _ in samples]
+    hits = sum(found for _, found in samples)
+    median = statistics.median(timings) if timings else 0.0
+    return median, hits, len(samples)
+
+
+async def run(args):
+    sources = args.sources or [name for name in SOURCE_PROFILES if http_fast_path(name)]
+    http = HttpFetcher()
+    parser = HtmlParser()
+    session = BrowserSessionManager()
+
+    print(f"HTTP 用戶端：{'aiohttp' if http_available() else '未安裝 aiohttp（只測瀏覽器）'}")
+    print(f"股票：{', '.join(args.stocks)}，每支重複 {args.repeat} 次\n")
+
+    header = f"{'來源':<14}{'HTTP 中位數':>14}{'HTTP 命中':>12}{'瀏覽器中位數':>16}{'瀏覽器命中':>12}{'加速':>8}"
+    print(header)
+    print('-' * len(header))
+
+    try:
+        for source in sources:
+            fast_path = http_fast_path(source)
+            if fast_path is None:
+                print(f"{source:<14}（未設定 http_fast_path）")
+                continue
+
+            pool = session.get_pool(source, size=1)
+            http_samples, browser_samples = [], []
+            for stock in args.stocks:
+                url = fast_path_url(source, stock)
+                for _ in range(args.repeat):
+                    if http_available():
+                        http_samples.append(await time_http(http, parser, source, url, fast_path['selector']))
+                    browser_samples.append(await time_browser(pool, url, fast_path['selector']))
+
+            http_ms, http_hits, http_total = summarize(http_samples)
+            browser_ms, browser_hits, browser_total = summarize(browser_samples)
+            speedup = f"{browser_ms / http_ms:.1f}x" if http_ms else '-'
+            print(f"{source:<14}{http_ms:>11.0f} ms{http_hits:>7}/{http_total:<4}"
+                  f"{browser_ms:>13.0f} ms{browser_hits:>7}/{browser_total:<4}{speedup:>8}")
+    finally:
+        await http.close()
+        await session.shutdown()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='HTTP 快速路徑 vs 瀏覽器')
+    arg_parser.add_argument('--stocks', nargs='+', default=['AAPL', 'MSFT', 'NVDA'], help='測試股票')
+    arg_parser.add_argument('--sources', nargs='*', help='來源（預設為所有設定 http_fast_path 的來源）')
+    arg_parser.add_argument('--repeat', type=int, default=1, help='每支股票重複次數')
+    asyncio.run(run(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
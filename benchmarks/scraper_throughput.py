@@ -0,0 +1,268 @@
+"""
+StockScraper 吞吐量測試（本機替身網站，不連外網）
+
+使用方式：
+    python benchmarks/scraper_throughput.py --tickers 30 --concurrency 3 5 10 15 20
+    python benchmarks/scraper_throughput.py --tickers 60 --concurrency 15 --latency-ms 150 --sources roic wacc
+
+對每個 max_concurrent 值：
+    1. 啟動替身網站（benchmarks/stand_in_server.py），以 set_base_url_overrides 讓 StockScraper 改連本機
+    2. 依序執行各來源的 fetch_*（與正式流程相同的 context 池 / AdaptiveLimiter / 擷取器）
+    3. 輸出每秒完成的股票數、頁面延遲 p50 / p95、Chromium 峰值 RSS（需安裝 psutil），
+       以及各來源結束時的並發上限（max_concurrent 只是起始值）
+
+注意：
+- --delay-scale 預設 0：StockScraper 內模擬人類操作的 asyncio.sleep 全部縮放為 0，只量測爬蟲本身；
+  設為 1 並加上 --pacing（各主機的導覽節流）可得到含等待時間的實際吞吐量
+- TradingView 正式流程是有頭模式、逐支處理 CAPTCHA；這裡以無頭 context 只量測頁面載入 + 擷取器
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stock_class.StockScraper as scraper_module
+from stand_in_server import StandInServer
+from stock_class.BrowserSessionManager import BrowserSessionManager
+from stock_class.ContextPool import ContextPool
+from stock_class.SourceProfiles import get_source_profile, set_base_url_overrides
+from stock_class.StockScraper import StockScraper
+
+
+SOURCES = ('roic', 'wacc', 'barchart', 'earningshub', 'tradingview')
+
+# 來源 → 要計時的 get_* 方法（頁面延遲 = 單次 get_* 的耗時，不含 semaphore 排隊）
+TIMED_METHODS = {
+    'roic': ('get_combined_data', 'get_financials', 'get_ratios'),
+    'wacc': ('get_wacc_html',),
+    'barchart': ('get_barchart_html',),
+    'earningshub': ('get_earnings_date_earningshub',),
+    'tradingview': ('_extract_tradingview_from_page',),
+}
+
+
+def scale_scraper_delays(scale):
+    """只縮放 StockScraper 模組內的 asyncio.sleep（其他模組不受影響）"""
+    import asyncio as real_asyncio
+
+    shim = types.ModuleType('asyncio')
+    shim.__dict__.update(real_asyncio.__dict__)
+
+    async def sleep(delay, result=None):
+        return await real_asyncio.sleep(delay * scale, result)
+
+    shim.sleep = sleep
+    scraper_module.asyncio = shim if scale != 1 else real_asyncio
+
+
+def percentile(values, q):
+    """nearest-rank 百分位數"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ChromiumMemorySampler:
+    """定期加總本程序底下所有 Chromium 子程序的 RSS，記錄峰值（未安裝 psutil 時停用）"""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    @property
+    def available(self):
+        return self._process is not None
+
+    def sample(self):
+        total = 0
+        for child in self._process.children(recursive=True):
+            try:
+                if 'chrom' in child.name().lower() or 'headless_shell' in child.name().lower():
+                    total += child.memory_info().rss
+            except Exception:
+                pass
+        self.peak = max(self.peak, total)
+        return total
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.available:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self.sample()
+
+
+def time_methods(scraper, names, samples):
+    """把實例上的 get_* 換成計時版本（覆寫在實例上，fetch_* 呼叫 self.get_* 時生效）"""
+    for name in names:
+        method = getattr(scraper, name)
+
+        async def timed(*args, _method=method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await _method(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - start) * 1000)
+
+        setattr(scraper, name, timed)
+
+
+def tradingview_pool(scraper, size):
+    """TradingView 設定的無頭 context 池（正式流程為有頭 + CAPTCHA，這裡只量測擷取）"""
+    profile = get_source_profile('tradingview')
+    session = scraper.browser_session
+    return ContextPool(
+        browser_provider=lambda: session.get_browser(headless=True),
+        source='tradingview',
+        size=size,
+        context_options=profile['context_options'],
+        init_script=profile['init_script'],
+        resource_policy=session.get_policy('tradingview'),
+    )
+
+
+async def run_source(scraper, source, stocks):
+    """執行單一來源的抓取，回傳成功的股票數"""
+    if source == 'roic':
+        items = [item async for _, item in scraper.stream_roic_bundle()]
+    elif source == 'wacc':
+        items = [item async for _, item in scraper.stream_wacc()]
+    elif source == 'barchart':
+        items = await scraper.run_barchart()
+    elif source == 'earningshub':
+        items = await scraper.run_earnings_dates()
+    else:
+        pool = tradingview_pool(scraper, scraper.max_concurrent)
+        semaphore = asyncio.Semaphore(scraper.max_concurrent)
+
+        async def fetch(stock):
+            async with semaphore:
+                async with pool.leased() as page:
+                    await page.goto(scraper._tradingview_url(stock), wait_until='domcontentloaded', timeout=60000)
+                    return {stock: await scraper._extract_tradingview_from_page(stock, page)}
+
+        try:
+            items = await asyncio.gather(*[fetch(stock) for stock in stocks])
+        finally:
+            await pool.close()
+
+    return sum(1 for item in items if 'error' not in item and all(value is not None for value in item.values()))
+
+
+async def run_once(args, concurrency, stocks):
+    session = BrowserSessionManager(pacing=args.pacing)
+    scraper = StockScraper(
+        stocks={'final_stocks': stocks, 'us_stocks': stocks, 'non_us_stocks': []},
+        config={'http_fast_path': args.http, 'html_parser': args.html_parser},
+        max_concurrent=concurrency,
+        browser_session=session,
+    )
+
+    sampler = ChromiumMemorySampler()
+    results = {}
+    try:
+        # 先啟動瀏覽器，不把 Chromium 啟動時間算進第一個來源
+        await session.get_browser(headless=True)
+        sampler.start()
+
+        for source in args.sources:
+            samples = []
+            time_methods(scraper, TIMED_METHODS[source], samples)
+            start = time.perf_counter()
+            succeeded = await run_source(scraper, source, stocks)
+            limiter = session.limiters.get(source)
+            results[source] = {
+                'elapsed': time.perf_counter() - start,
+                'succeeded': succeeded,
+                'latencies': samples,
+                'limit': limiter.stats() if limiter else None,
+            }
+    finally:
+        await sampler.stop()
+        await scraper.cleanup()
+        await session.shutdown()
+
+    return results, sampler
+
+
+def report(concurrency, stocks, results, sampler):
+    elapsed = sum(r['elapsed'] for r in results.values())
+    latencies = [ms for r in results.values() for ms in r['latencies']]
+    rss = f"{sampler.peak / 1024 / 1024:,.0f} MB" if sampler.available else '-'
+
+    print(f"{concurrency:>6}{len(stocks):>8}{elapsed:>10.1f} s{len(stocks) / elapsed:>12.2f}"
+          f"{statistics.median(latencies) if latencies else 0:>10.0f} ms{percentile(latencies, 95):>10.0f} ms{rss:>12}")
+    for source, r in results.items():
+        limit = f"  上限 {r['limit']['limit']}（最高 {r['limit']['peak_limit']}）" if r['limit'] else ''
+        print(f"{'':>6}  └ {source:<12}{r['succeeded']:>4}/{len(stocks):<4}{r['elapsed']:>7.1f} s"
+              f"{len(stocks) / r['elapsed']:>9.2f}/s  p50 {percentile(r['latencies'], 50):>6.0f} ms"
+              f"  p95 {percentile(r['latencies'], 95):>6.0f} ms{limit}")
+
+
+async def main_async(args):
+    scale_scraper_delays(args.delay_scale)
+    stocks = [f"T{i:03d}" for i in range(1, args.tickers + 1)]
+
+    with StandInServer(latency_ms=args.latency_ms) as server:
+        set_base_url_overrides(server.base_urls())
+        print(f"替身網站：{server.url}（每個回應延遲 {args.latency_ms} ms）")
+        print(f"來源：{', '.join(args.sources)}；股票 {len(stocks)} 支；延遲縮放 {args.delay_scale}\n")
+
+        header = f"{'並發':>6}{'股票':>8}{'耗時':>12}{'股票/秒':>12}{'p50':>13}{'p95':>13}{'Chromium RSS':>12}"
+        print(header)
+        print('-' * len(header))
+
+        try:
+            for concurrency in args.concurrency:
+                results, sampler = await run_once(args, concurrency, stocks)
+                report(concurrency, stocks, results, sampler)
+        finally:
+            set_base_url_overrides({})
+
+        print(f"\n替身網站共處理 {server.requests} 個請求")
+        if not ChromiumMemorySampler().available:
+            print("（未安裝 psutil，無法量測 Chromium RSS）")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='StockScraper 吞吐量測試（本機替身網站）')
+    arg_parser.add_argument('--tickers', type=int, default=30, help='測試股票數')
+    arg_parser.add_argument('--concurrency', type=int, nargs='+', default=[3, 5, 10, 15, 20],
+                            help='要比較的 max_concurrent 值（各來源 AdaptiveLimiter 的起始上限）')
+    arg_parser.add_argument('--sources', nargs='+', choices=SOURCES, default=list(SOURCES))
+    arg_parser.add_argument('--latency-ms', type=int, default=50, help='替身網站每個回應的延遲（模擬網路）')
+    arg_parser.add_argument('--delay-scale', type=float, default=0.0,
+                            help='StockScraper 內 asyncio.sleep 的縮放（0 = 不等待，1 = 與正式執行相同）')
+    arg_parser.add_argument('--http', action='store_true', help='啟用 HTTP 快速路徑（預設只測瀏覽器）')
+    arg_parser.add_argument('--html-parser', default=None, help='selectolax / lxml / html.parser')
+    arg_parser.add_argument('--pacing', action='store_true',
+                            help='啟用各主機的導覽節流（TokenBucket，預設關閉以量測爬蟲本身）')
+    asyncio.run(main_async(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
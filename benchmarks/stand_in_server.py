@@ -0,0 +1,247 @@
+"""
+本機替身網站：提供與 roic.ai / Barchart / gurufocus（WACC）/ TradingView / earningshub 同形狀的頁面
+
+每個來源掛在自己的路徑前綴下（http://127.0.0.1:<port>/<來源>/...），
+搭配 SourceProfiles.set_base_url_overrides(server.base_urls()) 讓 StockScraper 改連本機。
+
+頁面只保留擷取器實際會讀的結構（class / data-* 屬性與 StockScraper 的選擇器一致），
+數值由股票代碼決定，重複執行結果相同。
+
+單獨啟動（手動檢查頁面用）：
+    python benchmarks/stand_in_server.py --port 8765
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+YEARS = list(range(2015, 2025))
+WEEKDAYS = '一二三四五六日'
+
+ROIC_TABLE_CLASS = 'w-full caption-bottom text-sm table-fixed'
+ROIC_SECTIONS = {
+    'summary': ['Revenue', 'Net income', 'EPS', 'ROIC', 'Free cash flow'],
+    'financials': [
+        ['Revenue', 'Cost of revenue', 'Gross profit', 'Operating income', 'Net income', 'EPS diluted'],
+        ['Cash and equivalents', 'Total assets', 'Total liabilities', 'Total equity', 'Long-term debt'],
+        ['Operating cash flow', 'Capital expenditure', 'Free cash flow', 'Dividends paid', 'Share buyback'],
+    ],
+    'ratios': [
+        ['ROIC', 'ROE', 'ROA'],
+        ['Gross margin', 'Operating margin', 'Net margin'],
+        ['Current ratio', 'Quick ratio'],
+        ['Debt to equity', 'Interest coverage'],
+        ['P/E', 'P/B', 'EV/EBITDA'],
+        ['Asset turnover', 'Inventory turnover'],
+        ['Dividend yield', 'Payout ratio'],
+    ],
+}
+
+
+def _rng(*parts):
+    seed = int(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()[:8], 16)
+    return random.Random(seed)
+
+
+def _page(title, body):
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head>'
+            f'<body><h1>{title}</h1>{body}</body></html>')
+
+
+def _roic_table(rng, rows):
+    header = '<th></th>' + ''.join(f'<th>{year} Y</th>' for year in YEARS)
+    body = ''.join(
+        '<tr><td>' + label + '</td>' + ''.join(f'<td>{rng.uniform(-500, 5000):,.2f}</td>' for _ in YEARS) + '</tr>'
+        for label in rows
+    )
+    return f'<table class="{ROIC_TABLE_CLASS}"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def roic_quote(stock):
+    rng = _rng('roic_quote', stock)
+    metrics = [('EPS', f'{rng.uniform(1, 20):.2f}'), ('P/E', f'{rng.uniform(8, 60):.2f}'),
+               ('MARKET CAP', f'{rng.uniform(5, 3000):.2f}B')]
+    ratios = ''.join(
+        '<div class="shrink-0 flex-col">'
+        f'<span class="text-muted-foreground text-sm uppercase">{label}</span>'
+        f'<span class="text-foreground text-lg">{value}</span>'
+        '</div>'
+        for label, value in metrics
+    )
+    body = f'<div data-cy="company_header_ratios">{ratios}</div>' + _roic_table(rng, ROIC_SECTIONS['summary'])
+    return _page(f'{stock} quote', body)
+
+
+def roic_tables(stock, section):
+    rng = _rng('roic', section, stock)
+    return _page(f'{stock} {section}', ''.join(_roic_table(rng, rows) for rows in ROIC_SECTIONS[section]))
+
+
+def barchart(stock):
+    rng = _rng('barchart', stock)
+    text = (f'Implied Volatility:&nbsp;{rng.uniform(15, 80):.2f}% '
+            f'Historical Volatility:&nbsp;{rng.uniform(10, 70):.2f}% '
+            f'IV Percentile:&nbsp;{rng.randint(1, 99)}% IV Rank:&nbsp;{rng.uniform(1, 99):.2f}%')
+    return _page(f'{stock} volatility', f'<div class="bc-datatable-toolbar bc-options-toolbar volatility">{text}</div>')
+
+
+def wacc(stock):
+    rng = _rng('wacc', stock)
+    return _page(f'{stock} WACC %',
+                 f'<p>{stock} WACC %</p><font style="font-size: 24px">:{rng.uniform(5, 12):.2f}% (As of Jan. 30, 2026)</font>')
+
+
+def earningshub(stock):
+    rng = _rng('earningshub', stock)
+    when = datetime.now() + timedelta(days=rng.randint(5, 80))
+    date_text = f'{when.year}年{when.month}月{when.day}日 週{WEEKDAYS[when.weekday()]} 上午5:00'
+    past = datetime.now() - timedelta(days=rng.randint(10, 80))
+    past_text = f'{past.year}年{past.month}月{past.day}日 週{WEEKDAYS[past.weekday()]} 下午9:00'
+    alerts = (
+        '<div class="MuiAlert-root">Q4 2025 Earnings '
+        f'<span class="MuiTypography-caption">{past_text}<span class="MuiBox-root">CONFIRMED</span></span></div>'
+        '<div class="MuiAlert-root">Q1 2026 Earnings '
+        f'<span class="MuiTypography-caption">{date_text}<span class="MuiBox-root">ESTIMATE</span></span></div>'
+    )
+    return _page(f'{stock} earnings', alerts)
+
+
+def tradingview(stock):
+    rng = _rng('tradingview', stock)
+    years = ''.join(f'<div class="value-OxVAcLqi">{year}</div>' for year in YEARS[-6:])
+    sections = ''
+    for name in ('Reported', 'Estimate', 'Surprise'):
+        values = ''.join(
+            f'<div class="container-OxVAcLqi"><div class="value-OxVAcLqi">{rng.uniform(0.5, 12):.2f}</div></div>'
+            for _ in YEARS[-6:]
+        )
+        sections += f'<div data-name="{name}"><div class="values-C9MdAMrq">{values}</div></div>'
+    return _page(f'{stock} earnings', f'<div class="values-AtxjAQkN">{years}</div>{sections}')
+
+
+def beta(stock):
+    rng = _rng('beta', stock)
+    return _page(f'{stock}', '<div class="wrapper-QCJM7wcY"><div>Beta (1Y)</div>'
+                             f'<div class="value-QCJM7wcY">{rng.uniform(0.3, 2.2):.2f}</div></div>')
+
+
+# (來源, 路徑規則, 頁面產生函式)；路徑不含來源前綴
+ROUTES = [
+    ('roic', re.compile(r'^/quote/([^/]+)/financials$'), lambda m: roic_tables(m.group(1), 'financials')),
+    ('roic', re.compile(r'^/quote/([^/]+)/ratios$'), lambda m: roic_tables(m.group(1), 'ratios')),
+    ('roic', re.compile(r'^/quote/([^/]+)$'), lambda m: roic_quote(m.group(1))),
+    ('barchart', re.compile(r'^/stocks/quotes/([^/]+)/volatility-charts$'), lambda m: barchart(m.group(1))),
+    ('wacc', re.compile(r'^/term/wacc/([^/]+)$'), lambda m: wacc(m.group(1))),
+    ('earningshub', re.compile(r'^/quote/([^/]+)$'), lambda m: earningshub(m.group(1))),
+    ('tradingview', re.compile(r'^/symbols/[A-Z]+-([^/]+)/financials-earnings/$'), lambda m: tradingview(m.group(1))),
+    ('beta', re.compile(r'^/symbols/[A-Z]+-([^/]+)/$'), lambda m: beta(m.group(1))),
+]
+SOURCES = sorted({source for source, _, _ in ROUTES})
+
+
+def render(path):
+    """/<來源>/<路徑> → HTML（找不到時為 None）"""
+    path = path.split('?', 1)[0]
+    _, _, rest = path.partition('/')
+    source, _, sub_path = rest.partition('/')
+    for route_source, pattern, builder in ROUTES:
+        if route_source != source:
+            continue
+        match = pattern.match('/' + sub_path)
+        if match:
+            return builder(match)
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        latency = self.server.latency
+        if latency:
+            time.sleep(latency)
+
+        html = render(self.path)
+        body = (html or '<h1>404</h1>').encode('utf-8')
+        self.send_response(200 if html else 404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.requests += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """
+    背景執行緒中的替身網站
+
+    使用範例：
+        with StandInServer(latency_ms=50) as server:
+            set_base_url_overrides(server.base_urls())
+            ...
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency_ms / 1000
+        self.httpd.requests = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def base_urls(self):
+        """{來源: base_url}，交給 set_base_url_overrides()"""
+        return {source: f'{self.url}/{source}' for source in SOURCES}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='本機替身網站')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--latency-ms', type=int, default=0, help='每個回應額外延遲（毫秒）')
+    args = arg_parser.parse_args()
+
+    server = StandInServer(port=args.port, latency_ms=args.latency_ms)
+    print(f"替身網站：{server.url}")
+    for source, base_url in server.base_urls().items():
+        print(f"  {source:<12} {base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,9 +14,38 @@ from schwab.config_manager import check_and_setup_config
 from stock_class.StockScraper import TokenExpiredException
 import tkinter as tk
 from tkinter import messagebox
+import argparse
+import multiprocessing
 import sys
 import os
 
+
+def parse_args():
+    """命令列選項（未知參數保留給 PyInstaller / tkinter）"""
+    parser = argparse.ArgumentParser(description='財報數據自動化程式')
+    parser.add_argument('--max-age', type=float, default=None,
+                        help='快照有效期限（小時），覆寫各資料來源的預設值')
+    parser.add_argument('--force-refresh', action='store_true',
+                        help='忽略既有快照，全部重新抓取')
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument('--har-record', metavar='DIR', default=None,
+                           help='錄製本次所有回應到 DIR/<來源>.har')
+    har_group.add_argument('--har-replay', metavar='DIR', default=None,
+                           help='以 DIR 中的錄製檔回放（不連網）')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='無頭來源（roic / WACC / Barchart / 財報日期）分成 N 個程序抓取')
+    parser.add_argument('--job-queue', metavar='DB', default=None,
+                        help='分散式模式：無頭來源排入 DB（SQLite），由 ScrapeWorker 抓取')
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help='分散式模式下在本機啟動的 worker 數')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='每次分析的時間預算（分鐘），超過時取消未完成的階段並保存已完成的數據')
+    parser.add_argument('--stage-budget', type=float, default=None,
+                        help='每個抓取階段的時間預算（分鐘）')
+    args, _ = parser.parse_known_args()
+    return args
+
+
 def main():
     """主程式入口 - 加入啟動畫面"""
     try:
@@ -41,7 +70,13 @@ def main():
         print("🚀 啟動股票分析系統...")
 
         # 🔥 步驟 3: 啟動主 GUI
-        app = StockAnalyzerGUI(config)
+        args = parse_args()
+        har_mode = 'record' if args.har_record else ('replay' if args.har_replay else None)
+        app = StockAnalyzerGUI(config, max_age=args.max_age, force_refresh=args.force_refresh,
+                               har_mode=har_mode, har_dir=args.har_record or args.har_replay,
+                               shards=args.shards, job_queue=args.job_queue, local_workers=args.local_workers,
+                               run_budget=args.budget * 60 if args.budget else None,
+                               stage_budget=args.stage_budget * 60 if args.stage_budget else None)
         app.run()
 
     except TokenExpiredException as e:
@@ -108,4 +143,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 🔥 打包後的 exe 以 spawn 啟動分片子程序時，子程序必須在這裡接手，不能再開一次 GUI
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from collections import deque
+
+
+# 🔥 這些訊號代表主機已經吃不消（或開始擋爬蟲），上限立即減半
+BACKOFF_SIGNALS = ('timeout', '429', 'blocked', 'challenge', 'slow')
+
+
+class AdaptiveLimiter:
+    """
+    單一資料來源的自適應並發上限（AIMD），取代固定的 asyncio.Semaphore(max_concurrent)
+
+    - 加法增加：最近的請求沒有錯誤、延遲沒有明顯變慢，且上限確實被用滿時，
+      每完成約「上限」個健康請求，上限 +1（與 TCP 壅塞避免相同）
+    - 乘法減少：逾時、HTTP 429 / 403、驗證頁、延遲超過基準的 slow_factor 倍時，上限乘以 backoff
+    - 同一波壅塞只減一次：在上次減少之前就已開始的請求，失敗不再重複減少
+    - 已借出的名額不會被收回，上限降低後由歸還自然收斂
+
+    用法與 asyncio.Semaphore 相同（async with limiter: ...），結果由 record_success / record_failure 回報
+
+    使用範例：
+        limiter = AdaptiveLimiter('roic', initial=15, max_limit=24)
+        async with limiter:
+            started = time.monotonic()
+            ...
+            limiter.record_success(started)
+    """
+
+    def __init__(self, source, initial, min_limit=1, max_limit=30, backoff=0.5, slow_factor=3.0,
+                 window=20, max_error_rate=0.1):
+        """
+        Args:
+            source: 資料來源名稱（僅用於日誌 / 統計）
+            initial: 起始上限（StockScraper 的 max_concurrent）
+            min_limit / max_limit: 上限的調整範圍
+            backoff: 乘法減少的倍率
+            slow_factor: 延遲超過基準（成功請求延遲的移動平均）幾倍視為壅塞
+            window: 計算錯誤率的最近請求數
+            max_error_rate: 錯誤率超過此值時停止增加
+        """
+        self.source = source
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.backoff = backoff
+        self.slow_factor = slow_factor
+        self.max_error_rate = max_error_rate
+
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._waiters = deque()
+        self._recent = deque(maxlen=window)  # 最近請求是否成功
+        self._baselines = {}  # {頁面種類: 成功請求延遲的移動平均（秒）}
+        self._samples = {}
+        self._last_decrease = 0.0
+
+        self.in_flight = 0
+
+        # 統計
+        self.peak_in_flight = 0
+        self.peak_limit = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.successes = 0
+        self.failures = {}
+
+    @property
+    def limit(self):
+        """目前的並發上限"""
+        return max(self.min_limit, int(self._limit))
+
+    # ------------------------------------------------------------------
+    # 取得 / 歸還名額
+    # ------------------------------------------------------------------
+
+    async def acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self._grant()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 名額已經給出但任務被取消 → 還回去
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _grant(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _wake(self):
+        """依目前上限把名額交給排隊中的請求（先到先得）"""
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._grant()
+            waiter.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    # ------------------------------------------------------------------
+    # 回報結果
+    # ------------------------------------------------------------------
+
+    def record_success(self, started, kind=None):
+        """
+        回報一次成功的請求
+
+        Args:
+            started: 請求開始的 time.monotonic()
+            kind: 頁面種類（等待條件不同的頁面延遲差很多，各自計算基準）
+        """
+        latency = time.monotonic() - started
+        self.successes += 1
+        self._recent.append(True)
+
+        baseline = self._baselines.get(kind)
+        samples = self._samples.get(kind, 0)
+        if baseline is not None and samples >= 5 and latency > baseline * self.slow_factor:
+            # 🔥 延遲飆高：主機開始排隊，視同壅塞
+            self._decrease('slow', started)
+            return
+
+        self._baselines[kind] = latency if baseline is None else baseline * 0.9 + latency * 0.1
+        self._samples[kind] = samples + 1
+
+        # 上限沒有被用滿時增加沒有意義（股票已經不夠多）
+        if self.in_flight * 2 >= self.limit and self.error_rate() <= self.max_error_rate:
+            self._increase()
+
+    def record_failure(self, reason, started):
+        """
+        回報一次失敗的請求
+
+        Args:
+            reason: 'timeout' / '429' / 'blocked' / 'challenge' / 'slow' 會減少上限；其他原因只計入錯誤率
+            started: 請求開始的 time.monotonic()
+        """
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+        self._recent.append(False)
+        if reason in BACKOFF_SIGNALS:
+            self._decrease(reason, started)
+
+    def error_rate(self):
+        if not self._recent:
+            return 0.0
+        return self._recent.count(False) / len(self._recent)
+
+    def _increase(self):
+        before = self.limit
+        self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+        if self.limit > before:
+            self.increases += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._wake()
+
+    def _decrease(self, reason, started):
+        if started < self._last_decrease:
+            # 這個請求在上次減少前就已開始，屬於同一波壅塞
+            return
+
+        before = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self._last_decrease = time.monotonic()
+        if self.limit < before:
+            self.decreases += 1
+            print(f"🐢 [{self.source}] {reason} → 並發上限 {before} → {self.limit}")
+
+    # ------------------------------------------------------------------
+    # 統計
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        baselines = {kind or 'default': round(value * 1000) for kind, value in self._baselines.items()}
+        return {
+            'source': self.source,
+            'limit': self.limit,
+            'min': self.min_limit,
+            'max': self.max_limit,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'peak_limit': self.peak_limit,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'successes': self.successes,
+            'failures': dict(self.failures),
+            'error_rate': round(self.error_rate(), 3),
+            'baseline_ms': baselines,
+        }
+
+    def reset_stats(self):
+        """重置統計（保留學到的上限與延遲基準，下一次分析從這裡繼續）"""
+        self.peak_in_flight = self.in_flight
+        self.peak_limit = self.limit
+        self.increases = 0
+        self.decreases = 0
+        self.successes = 0
+        self.failures = {}
+
+    def describe(self):
+        failures = '、'.join(f"{reason} {count}" for reason, count in self.failures.items()) or '無'
+        return (f"並發上限 {self.limit}（範圍 {self.min_limit}–{self.max_limit}，最高 {self.peak_limit}，"
+                f"同時進行最多 {self.peak_in_flight}；調升 {self.increases} / 調降 {self.decreases}；失敗：{failures}）")
@@ -0,0 +1,416 @@
+import asyncio
+import time
+from stock_class.AdaptiveLimiter import AdaptiveLimiter
+from stock_class.ContextPool import ContextPool
+from stock_class.MemoryGovernor import MemoryGovernor
+from stock_class.PageReadiness import ReadinessTracker
+from stock_class.ResourcePolicy import build_resource_policy, format_bytes
+from stock_class.RetryPolicy import CircuitBreaker
+from stock_class.SourceProfiles import concurrency_limits, get_source_profile, navigation_rate, source_host
+from stock_class.TokenBucket import TokenBucket
+
+
+class BrowserSessionManager:
+    """
+    Playwright / Chromium 會話管理器
+
+    🔥 一次分析只啟動一次 Playwright：
+    - 無頭（headless）與有頭（headful）階段各自擁有一個長駐的 Chromium 實例
+    - 各個 run_* 階段只向管理器「借用」瀏覽器，不再自行啟動 / 關閉
+    - 只要事件循環不變（GUI 會保留暖機中的事件循環），下一次分析可直接沿用
+    - 每個資料來源一個 ContextPool，與瀏覽器一起保持暖機
+    - MemoryGovernor 取樣 Chromium 的 RSS，決定 context 何時回收、有頭階段一次開多少頁面
+
+    使用範例：
+        session = BrowserSessionManager()
+        browser = await session.get_browser(headless=True)
+        ...
+        await session.shutdown()
+    """
+
+    def __init__(self, memory_governor=None, pacing=True, navigation_rates=None):
+        """
+        Args:
+            memory_governor: MemoryGovernor（None 表示使用預設值）
+            pacing: 是否依主機節流導覽（TokenBucket）；benchmarks 量測爬蟲本身時關閉
+            navigation_rates: 覆寫 SourceProfiles.NAVIGATION_RATES（{主機: {'rate', 'burst'}}）
+        """
+        self.playwright = None
+        self.browsers = {}  # {headless(bool): Browser}
+        self.pools = {}  # {source: ContextPool}
+        self.policies = {}  # {source: ResourcePolicy}（不綁事件循環，統計跨 context 累計）
+        self.limiters = {}  # {source: AdaptiveLimiter}（學到的並發上限跨分析沿用）
+        self.breakers = {}  # {host: CircuitBreaker}（主機持續失敗時直接略過請求）
+        self.pacers = {}  # {host: TokenBucket}（同一主機的導覽頻率上限，所有協程共用）
+        self.pacing = pacing
+        self.navigation_rates = dict(navigation_rates or {})
+        self.har_archive = None  # HarArchive（錄製 / 回放模式），None 表示正常連網
+        self.memory = memory_governor or MemoryGovernor()
+        self.readiness = ReadinessTracker()  # 導覽後等待渲染完成（取代固定 sleep）與節省時間統計
+        self.loop = None  # Playwright 綁定的事件循環
+        self.launch_count = 0  # 實際啟動 Chromium 的次數（供日誌 / 效能檢查）
+
+        # 🔥 Playwright 內部的長駐任務（GUI 結束一次分析時不可取消）
+        self.protected_tasks = set()
+
+        self._lock = None
+
+    def is_warm(self, loop=None):
+        """是否已有可用的瀏覽器（且綁定在指定的事件循環上）"""
+        if self.playwright is None or not self.browsers:
+            return False
+        if loop is not None and loop is not self.loop:
+            return False
+        return any(browser.is_connected() for browser in self.browsers.values())
+
+    def _bind_loop(self):
+        """綁定目前的事件循環；若事件循環已更換，舊的 Playwright 連線無法沿用"""
+        loop = asyncio.get_running_loop()
+
+        if self.loop is not loop:
+            if self.loop is not None:
+                print("⚠️ 事件循環已更換，重新建立 Playwright 會話")
+            self.playwright = None
+            self.browsers = {}
+            self.pools = {}
+            self.protected_tasks = set()
+            self.loop = loop
+            self._lock = asyncio.Lock()
+
+    async def get_browser(self, headless=True):
+        """取得（必要時啟動）指定模式的長駐瀏覽器"""
+        self._bind_loop()
+
+        async with self._lock:
+            browser = self.browsers.get(headless)
+            if browser is not None and browser.is_connected():
+                return browser
+
+            tasks_before = asyncio.all_tasks()
+
+            if self.playwright is None:
+                print("🔧 正在啟動 Playwright...")
+                from playwright.async_api import async_playwright
+                self.playwright = await async_playwright().start()
+
+            print(f"🔧 正在啟動 Chromium（{'無頭' if headless else '有頭'}模式，反偵測）...")
+            browser = await self.playwright.chromium.launch(
+                headless=headless,
+                args=self._build_launch_args(headless)
+            )
+
+            # 🔥 記錄 Playwright 在啟動期間建立的背景任務
+            self.protected_tasks |= asyncio.all_tasks() - tasks_before - {asyncio.current_task()}
+
+            self.browsers[headless] = browser
+            self.launch_count += 1
+
+            if headless:
+                print("✅ 瀏覽器啟動成功（無頭模式）")
+            else:
+                print("✅ 瀏覽器啟動成功（視窗已置中）")
+
+            return browser
+
+    def get_pool(self, source, size):
+        """取得（必要時建立）指定資料來源的 ContextPool"""
+        self._bind_loop()
+
+        pool = self.pools.get(source)
+        if pool is None:
+            profile = get_source_profile(source)
+            headless = profile['headless']
+            pool = ContextPool(
+                browser_provider=lambda: self.get_browser(headless=headless),
+                source=source,
+                size=size,
+                context_options=profile['context_options'],
+                init_script=profile['init_script'],
+                resource_policy=self.get_policy(source),
+                har_archive=self.har_archive,
+                governor=self.memory
+            )
+            self.pools[source] = pool
+        return pool
+
+    def get_policy(self, source):
+        """取得指定資料來源的請求攔截規則（未設定時為 None）"""
+        if source not in self.policies:
+            profile = get_source_profile(source)
+            self.policies[source] = build_resource_policy(source, profile.get('resource_policy'))
+        return self.policies[source]
+
+    def get_limiter(self, source, initial):
+        """
+        取得（必要時建立）指定資料來源的 AdaptiveLimiter
+
+        Args:
+            initial: 第一次建立時的起始上限；之後沿用上次分析結束時的上限
+        """
+        limiter = self.limiters.get(source)
+        if limiter is None:
+            limits = concurrency_limits(source)
+            limiter = AdaptiveLimiter(source, initial=initial, min_limit=limits['min'], max_limit=limits['max'])
+            self.limiters[source] = limiter
+        return limiter
+
+    def get_breaker(self, source):
+        """取得（必要時建立）資料來源所屬主機的 CircuitBreaker"""
+        host = source_host(source)
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host)
+            self.breakers[host] = breaker
+        return breaker
+
+    def get_pacer(self, source):
+        """
+        取得（必要時建立）資料來源所屬主機的 TokenBucket（關閉節流時為 None）
+
+        🔥 以主機為單位：同一主機的所有來源 / 協程共用一個 bucket
+        """
+        if not self.pacing or (self.har_archive is not None and self.har_archive.mode == 'replay'):
+            # 回放模式不連外網，不需要節流
+            return None
+
+        host = source_host(source)
+        pacer = self.pacers.get(host)
+        if pacer is None:
+            rate = self.navigation_rates.get(host) or navigation_rate(host)
+            pacer = TokenBucket(host, rate=rate['rate'], burst=rate['burst'])
+            self.pacers[host] = pacer
+        return pacer
+
+    async def prewarm(self, sources, initial, contexts=None):
+        """
+        預先啟動瀏覽器並建立各來源的 context（分析開始時在背景執行，與驗證階段的 I/O 重疊）
+
+        Args:
+            sources: 要預熱的資料來源（依序啟動各自需要的瀏覽器模式）
+            initial: 並發上限的起始值（同 get_limiter）
+            contexts: 每個來源最多預先建立的 context 數（預設為目前的並發上限）
+
+        Returns:
+            float: 耗時（秒）
+        """
+        started = time.monotonic()
+
+        for headless in dict.fromkeys(get_source_profile(source)['headless'] for source in sources):
+            await self.get_browser(headless=headless)
+
+        fills = []
+        for source in sources:
+            limiter = self.get_limiter(source, initial)
+            count = limiter.limit if contexts is None else min(contexts, limiter.limit)
+            fills.append(self.get_pool(source, size=limiter.max_limit).fill(count))
+        await asyncio.gather(*fills)
+
+        return time.monotonic() - started
+
+    async def new_context(self, source):
+        """
+        依資料來源設定建立獨立（不進池）的 context
+
+        供需要同時保留大量頁面的階段使用（TradingView / Beta 集中處理 CAPTCHA）
+        """
+        profile = get_source_profile(source)
+        browser = await self.get_browser(headless=profile['headless'])
+        context = await browser.new_context(**profile['context_options'])
+        if profile['init_script']:
+            await context.add_init_script(profile['init_script'])
+        policy = self.get_policy(source)
+        if policy:
+            await policy.attach(context)
+        if self.har_archive:
+            await self.har_archive.attach(context, source)
+        return context
+
+    async def use_har_archive(self, archive):
+        """
+        切換 HAR 錄製 / 回放（None 表示正常連網）
+
+        🔥 暖機中的 context 沒有掛上新的 HarArchive，切換時關閉所有池，之後借用時重新建立
+        """
+        self._bind_loop()
+        if archive is self.har_archive:
+            return
+
+        async with self._lock:
+            if archive is self.har_archive:
+                return
+            for pool in self.pools.values():
+                await pool.close()
+            self.pools = {}
+            self.har_archive = archive
+
+        if archive is not None:
+            print(f"📼 HAR {'錄製' if archive.mode == 'record' else '回放'}模式：{archive.directory}")
+
+    def reset_resource_stats(self):
+        """重置所有來源的請求攔截 / 並發統計（每次分析開始時呼叫）"""
+        for policy in self.policies.values():
+            if policy:
+                policy.reset_stats()
+        for limiter in self.limiters.values():
+            limiter.reset_stats()
+        self.memory.reset_stats()
+        self.readiness.reset_stats()
+        # 🔥 斷路狀態不跨分析沿用（使用者可能已排除網路問題）
+        for breaker in self.breakers.values():
+            breaker.reset()
+        for pacer in self.pacers.values():
+            pacer.reset_stats()
+
+    def resource_stats(self):
+        """所有來源的請求攔截統計"""
+        return {source: policy.stats() for source, policy in self.policies.items() if policy}
+
+    def log_resource_stats(self, log=print):
+        """輸出本次分析各來源封鎖的請求數與估計節省的流量"""
+        stats = {source: s for source, s in self.resource_stats().items() if s['blocked'] or s['allowed']}
+        if not stats:
+            return
+
+        total_blocked = sum(s['blocked'] for s in stats.values())
+        total_saved = sum(s['estimated_bytes_saved'] for s in stats.values())
+
+        log(f"🚫 請求攔截：共封鎖 {total_blocked} 個請求，估計節省 {format_bytes(total_saved)}")
+        for source, s in stats.items():
+            log(f"   • {source}: 封鎖 {s['blocked']} / 放行 {s['allowed']}，"
+                f"估計節省 {format_bytes(s['estimated_bytes_saved'])}")
+
+    def limiter_stats(self):
+        """所有來源的並發上限統計"""
+        return {source: limiter.stats() for source, limiter in self.limiters.items()}
+
+    def log_limiter_stats(self, log=print):
+        """輸出本次分析各來源的並發上限（結束時的值與調整次數）"""
+        limiters = {source: limiter for source, limiter in self.limiters.items()
+                    if limiter.successes or limiter.failures}
+        if not limiters:
+            return
+
+        log("⚙️ 自適應並發：")
+        for source, limiter in limiters.items():
+            log(f"   • {source}: {limiter.describe()}")
+
+    def log_breaker_stats(self, log=print):
+        """輸出本次分析曾經斷路的主機"""
+        tripped = {host: breaker for host, breaker in self.breakers.items() if breaker.trips}
+        if not tripped:
+            return
+
+        log("⛔ 斷路器：")
+        for host, breaker in tripped.items():
+            log(f"   • {host}: {breaker.describe()}")
+
+    def log_pacing_stats(self, log=print):
+        """輸出本次分析各主機的導覽節流（導覽次數與排隊等待的時間）"""
+        pacers = {host: pacer for host, pacer in self.pacers.items() if pacer.acquired}
+        if not pacers:
+            return
+
+        log("🚦 導覽節流：")
+        for host, pacer in pacers.items():
+            log(f"   • {host}: {pacer.describe()}")
+
+    def log_memory_stats(self, log=print):
+        """輸出本次分析 Chromium 的最高記憶體與回收的 context 數"""
+        if not self.memory.enabled and not self.memory.recycled:
+            return
+        self.memory.browser_rss(force=True)
+        log(f"🧠 {self.memory.describe()}")
+
+    def pool_stats(self):
+        """所有 ContextPool 的使用統計"""
+        return {source: pool.stats() for source, pool in self.pools.items()}
+
+    def _build_launch_args(self, headless):
+        """Chromium 啟動參數（加入反偵測）- 自動偵測螢幕並置中"""
+        # 🔥 基礎參數（headless 和 有頭模式都需要）
+        base_args = [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-dev-shm-usage',
+            '--disable-web-security',
+            '--disable-features=IsolateOrigins,site-per-process',
+            '--no-sandbox',
+            '--disable-setuid-sandbox',
+            '--disable-infobars',
+            '--ignore-certifcate-errors',
+            '--ignore-certifcate-errors-spki-list',
+        ]
+
+        # 🔥 根據 headless 狀態決定是否添加視窗參數
+        if not headless:
+            # 只有在有頭模式才處理視窗位置
+            try:
+                from screeninfo import get_monitors
+                monitors = get_monitors()
+                primary_monitor = next((m for m in monitors if m.is_primary), monitors[0])
+
+                screen_width = primary_monitor.width
+                screen_height = primary_monitor.height
+                x_offset = primary_monitor.x
+                y_offset = primary_monitor.y
+
+                print(f"📺 偵測到主螢幕解析度: {screen_width}x{screen_height} (偏移: {x_offset}, {y_offset})")
+                print(f"📺 共 {len(monitors)} 個螢幕")
+
+            except Exception as e:
+                print(f"⚠️ 無法偵測螢幕解析度，使用預設值: {e}")
+                screen_width = 1920
+                screen_height = 1080
+                x_offset = 0
+                y_offset = 0
+
+            # 設定視窗大小
+            window_width = int(screen_width * 0.8)
+            window_height = int(screen_height * 0.85)
+            x_position = x_offset + (screen_width - window_width) // 2
+            y_position = y_offset + (screen_height - window_height) // 2
+
+            print(f"🪟 瀏覽器視窗: {window_width}x{window_height} (位置: {x_position},{y_position})")
+
+            # 添加視窗相關參數
+            base_args.append('--start-maximized')
+        else:
+            # 無頭模式：不添加任何視窗參數
+            print("👻 無頭模式：瀏覽器將在背景執行")
+
+        return base_args
+
+    async def shutdown(self):
+        """關閉所有瀏覽器並停止 Playwright - 確保子進程完全關閉"""
+        if self.playwright is None and not self.browsers:
+            return
+
+        print("🧹 關閉 Playwright 會話...")
+
+        # Step 0: 關閉所有 context 池
+        for pool in self.pools.values():
+            await pool.close()
+        self.pools = {}
+
+        # Step 1: 關閉瀏覽器
+        for headless, browser in list(self.browsers.items()):
+            try:
+                await asyncio.wait_for(browser.close(), timeout=3.0)
+                print(f"✅ {'無頭' if headless else '有頭'}瀏覽器已關閉")
+            except Exception as e:
+                print(f"⚠️ 瀏覽器關閉錯誤: {e}")
+        self.browsers = {}
+
+        # Step 2: 停止 Playwright
+        if self.playwright:
+            try:
+                await asyncio.wait_for(self.playwright.stop(), timeout=3.0)
+                print("✅ Playwright 已停止")
+            except Exception as e:
+                print(f"⚠️ Playwright 停止錯誤: {e}")
+            finally:
+                self.playwright = None
+
+        # 🔥 Step 3: 等待子進程完全結束（只在真正關閉時等待一次）
+        await asyncio.sleep(1.0)
+        self.protected_tasks = set()
+        print("✅ Playwright 會話已關閉")
@@ -0,0 +1,226 @@
+import asyncio
+import time
+
+
+class PooledPage:
+    """從 ContextPool 借出的 context + page"""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.created_at = time.time()
+        self.lease_count = 0
+        self.navigations = 0  # 主框架導航次數（不含 about:blank），供 MemoryGovernor 判斷回收
+        self.failed = False  # 🔥 使用期間發生錯誤 → 歸還時重建
+
+    def _on_navigated(self, frame):
+        if frame.parent_frame is None and frame.url != 'about:blank':
+            self.navigations += 1
+
+
+class ContextPool:
+    """
+    單一資料來源的 BrowserContext / Page 池
+
+    🔥 取代「每支股票 new_context → close」：
+    - 事先建立最多 size 組 context + page，借出（lease）後歸還（release）重複使用
+    - 歸還時做健康檢查，失敗或使用中出錯的 context 直接關閉並重建
+    - 有 MemoryGovernor 時：導航次數過多的 context 回收重建；記憶體超過上限時關閉而不回到池中
+    - 提供 hits / misses 等統計（stats）
+
+    使用範例：
+        pool = ContextPool(browser_provider, 'roic', size=15, context_options={...})
+        async with pool.leased() as page:
+            await page.goto(url)
+    """
+
+    def __init__(self, browser_provider, source, size, context_options, init_script=None, resource_policy=None,
+                 har_archive=None, governor=None):
+        """
+        Args:
+            browser_provider: 無參數的 coroutine function，回傳可用的 Browser
+            source: 資料來源名稱（僅用於日誌 / 統計）
+            size: 池的上限（同時借出的最大數量）
+            context_options: browser.new_context(...) 的參數
+            init_script: 每個 context 注入的反偵測腳本
+            resource_policy: 每個 context 掛上的請求攔截規則（ResourcePolicy，可為 None）
+            har_archive: HAR 錄製 / 回放（HarArchive，可為 None）
+            governor: 記憶體管理（MemoryGovernor，可為 None）
+        """
+        self.browser_provider = browser_provider
+        self.source = source
+        self.size = size
+        self.context_options = context_options
+        self.init_script = init_script
+        self.resource_policy = resource_policy
+        self.har_archive = har_archive
+        self.governor = governor
+
+        self._idle = []
+        self._all = set()
+        self._slots = asyncio.Semaphore(size)
+
+        # 統計
+        self.hits = 0  # 直接借到閒置的 context
+        self.misses = 0  # 需要新建 context
+        self.resets = 0  # 因錯誤 / 健康檢查失敗而重建
+        self.recycled = 0  # 因導航次數 / 記憶體而回收
+        self.created = 0
+
+    async def _create(self):
+        """建立一組新的 context + page"""
+        browser = await self.browser_provider()
+        context = await browser.new_context(**self.context_options)
+        if self.init_script:
+            await context.add_init_script(self.init_script)
+        if self.resource_policy:
+            await self.resource_policy.attach(context)
+        if self.har_archive:
+            # 🔥 最後註冊的 route 最先執行：回放模式下所有請求都由 HAR 處理
+            await self.har_archive.attach(context, self.source)
+        page = await context.new_page()
+
+        self.created += 1
+        pooled = PooledPage(context, page)
+        page.on('framenavigated', pooled._on_navigated)
+        self._all.add(pooled)
+        return pooled
+
+    async def fill(self, count=None):
+        """預先建立 context（預設補滿至 size）"""
+        target = self.size if count is None else min(count, self.size)
+        missing = target - len(self._all)
+        if missing <= 0:
+            return
+
+        results = await asyncio.gather(*[self._create() for _ in range(missing)], return_exceptions=True)
+        for pooled in results:
+            if isinstance(pooled, PooledPage):
+                self._idle.append(pooled)
+            else:
+                print(f"⚠️ [{self.source}] 預先建立 context 失敗: {pooled}")
+
+    async def lease(self):
+        """借出一組 context + page（池已滿時等待）"""
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                pooled = self._idle.pop()
+                if self._is_alive(pooled):
+                    self.hits += 1
+                    pooled.lease_count += 1
+                    pooled.failed = False
+                    return pooled
+                await self._discard(pooled)
+
+            self.misses += 1
+            pooled = await self._create()
+            pooled.lease_count += 1
+            return pooled
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, pooled):
+        """歸還 context + page；不健康時關閉並重建，需要回收時依原因關閉"""
+        try:
+            reason = None if pooled.failed else self._recycle_reason(pooled)
+            if reason == 'memory':
+                # 🔥 記憶體超過上限：連同閒置的 context 一起關閉，之後借用時再建立
+                idle, self._idle = self._idle, []
+                for stale in [pooled] + idle:
+                    await self._discard(stale)
+                self.recycled += 1 + len(idle)
+                self.governor.record_recycle(reason, 1 + len(idle))
+                return
+
+            if reason is None and not pooled.failed and await self._health_check(pooled):
+                self._idle.append(pooled)
+                return
+
+            if reason is not None:
+                self.recycled += 1
+                self.governor.record_recycle(reason)
+            else:
+                self.resets += 1
+            await self._discard(pooled)
+            try:
+                self._idle.append(await self._create())
+            except Exception as e:
+                print(f"⚠️ [{self.source}] 重建 context 失敗: {e}")
+        finally:
+            self._slots.release()
+
+    def _recycle_reason(self, pooled):
+        if self.governor is None:
+            return None
+        return self.governor.should_recycle(pooled.navigations)
+
+    def leased(self):
+        """async with pool.leased() as page: ..."""
+        return _LeaseContext(self)
+
+    def _is_alive(self, pooled):
+        try:
+            browser = pooled.context.browser
+            if browser is not None and not browser.is_connected():
+                return False
+            return not pooled.page.is_closed()
+        except Exception:
+            return False
+
+    async def _health_check(self, pooled):
+        """健康檢查：頁面仍可執行 JS，並清空到 about:blank 以停止舊頁面的背景活動"""
+        if not self._is_alive(pooled):
+            return False
+        try:
+            await asyncio.wait_for(pooled.page.goto('about:blank'), timeout=5.0)
+            await asyncio.wait_for(pooled.page.evaluate('1'), timeout=2.0)
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, pooled):
+        self._all.discard(pooled)
+        try:
+            await asyncio.wait_for(pooled.context.close(), timeout=2.0)
+        except Exception:
+            pass
+
+    def stats(self):
+        """池使用統計"""
+        total = self.hits + self.misses
+        return {
+            'source': self.source,
+            'size': self.size,
+            'open': len(self._all),
+            'idle': len(self._idle),
+            'hits': self.hits,
+            'misses': self.misses,
+            'resets': self.resets,
+            'recycled': self.recycled,
+            'created': self.created,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+    async def close(self):
+        """關閉池內所有 context"""
+        for pooled in list(self._all):
+            await self._discard(pooled)
+        self._idle = []
+
+
+class _LeaseContext:
+    def __init__(self, pool):
+        self.pool = pool
+        self.pooled = None
+
+    async def __aenter__(self):
+        self.pooled = await self.pool.lease()
+        return self.pooled.page
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.pooled.failed = True
+        await self.pool.release(self.pooled)
+        return False
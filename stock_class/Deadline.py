@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+import functools
+import time
+
+from stock_class.ResultItems import failed_item
+from stock_class.SourceProfiles import ticker_budget_seconds
+
+
+# 目前生效的期限（asyncio 建立任務時會複製 context，階段內 gather 出來的每支股票都繼承階段的期限）
+_current = contextvars.ContextVar('deadline', default=None)
+
+# 尚未設定 parent 時沿用目前 context 的期限
+_INHERIT = object()
+
+
+class DeadlineExceeded(Exception):
+    """超過時間預算（分析 / 階段 / 單支股票）"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        super().__init__(f"{deadline.owner().label or '工作'} 超過時間預算 {deadline.owner().budget:.0f} 秒")
+
+
+class Deadline:
+    """
+    時間預算：分析 → 階段 → 單支股票逐層往下傳，子層的期限不會晚於上層
+
+    使用範例：
+        run = Deadline(1800, label='分析')
+        stage = Deadline(600, parent=run, label='roic')
+        timeout = stage.timeout_ms(100000)  # 剩餘時間不到 100 秒時縮短
+    """
+
+    def __init__(self, seconds=None, parent=None, label=None):
+        """
+        Args:
+            seconds: 本層預算（None 表示只受上層限制）
+            parent: 上層 Deadline
+            label: 日誌 / 錯誤訊息使用的名稱
+        """
+        self.budget = seconds
+        self.parent = parent
+        self.label = label
+
+        own = time.monotonic() + seconds if seconds is not None else None
+        inherited = parent.expires_at if parent is not None else None
+        candidates = [value for value in (own, inherited) if value is not None]
+        self.expires_at = min(candidates) if candidates else None
+
+    def remaining(self):
+        """剩餘秒數（沒有期限時為 None）"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def owner(self):
+        """實際決定期限的那一層（上層比較早到期時為上層）"""
+        if self.parent is not None and self.parent.expires_at == self.expires_at:
+            return self.parent.owner()
+        return self
+
+    def timeout_ms(self, cap_ms):
+        """單一操作的 timeout（毫秒）：不超過 cap_ms 與剩餘時間；已到期時拋出 DeadlineExceeded"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap_ms
+        if remaining <= 0:
+            raise DeadlineExceeded(self)
+        return max(1, min(cap_ms, int(remaining * 1000)))
+
+    def timeout(self, cap):
+        """同 timeout_ms，單位為秒"""
+        return self.timeout_ms(cap * 1000) / 1000
+
+
+def current_deadline():
+    """目前 context 的期限（沒有時為 None）"""
+    return _current.get()
+
+
+def budget_ms(cap_ms):
+    """依目前的期限縮短單一操作的 timeout（毫秒），供 page.goto / wait_for_selector 等使用"""
+    deadline = _current.get()
+    return deadline.timeout_ms(cap_ms) if deadline is not None else cap_ms
+
+
+def budget_seconds(cap):
+    """同 budget_ms，單位為秒"""
+    deadline = _current.get()
+    return deadline.timeout(cap) if deadline is not None else cap
+
+
+class deadline_scope:
+    """
+    在期限內執行一段程式：到期時取消目前的任務，並在離開時轉為 DeadlineExceeded
+
+    🔥 以 call_later + task.cancel() 實作（與 asyncio.timeout 相同的做法），
+       區塊內建立的子任務（gather）隨之取消，已完成的結果不受影響
+
+    使用範例：
+        async with deadline_scope(600, label='roic'):
+            await manager.process_roic_bundle()
+    """
+
+    def __init__(self, seconds=None, label=None, parent=_INHERIT):
+        self.seconds = seconds
+        self.label = label
+        self.parent = parent
+        self.deadline = None
+
+        self._token = None
+        self._task = None
+        self._handle = None
+        self._expired = False
+
+    async def __aenter__(self):
+        parent = _current.get() if self.parent is _INHERIT else self.parent
+        self.deadline = Deadline(self.seconds, parent=parent, label=self.label)
+        if self.deadline.expired:
+            raise DeadlineExceeded(self.deadline)
+
+        self._token = _current.set(self.deadline)
+        remaining = self.deadline.remaining()
+        if remaining is not None:
+            self._task = asyncio.current_task()
+            self._handle = asyncio.get_running_loop().call_later(remaining, self._expire)
+        return self.deadline
+
+    def _expire(self):
+        self._expired = True
+        self._task.cancel()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._handle is not None:
+            self._handle.cancel()
+        _current.reset(self._token)
+
+        if self._expired and exc_type is asyncio.CancelledError:
+            uncancel = getattr(self._task, 'uncancel', None)
+            if uncancel is not None:
+                uncancel()
+            raise DeadlineExceeded(self.deadline) from None
+        return False
+
+
+class _BudgetedSlot:
+    """取得並發名額後才開始計算單支股票的預算（排隊等待的時間不算在內）"""
+
+    def __init__(self, semaphore, seconds, label):
+        self.semaphore = semaphore
+        self.scope = deadline_scope(seconds, label=label)
+
+    async def __aenter__(self):
+        await self.semaphore.__aenter__()
+        try:
+            await self.scope.__aenter__()
+        except BaseException:
+            await self.semaphore.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            return await self.scope.__aexit__(exc_type, exc, tb)
+        finally:
+            await self.semaphore.__aexit__(None, None, None)
+
+
+def ticker_budget(source):
+    """
+    fetch_*(stock, semaphore) 的單支股票時間預算（SourceProfiles.TICKER_BUDGETS）
+
+    超過預算時取消該股票的抓取，回傳與 fetch_* 失敗時相同格式的結果（failed_item），其他股票不受影響
+
+    使用範例：
+        @ticker_budget('wacc')
+        async def fetch_wacc_data(self, stock, semaphore):
+            async with semaphore:
+                ...
+    """
+
+    def decorator(fetch):
+        @functools.wraps(fetch)
+        async def wrapper(self, stock, semaphore, *args, **kwargs):
+            slot = _BudgetedSlot(semaphore, ticker_budget_seconds(source), label=f"{source} {stock}")
+            try:
+                return await fetch(self, stock, slot, *args, **kwargs)
+            except DeadlineExceeded as e:
+                print(f"⌛ [{source}] {stock}：{e}，已取消")
+                return failed_item(source, stock, f"逾時：{e}")
+
+        return wrapper
+
+    return decorator
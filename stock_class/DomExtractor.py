@@ -0,0 +1,146 @@
+import re
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+
+# roic.ai 財報 / 比率 / Summary 表格
+ROIC_TABLE_SELECTOR = 'table.w-full.caption-bottom.text-sm.table-fixed'
+
+# 🔥 在瀏覽器內直接讀出表格的儲存格文字，不再 page.content() → read_html 重新解析整頁 HTML
+#    回傳格式：[{head: [[cell, ...], ...], body: [...], foot: [...]}]，cell = [text, colspan, rowspan, is_th]
+TABLE_EXTRACT_SCRIPT = """
+(tables) => tables.map((table) => {
+    const readRow = (tr) => Array.from(tr.children)
+        .filter((cell) => cell.tagName === 'TD' || cell.tagName === 'TH')
+        .map((cell) => [
+            (cell.textContent || '').trim(),
+            parseInt(cell.getAttribute('colspan') || '1', 10) || 1,
+            parseInt(cell.getAttribute('rowspan') || '1', 10) || 1,
+            cell.tagName === 'TH'
+        ]);
+    const readRows = (section) => section ? Array.from(section.rows).map(readRow) : [];
+
+    const body = [];
+    for (const tbody of Array.from(table.tBodies)) body.push(...readRows(tbody));
+    return {head: readRows(table.tHead), body: body, foot: readRows(table.tFoot)};
+})
+"""
+
+# 只取出需要的區塊 HTML（其餘頁面不序列化、不解析）
+OUTER_HTML_SCRIPT = "(elements) => elements.map((element) => element.outerHTML)"
+
+# 與 pandas.read_html 相同的空白處理規則
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+
+def _clean_text(text):
+    return _RE_WHITESPACE.sub(" ", text.strip())
+
+
+def _expand_spans(rows):
+    """展開 colspan / rowspan（與 read_html 的處理方式一致：重複填入相同文字）"""
+    all_texts = []
+    remainder = []  # [(欄位索引, 文字, 剩餘 rowspan)]
+
+    for row in rows:
+        texts = []
+        next_remainder = []
+
+        index = 0
+        for text, colspan, rowspan, _ in row:
+            # 先補上從上方延伸下來的儲存格
+            while remainder and remainder[0][0] <= index:
+                prev_i, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = _clean_text(text)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_i, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    # 表格最後仍有 rowspan 延伸時補上列
+    while remainder:
+        next_remainder = []
+        texts = []
+        for prev_i, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_i, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    return all_texts
+
+
+def table_to_dataframe(table, thousands=','):
+    """
+    將 TABLE_EXTRACT_SCRIPT 回傳的單一表格轉成 DataFrame
+
+    🔥 與 pd.read_html 的輸出保持一致（欄名、數值轉型、千分位、"Unnamed: 0" 空欄名），
+       下游 StockProcess 不需任何修改
+    """
+    head = list(table.get('head') or [])
+    body = list(table.get('body') or [])
+    foot = list(table.get('foot') or [])
+
+    # 沒有 <thead> 時，開頭全部為 <th> 的列視為表頭（同 read_html）
+    if not head:
+        while body and body[0] and all(cell[3] for cell in body[0]):
+            head.append(body.pop(0))
+
+    head = _expand_spans(head)
+    body = _expand_spans(body)
+    foot = _expand_spans(foot)
+
+    # 列長度不一時補齊
+    rows = head + body + foot
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(row) for row in rows)
+    rows = [row + [''] * (width - len(row)) for row in rows]
+
+    header = None
+    if len(head) == 1:
+        header = 0
+    elif len(head) > 1:
+        header = list(range(len(head)))
+
+    with TextParser(rows, header=header, thousands=thousands) as parser:
+        return parser.read()
+
+
+async def extract_fragment(page, selector):
+    """
+    回傳所有符合 selector 的元素 outerHTML（串接成一段 HTML）
+
+    找不到任何元素時回傳空字串，由呼叫端照原本「找不到區塊」的流程處理
+    """
+    fragments = await page.locator(selector).evaluate_all(OUTER_HTML_SCRIPT)
+    return '\n'.join(fragments)
+
+
+async def extract_tables(page, selector='table'):
+    """
+    在瀏覽器內讀出所有符合 selector 的表格並轉成 DataFrame 列表
+
+    Raises:
+        ValueError: 找不到任何表格（與 read_html 相同，讓呼叫端的重試邏輯照舊運作）
+    """
+    raw_tables = await page.locator(selector).evaluate_all(TABLE_EXTRACT_SCRIPT)
+    dfs = [table_to_dataframe(table) for table in raw_tables if table.get('head') or table.get('body')]
+    if not dfs:
+        raise ValueError(f"No tables found matching selector: {selector}")
+    return dfs
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+
+from stock_class.SourceProfiles import EARNINGS_GRACE, EARNINGS_MAX_AGE
+
+
+class FetchLedger:
+    """
+    每支股票、每個資料來源的最後抓取時間（以及當時已知的下一次財報日）
+
+    財報 / 比率 / 成長率只在財報發布後才會變動：
+    抓取當下記錄「下一次財報日」，之後只要這個日期還沒到，就代表這段期間沒有新財報，
+    快照可以繼續使用；日期已過（或超過 EARNINGS_MAX_AGE）才重新抓取。
+    財報發布後 EARNINGS_GRACE 內抓到的數據可能是來源尚未更新的舊版本，寬限期結束後再抓一次。
+
+    檔案格式（fetch_ledger.json）：
+        {
+            "AAPL": {
+                "next_earnings": 1769810400.0,
+                "last_earnings": 1761861600.0,
+                "sources": {"roic_financials": {"fetched_at": ..., "next_earnings": ..., "last_earnings": ...}}
+            }
+        }
+
+    使用範例：
+        ledger = FetchLedger('snapshots/fetch_ledger.json')
+        ledger.set_next_earnings('AAPL', datetime(2026, 1, 30))
+        ledger.record_fetch('AAPL', 'roic_financials')
+        ledger.earnings_since('AAPL', 'roic_financials')  # False → 沿用快照
+    """
+
+    def __init__(self, path, max_age=EARNINGS_MAX_AGE, grace=EARNINGS_GRACE):
+        self.path = path
+        self.max_age = max_age
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _entry(self, stock):
+        return self._data.setdefault(stock, {'next_earnings': None, 'sources': {}})
+
+    # ------------------------------------------------------------------
+    # 財報日 / 抓取記錄
+    # ------------------------------------------------------------------
+
+    def set_next_earnings(self, stock, when):
+        """
+        更新下一次財報日（原本記錄的財報日已經過了時，保留為上一次財報日）
+
+        Args:
+            when: datetime 或 epoch 秒數；None 時保留原本的記錄
+        """
+        if when is None:
+            return
+        timestamp = when.timestamp() if hasattr(when, 'timestamp') else float(when)
+        with self._lock:
+            entry = self._entry(stock)
+            previous = entry.get('next_earnings')
+            if previous is not None and previous < timestamp and previous <= time.time():
+                entry['last_earnings'] = previous
+            entry['next_earnings'] = timestamp
+
+    def next_earnings(self, stock):
+        return self._data.get(stock, {}).get('next_earnings')
+
+    def record_fetch(self, stock, source, fetched_at=None):
+        """記錄一次成功的抓取（連同當下已知的下一次財報日）"""
+        with self._lock:
+            entry = self._entry(stock)
+            entry['sources'][source] = {
+                'fetched_at': fetched_at or time.time(),
+                'next_earnings': entry['next_earnings'],
+                'last_earnings': entry.get('last_earnings'),
+            }
+
+    def last_fetch(self, stock, source):
+        """最後一次抓取時間（epoch 秒數；沒有記錄時為 None）"""
+        record = self._data.get(stock, {}).get('sources', {}).get(source)
+        return record['fetched_at'] if record else None
+
+    def earnings_since(self, stock, source, now=None):
+        """
+        上次抓取之後是否已有財報發布
+
+        Returns:
+            True: 已發布（或記錄超過 max_age），需要重新抓取
+            False: 尚未發布，可沿用快照
+            None: 無法判斷（沒有抓取記錄，或抓取時不知道下一次財報日），交由 TTL 決定
+        """
+        record = self._data.get(stock, {}).get('sources', {}).get(source)
+        if record is None:
+            return None
+
+        now = now or time.time()
+        if now - record['fetched_at'] > self.max_age:
+            return True
+
+        # 🔥 在上一次財報發布後的寬限期內抓取：來源可能還沒更新，直到寬限期後抓到的數據才沿用
+        # （抓取時記錄的「下一次」財報日已經過了，也就是剛發布的那一次）
+        expected = record.get('next_earnings')
+        last = record.get('last_earnings')
+        if expected is not None and expected <= record['fetched_at']:
+            last = max(last or expected, expected)
+        if last is not None and record['fetched_at'] < last + self.grace:
+            return True
+
+        if expected is None:
+            return None
+        if expected <= record['fetched_at']:
+            # 抓取時記錄的財報日已經過了（財報日期快照過舊），無法判斷
+            return None
+        return expected <= now
+
+    # ------------------------------------------------------------------
+    # 存檔
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """
+        寫回檔案（先與檔案上的內容合併，多個程序共用同一個 ledger 時不會互相覆蓋）
+        """
+        with self._lock:
+            merged = self._load()
+            for stock, entry in self._data.items():
+                target = merged.setdefault(stock, {'next_earnings': None, 'sources': {}})
+                if entry.get('next_earnings') is not None:
+                    target['next_earnings'] = entry['next_earnings']
+                if entry.get('last_earnings') is not None:
+                    target['last_earnings'] = entry['last_earnings']
+                for source, record in entry.get('sources', {}).items():
+                    current = target['sources'].get(source)
+                    if current is None or record['fetched_at'] >= current['fetched_at']:
+                        target['sources'][source] = record
+            self._data = merged
+
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️ 抓取記錄寫入失敗: {e}")
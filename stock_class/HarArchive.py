@@ -0,0 +1,217 @@
+import asyncio
+import base64
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+
+HAR_MODES = ('record', 'replay')
+
+# 回放時 body 已是解碼後的內容，這些標頭不能照原樣送回瀏覽器
+SKIPPED_REPLAY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+def _strip_query(url):
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+
+
+def _header_list(headers):
+    return [{'name': name, 'value': value} for name, value in (headers or {}).items()]
+
+
+class HarArchive:
+    """
+    HAR 格式的回應錄製 / 回放（每個資料來源一個 <來源>.har）
+
+    - record：context.on('response') 記錄每個回應（含 body），save() 寫成 HAR 1.2
+    - replay：context.route('**/*') 以 route.fulfill 回放錄到的回應，完全不連網；
+      找不到對應記錄的請求直接 abort（同一網址多次請求時依錄製順序回放，用完後重複最後一筆）
+
+    用途：沒有網路的機器上重現慢的執行、分析解析 / 寫入 Excel 的熱點、
+    以固定的頁面內容做擷取器效能回歸測試
+
+    使用範例：
+        archive = HarArchive('har/2026-01-30', mode='record')
+        await archive.attach(context, 'roic')
+        ...
+        archive.save()
+    """
+
+    def __init__(self, directory, mode='record'):
+        if mode not in HAR_MODES:
+            raise ValueError(f"未知的 HAR 模式: {mode}（可用：{', '.join(HAR_MODES)}）")
+        self.directory = directory
+        self.mode = mode
+
+        self._entries = defaultdict(list)  # record：{source: [entry]}
+        self._replay = {}  # replay：{source: {(method, url): [entry]}}
+        self._replay_loose = {}  # replay：{source: {(method, 不含 query 的 url): [entry]}}
+        self._served = defaultdict(int)  # {(source, method, url): 已回放次數}
+
+        # 統計
+        self.recorded = 0
+        self.replayed = 0
+        self.missing = 0
+
+    def _path(self, source):
+        return os.path.join(self.directory, f"{source}.har")
+
+    async def attach(self, context, source):
+        """掛到 context 上（所有頁面共用）"""
+        if self.mode == 'record':
+            async def on_response(response):
+                await self._record(source, response)
+
+            context.on('response', on_response)
+        else:
+            async def handle_route(route):
+                await self._fulfill(source, route)
+
+            await context.route('**/*', handle_route)
+
+    # ------------------------------------------------------------------
+    # 錄製
+    # ------------------------------------------------------------------
+
+    async def _record(self, source, response):
+        request = response.request
+        started = time.time()
+        try:
+            body = await response.body()
+        except Exception:
+            # 轉址 / 已關閉的頁面沒有 body
+            body = b''
+
+        headers = response.headers or {}
+        entry = {
+            'startedDateTime': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'time': 0,
+            'request': {
+                'method': request.method,
+                'url': request.url,
+                'httpVersion': 'HTTP/1.1',
+                'headers': _header_list(request.headers),
+                'queryString': [],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': -1,
+            },
+            'response': {
+                'status': response.status,
+                'statusText': response.status_text,
+                'httpVersion': 'HTTP/1.1',
+                'headers': _header_list(headers),
+                'cookies': [],
+                'content': {
+                    'size': len(body),
+                    'mimeType': headers.get('content-type', ''),
+                    'text': base64.b64encode(body).decode('ascii'),
+                    'encoding': 'base64',
+                },
+                'redirectURL': headers.get('location', ''),
+                'headersSize': -1,
+                'bodySize': len(body),
+            },
+            'cache': {},
+            'timings': {'send': 0, 'wait': 0, 'receive': 0},
+            '_resourceType': request.resource_type,
+        }
+        self._entries[source].append(entry)
+        self.recorded += 1
+
+    def save(self):
+        """寫出所有來源的 .har（record 模式）"""
+        if self.mode != 'record' or not self._entries:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        for source, entries in self._entries.items():
+            har = {
+                'log': {
+                    'version': '1.2',
+                    'creator': {'name': 'StockScraper', 'version': '1.0'},
+                    'pages': [],
+                    'entries': entries,
+                }
+            }
+            path = self._path(source)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(har, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # 回放
+    # ------------------------------------------------------------------
+
+    def _load(self, source):
+        if source in self._replay:
+            return
+
+        exact, loose = defaultdict(list), defaultdict(list)
+        try:
+            with open(self._path(source), encoding='utf-8') as f:
+                entries = json.load(f)['log']['entries']
+        except (OSError, ValueError, KeyError):
+            print(f"⚠️ [{source}] 找不到 HAR 錄製檔：{self._path(source)}（所有請求將被中止）")
+            entries = []
+
+        for entry in entries:
+            method, url = entry['request']['method'], entry['request']['url']
+            exact[(method, url)].append(entry)
+            loose[(method, _strip_query(url))].append(entry)
+
+        self._replay[source] = exact
+        self._replay_loose[source] = loose
+
+    def _match(self, source, method, url):
+        self._load(source)
+        candidates = self._replay[source].get((method, url))
+        key = (source, method, url)
+        if not candidates:
+            # 🔥 網址帶時間戳等 query 參數時，退而求其次比對不含 query 的網址
+            candidates = self._replay_loose[source].get((method, _strip_query(url)))
+            key = (source, method, _strip_query(url))
+        if not candidates:
+            return None
+
+        index = min(self._served[key], len(candidates) - 1)
+        self._served[key] += 1
+        return candidates[index]
+
+    async def _fulfill(self, source, route):
+        request = route.request
+        entry = self._match(source, request.method, request.url)
+        if entry is None:
+            self.missing += 1
+            await route.abort('internetdisconnected')
+            return
+
+        response = entry['response']
+        content = response.get('content', {})
+        text = content.get('text', '')
+        body = base64.b64decode(text) if content.get('encoding') == 'base64' else text.encode('utf-8')
+        headers = {
+            header['name']: header['value'] for header in response.get('headers', [])
+            if header['name'].lower() not in SKIPPED_REPLAY_HEADERS
+        }
+
+        try:
+            await route.fulfill(status=response['status'], headers=headers, body=body)
+            self.replayed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ [{source}] HAR 回放失敗 {request.url}: {e}")
+
+    def stats(self):
+        return {'mode': self.mode, 'recorded': self.recorded, 'replayed': self.replayed, 'missing': self.missing}
+
+    def describe(self):
+        if self.mode == 'record':
+            return f"📼 HAR 錄製：{self.recorded} 個回應（{self.directory}）"
+        return f"📼 HAR 回放：回放 {self.replayed} 個回應 / 無記錄而中止 {self.missing} 個請求"
@@ -0,0 +1,90 @@
+import importlib.util
+from bs4 import BeautifulSoup
+
+
+# 由快到慢；html.parser 為純 Python 實作，永遠可用
+BACKENDS = ('selectolax', 'lxml', 'html.parser')
+
+
+def _is_installed(module_name):
+    return importlib.util.find_spec(module_name) is not None
+
+
+def available_backends():
+    """目前環境可用的解析器（依速度排序）"""
+    available = []
+    if _is_installed('selectolax'):
+        available.append('selectolax')
+    if _is_installed('lxml'):
+        available.append('lxml')
+    available.append('html.parser')
+    return available
+
+
+def resolve_backend(preferred=None):
+    """
+    決定實際使用的解析器
+
+    preferred 未安裝或未指定時，依 BACKENDS 順序選擇第一個可用的
+    """
+    available = available_backends()
+    if preferred:
+        if preferred not in BACKENDS:
+            print(f"⚠️ 未知的 HTML 解析器 {preferred}，改用自動選擇")
+        elif preferred in available:
+            return preferred
+        else:
+            print(f"⚠️ HTML 解析器 {preferred} 未安裝，改用自動選擇")
+    return available[0]
+
+
+class HtmlParser:
+    """
+    HTML 解析器抽象層
+
+    - soup(): 需要走訪樹狀結構的擷取器使用，回傳 BeautifulSoup；
+      底層 tree builder 優先使用 lxml（C 實作），未安裝時退回 html.parser
+    - select_text() / select_texts(): 只需要 CSS 選取文字的擷取器使用；
+      backend 為 selectolax 時完全不建立 BeautifulSoup 樹
+
+    使用範例：
+        parser = HtmlParser('lxml')
+        soup = parser.soup(content)
+        text = parser.select_text(content, 'div.volatility')
+    """
+
+    def __init__(self, backend=None):
+        self.backend = resolve_backend(backend)
+        # 🔥 BeautifulSoup 只支援 lxml / html.parser 兩種 tree builder
+        if self.backend == 'html.parser' or not _is_installed('lxml'):
+            self.tree_builder = 'html.parser'
+        else:
+            self.tree_builder = 'lxml'
+
+    def soup(self, markup):
+        """建立 BeautifulSoup 樹"""
+        return BeautifulSoup(markup, self.tree_builder)
+
+    def select_texts(self, markup, css, strip=False):
+        """回傳所有符合 CSS 選擇器的節點文字"""
+        if self.backend == 'selectolax':
+            from selectolax.parser import HTMLParser as SelectolaxParser
+            nodes = SelectolaxParser(markup).css(css)
+            return [node.text(deep=True, strip=strip) for node in nodes]
+
+        return [node.get_text(strip=strip) for node in self.soup(markup).select(css)]
+
+    def select_text(self, markup, css, strip=False):
+        """回傳第一個符合 CSS 選擇器的節點文字（找不到時為 None）"""
+        if self.backend == 'selectolax':
+            from selectolax.parser import HTMLParser as SelectolaxParser
+            node = SelectolaxParser(markup).css_first(css)
+            return node.text(deep=True, strip=strip) if node is not None else None
+
+        node = self.soup(markup).select_one(css)
+        return node.get_text(strip=strip) if node is not None else None
+
+    def describe(self):
+        if self.backend == 'selectolax':
+            return f"selectolax（樹狀解析使用 {self.tree_builder}）"
+        return self.tree_builder
@@ -0,0 +1,118 @@
+import asyncio
+import importlib.util
+
+from stock_class.SourceProfiles import get_source_profile, source_url
+
+
+# aiohttp 自行處理的標頭（瀏覽器 context 用的 br / keep-alive 設定不適用）
+SKIPPED_HEADERS = ('accept-encoding', 'connection')
+
+
+def http_available():
+    """aiohttp 是否已安裝（未安裝時一律走瀏覽器）"""
+    return importlib.util.find_spec('aiohttp') is not None
+
+
+def http_fast_path(source):
+    """
+    來源的 HTTP 快速路徑設定（SourceProfiles 的 'http_fast_path'）
+
+    Returns:
+        dict {'path': 網址路徑樣板, 'selector': 必須存在的 CSS 選擇器} 或 None
+    """
+    return get_source_profile(source).get('http_fast_path')
+
+
+def fast_path_url(source, stock):
+    """HTTP 快速路徑的網址（{stock} 為原始代碼，{symbol} 為 '-' 換成 '.' 的代碼）"""
+    path = http_fast_path(source)['path']
+    return source_url(source, path.format(stock=stock, symbol=stock.replace('-', '.')))
+
+
+def profile_headers(source):
+    """依來源的瀏覽器 context 設定組出 HTTP 標頭（User-Agent + extra_http_headers）"""
+    options = get_source_profile(source)['context_options']
+    headers = {
+        key: value for key, value in (options.get('extra_http_headers') or {}).items()
+        if key.lower() not in SKIPPED_HEADERS
+    }
+    if options.get('user_agent'):
+        headers['User-Agent'] = options['user_agent']
+    if options.get('locale') and 'Accept-Language' not in headers:
+        headers['Accept-Language'] = options['locale']
+    return headers
+
+
+class HttpFetcher:
+    """
+    伺服器端渲染頁面的 HTTP 抓取（不經過 Playwright）
+
+    - 單一 aiohttp.ClientSession：所有來源共用連線池（keep-alive），每個主機限制同時連線數
+    - 標頭沿用 SourceProfiles 的 user_agent / extra_http_headers，與瀏覽器看到的版本一致
+    - 失敗（未安裝 aiohttp、連線錯誤、非 200）一律回傳 None，由呼叫端改走瀏覽器
+
+    使用範例：
+        http = HttpFetcher()
+        html = await http.fetch('barchart', url)
+        await http.close()
+    """
+
+    def __init__(self, limit=30, limit_per_host=6, timeout=20):
+        """
+        Args:
+            limit: 連線池總上限
+            limit_per_host: 每個主機的同時連線上限
+            timeout: 單次請求逾時（秒）
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+        self._session_lock = asyncio.Lock()
+
+        # 統計
+        self.requests = 0
+        self.failures = 0
+
+    async def _get_session(self):
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                import aiohttp
+                connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                                 ttl_dns_cache=300)
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                )
+            return self._session
+
+    async def fetch(self, source, url):
+        """
+        GET 頁面原始 HTML
+
+        Returns:
+            str 或 None（失敗時）
+        """
+        if not http_available():
+            return None
+
+        self.requests += 1
+        try:
+            session = await self._get_session()
+            async with session.get(url, headers=profile_headers(source), allow_redirects=True) as response:
+                if response.status != 200:
+                    print(f"⚠️ [{source}] HTTP {response.status}: {url}")
+                    self.failures += 1
+                    return None
+                return await response.text(errors='replace')
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ [{source}] HTTP 請求失敗: {e}")
+            self.failures += 1
+            return None
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,302 @@
+import gzip
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+
+# 工作狀態
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def new_run_id():
+    """一次分析的識別碼（時間 + 隨機字串，方便在資料庫中依時間排序）"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _dump(value):
+    return gzip.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _load(blob):
+    return pickle.loads(gzip.decompress(blob)) if blob is not None else None
+
+
+class Job:
+    """從佇列借出的一筆 (來源, 股票) 工作"""
+
+    def __init__(self, job_id, run_id, source, stock, attempts, max_attempts, payload):
+        self.id = job_id
+        self.run_id = run_id
+        self.source = source
+        self.stock = stock
+        self.attempts = attempts  # 含本次
+        self.max_attempts = max_attempts
+        self.payload = payload or {}
+
+    @property
+    def last_attempt(self):
+        return self.attempts >= self.max_attempts
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.source}, {self.stock}, 第 {self.attempts}/{self.max_attempts} 次)"
+
+
+class JobQueue:
+    """
+    (來源, 股票) 工作佇列的介面：ScrapeWorker 借出（lease）工作、回報結果，協調端收集結果
+
+    - lease 有期限：worker 當機時工作會在期限後回到佇列，由其他 worker 接手
+    - 失敗時依 max_attempts 重試（延遲逐次增加），用完後標記為 failed 並保留最後的結果
+    - 結果只接受目前持有 lease 的 worker 回報，逾期後才回報的舊 worker 會被忽略
+
+    SqliteJobQueue 供單機（多個 worker 程序）使用；多台機器共用時實作相同介面接到共用的後端
+    """
+
+    def enqueue(self, run_id, jobs, max_attempts=3):
+        """
+        Args:
+            jobs: [(來源, 股票, payload)]；payload 為 worker 需要的附加資料（可 pickle）
+        """
+        raise NotImplementedError
+
+    def lease(self, worker_id, sources=None, limit=1, lease_seconds=300):
+        """借出最多 limit 筆可執行的工作（sources 為 None 時不限來源）"""
+        raise NotImplementedError
+
+    def extend(self, jobs, worker_id, lease_seconds=300):
+        """延長仍在執行中的工作的 lease"""
+        raise NotImplementedError
+
+    def complete(self, job, worker_id, result):
+        """回報成功；lease 已被其他 worker 取得時回傳 False"""
+        raise NotImplementedError
+
+    def fail(self, job, worker_id, error, result=None, retry_delay=30):
+        """回報失敗；還有次數時重新排入佇列，否則標記 failed 並保留 result"""
+        raise NotImplementedError
+
+    def counts(self, run_id):
+        """{狀態: 筆數}"""
+        raise NotImplementedError
+
+    def outstanding(self, sources=None):
+        """所有分析中尚未完成（pending / leased）的工作數"""
+        raise NotImplementedError
+
+    def results(self, run_id, source):
+        """{股票: 結果}（done 與 failed 的工作）"""
+        raise NotImplementedError
+
+    def cancel(self, run_id):
+        """取消尚未完成的工作"""
+        raise NotImplementedError
+
+    def purge(self, run_id):
+        """刪除一次分析的所有工作"""
+        raise NotImplementedError
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    SQLite 實作（WAL 模式，多個程序可同時存取同一個檔案）
+
+    🔥 lease 在 BEGIN IMMEDIATE 交易中完成，多個 worker 同時借工作也不會拿到同一筆
+
+    使用範例：
+        queue = SqliteJobQueue('jobs.db')
+        queue.enqueue(run_id, [('roic', 'AAPL', {'us_stock': True})])
+        jobs = queue.lease('worker-1', limit=5)
+        queue.complete(jobs[0], 'worker-1', result)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            source TEXT NOT NULL,
+            stock TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            not_before REAL NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            payload BLOB,
+            result BLOB,
+            error TEXT,
+            updated_at REAL NOT NULL,
+            UNIQUE (run_id, source, stock)
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, not_before);
+        CREATE INDEX IF NOT EXISTS jobs_run ON jobs (run_id, source);
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    # ------------------------------------------------------------------
+    # 佇列操作
+    # ------------------------------------------------------------------
+
+    def enqueue(self, run_id, jobs, max_attempts=3):
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO jobs (run_id, source, stock, status, max_attempts, payload, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, source, stock, PENDING, max_attempts, _dump(payload), now)
+                 for source, stock, payload in jobs]
+            )
+
+    def lease(self, worker_id, sources=None, limit=1, lease_seconds=300):
+        now = time.time()
+        source_filter, params = '', []
+        if sources:
+            source_filter = f" AND source IN ({', '.join('?' * len(sources))})"
+            params = list(sources)
+
+        with self._transaction() as db:
+            # 逾期且次數已用完的工作直接標記失敗（worker 當機在最後一次嘗試）
+            db.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, 'lease 逾期'), lease_owner = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (FAILED, now, LEASED, now)
+            )
+            rows = db.execute(
+                "SELECT id, run_id, source, stock, attempts, max_attempts, payload FROM jobs "
+                "WHERE ((status = ? AND not_before <= ?) OR (status = ? AND lease_expires < ?))"
+                f"{source_filter} ORDER BY id LIMIT ?",
+                [PENDING, now, LEASED, now] + params + [limit]
+            ).fetchall()
+            db.executemany(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, "
+                "updated_at = ? WHERE id = ?",
+                [(LEASED, worker_id, now + lease_seconds, now, row[0]) for row in rows]
+            )
+
+        return [
+            Job(job_id, run_id, source, stock, attempts + 1, max_attempts, _load(payload))
+            for job_id, run_id, source, stock, attempts, max_attempts, payload in rows
+        ]
+
+    def extend(self, jobs, worker_id, lease_seconds=300):
+        if not jobs:
+            return
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                [(now + lease_seconds, now, job.id, LEASED, worker_id) for job in jobs]
+            )
+
+    def complete(self, job, worker_id, result):
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, _dump(result), time.time(), job.id, LEASED, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job, worker_id, error, result=None, retry_delay=30):
+        now = time.time()
+        with self._transaction() as db:
+            if job.last_attempt:
+                cursor = db.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND lease_owner = ?",
+                    (FAILED, _dump(result), error, now, job.id, LEASED, worker_id)
+                )
+            else:
+                # 🔥 重試延遲逐次增加，避免馬上又打到同一個正在限流的主機
+                cursor = db.execute(
+                    "UPDATE jobs SET status = ?, not_before = ?, error = ?, lease_owner = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND lease_owner = ?",
+                    (PENDING, now + retry_delay * job.attempts, error, now, job.id, LEASED, worker_id)
+                )
+            return cursor.rowcount == 1
+
+    # ------------------------------------------------------------------
+    # 協調端
+    # ------------------------------------------------------------------
+
+    def counts(self, run_id):
+        with self._transaction() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status", (run_id,))
+            return dict(rows.fetchall())
+
+    def outstanding(self, sources=None):
+        source_filter, params = '', []
+        if sources:
+            source_filter = f" AND source IN ({', '.join('?' * len(sources))})"
+            params = list(sources)
+        with self._transaction() as db:
+            row = db.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN (?, ?){source_filter}", [PENDING, LEASED] + params
+            ).fetchone()
+        return row[0]
+
+    def results(self, run_id, source):
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT stock, result FROM jobs WHERE run_id = ? AND source = ? AND status IN (?, ?)",
+                (run_id, source, DONE, FAILED)
+            ).fetchall()
+        return {stock: _load(result) for stock, result in rows}
+
+    def cancel(self, run_id):
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, updated_at = ? WHERE run_id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), run_id, PENDING, LEASED)
+            )
+
+    def purge(self, run_id):
+        with self._transaction() as db:
+            db.execute("DELETE FROM jobs WHERE run_id = ?", (run_id,))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT（例外時 ROLLBACK）"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type is not None else 'COMMIT')
+        return False
@@ -0,0 +1,157 @@
+import importlib.util
+import os
+import time
+
+from stock_class.ResourcePolicy import format_bytes
+
+
+# Chromium 相關程序名稱（chrome / chromium / headless_shell / Windows 的 chrome.exe）
+BROWSER_PROCESS_NAMES = ('chrom', 'headless_shell')
+
+# 每個 context 導航超過此次數後回收重建（長駐的 renderer 會累積 JS heap / 快取）
+RECYCLE_AFTER_NAVIGATIONS = 50
+
+# 所有 Chromium 程序的 RSS 合計超過此值時，歸還的 context 直接關閉而不回到池中
+MAX_BROWSER_RSS = 2 * 1024 ** 3
+
+# TradingView / Beta 一次最多同時開啟的頁面數（其餘股票分批處理）
+MAX_OPEN_PAGES = 5
+
+
+def _psutil():
+    """psutil 為選用套件；未安裝時只依導航次數回收"""
+    if importlib.util.find_spec('psutil') is None:
+        return None
+    import psutil
+    return psutil
+
+
+class MemoryGovernor:
+    """
+    Chromium 記憶體管理：取樣瀏覽器程序的 RSS，決定 context 何時回收、一次能開多少頁面
+
+    - 導航次數：每個 context 導航超過 recycle_after 次後，歸還時關閉並重建
+    - 記憶體：RSS 合計超過 max_rss 時，歸還的 context 與閒置的 context 都直接關閉（需要時再建立）
+    - 頁面上限：需要同時保留頁面的階段（TradingView / Beta）每批最多 max_open_pages 頁
+
+    🔥 RSS 取樣有間隔（sample_interval 秒），高並發時不會每次歸還都掃描一次程序樹
+
+    使用範例：
+        governor = MemoryGovernor(max_rss=1.5 * 1024 ** 3)
+        if governor.should_recycle(navigations):
+            ...
+    """
+
+    def __init__(self, recycle_after=RECYCLE_AFTER_NAVIGATIONS, max_rss=MAX_BROWSER_RSS,
+                 max_open_pages=MAX_OPEN_PAGES, sample_interval=5.0):
+        """
+        Args:
+            recycle_after: 每個 context 的導航次數上限（None 表示不依次數回收）
+            max_rss: Chromium 程序 RSS 合計上限（bytes，None 表示不限制）
+            max_open_pages: 同時開啟的頁面上限
+            sample_interval: RSS 取樣的最短間隔（秒）
+        """
+        self.recycle_after = recycle_after
+        self.max_rss = max_rss
+        self.max_open_pages = max(1, max_open_pages)
+        self.sample_interval = sample_interval
+
+        self._psutil = _psutil()
+        self._last_sample = None
+        self._last_rss = None
+        self._over = False
+
+        # 統計
+        self.peak_rss = 0
+        self.recycled = {}  # {原因: 次數}
+
+    @property
+    def enabled(self):
+        """是否能取樣 RSS（psutil 已安裝）"""
+        return self._psutil is not None
+
+    def browser_rss(self, force=False):
+        """
+        目前所有 Chromium 程序的 RSS 合計（bytes）；無法取樣時回傳 None
+
+        Chromium 由 Playwright driver 啟動，是本程序的孫程序，因此遞迴查詢子程序
+        """
+        if self._psutil is None:
+            return None
+
+        now = time.monotonic()
+        if not force and self._last_sample is not None and now - self._last_sample < self.sample_interval:
+            return self._last_rss
+
+        total = 0
+        try:
+            children = self._psutil.Process(os.getpid()).children(recursive=True)
+        except Exception:
+            children = []
+        for process in children:
+            try:
+                if any(name in process.name().lower() for name in BROWSER_PROCESS_NAMES):
+                    total += process.memory_info().rss
+            except Exception:
+                # 程序已結束或沒有權限
+                continue
+
+        self._last_sample = now
+        self._last_rss = total
+        self.peak_rss = max(self.peak_rss, total)
+        return total
+
+    def over_budget(self):
+        """RSS 是否超過上限（跨過門檻時輸出一次日誌）"""
+        if self.max_rss is None:
+            return False
+        rss = self.browser_rss()
+        over = rss is not None and rss > self.max_rss
+        if over != self._over:
+            self._over = over
+            if over:
+                print(f"🧠 Chromium 記憶體 {format_bytes(rss)} 超過上限 {format_bytes(self.max_rss)}，開始回收 context")
+            else:
+                print(f"🧠 Chromium 記憶體已回落至 {format_bytes(rss)}")
+        return over
+
+    def should_recycle(self, navigations):
+        """
+        歸還的 context 是否應該關閉
+
+        Returns:
+            str | None: 回收原因（'navigations' / 'memory'），不需要回收時為 None
+        """
+        if self.recycle_after is not None and navigations >= self.recycle_after:
+            return 'navigations'
+        if self.over_budget():
+            return 'memory'
+        return None
+
+    def record_recycle(self, reason, count=1):
+        self.recycled[reason] = self.recycled.get(reason, 0) + count
+
+    def page_batches(self, stocks):
+        """把股票切成每批不超過 max_open_pages 的清單"""
+        stocks = list(stocks)
+        return [stocks[i:i + self.max_open_pages] for i in range(0, len(stocks), self.max_open_pages)]
+
+    def stats(self):
+        return {
+            'rss': self._last_rss,
+            'peak_rss': self.peak_rss,
+            'max_rss': self.max_rss,
+            'recycle_after': self.recycle_after,
+            'max_open_pages': self.max_open_pages,
+            'recycled': dict(self.recycled),
+        }
+
+    def reset_stats(self):
+        self.peak_rss = self._last_rss or 0
+        self.recycled = {}
+
+    def describe(self):
+        recycled = '、'.join(f"{reason} {count}" for reason, count in self.recycled.items()) or '無'
+        peak = format_bytes(self.peak_rss) if self.enabled else '未取樣（未安裝 psutil）'
+        limit = format_bytes(self.max_rss) if self.max_rss is not None else '不限'
+        return f"Chromium 記憶體最高 {peak}（上限 {limit}）；回收 context：{recycled}"
@@ -0,0 +1,249 @@
+import asyncio
+import re
+import time
+import pandas as pd
+
+
+# 判斷一筆 JSON 記錄屬於哪個會計年度的欄位
+PERIOD_KEYS = ('fiscal_year', 'fiscalYear', 'calendar_year', 'calendarYear', 'year', 'period', 'date')
+
+# 指標欄位 → 頁面上的標籤（順序與 DOM 解析出來的一致）
+METRIC_KEYS = (
+    ('EPS', ('eps', 'eps_diluted', 'epsDiluted', 'earnings_per_share')),
+    ('P/E', ('pe', 'pe_ratio', 'peRatio', 'price_to_earnings')),
+    ('MARKET CAP', ('market_cap', 'marketCap', 'market_capitalization')),
+)
+
+_RE_YEAR = re.compile(r'(19|20)\d{2}')
+
+
+class ResponseCapture:
+    """
+    記錄頁面載入期間符合條件的 XHR / fetch JSON 回應（page.on('response')）
+
+    roic.ai 是前端渲染的網站，表格由頁面抓回來的 JSON 組成；
+    直接讀 JSON 就不需要等待表格渲染（wait_for_selector 的 100 秒逾時）。
+
+    使用範例：
+        capture = ResponseCapture(page, [r'roic\\.ai/api/'])
+        capture.attach()
+        try:
+            await page.goto(url, wait_until='domcontentloaded')
+            payloads = await capture.wait_for_payloads(timeout=15)
+        finally:
+            capture.detach()
+    """
+
+    def __init__(self, page, url_patterns):
+        self.page = page
+        self.url_patterns = [re.compile(pattern) for pattern in url_patterns]
+        self.payloads = []  # [(url, json)]
+        self.last_received = None
+        self._received = asyncio.Event()
+        self._attached = False
+
+    def attach(self):
+        if not self._attached:
+            self.page.on('response', self._on_response)
+            self._attached = True
+
+    def detach(self):
+        if self._attached:
+            try:
+                self.page.remove_listener('response', self._on_response)
+            except Exception:
+                pass
+            self._attached = False
+
+    def _matches(self, url):
+        return any(pattern.search(url) for pattern in self.url_patterns)
+
+    async def _on_response(self, response):
+        try:
+            if response.request.resource_type not in ('xhr', 'fetch'):
+                return
+            if not self._matches(response.url):
+                return
+            content_type = (response.headers or {}).get('content-type', '')
+            if 'json' not in content_type:
+                return
+
+            payload = await response.json()
+            self.payloads.append((response.url, payload))
+            self.last_received = time.monotonic()
+            self._received.set()
+        except Exception:
+            # 頁面跳轉後 body 可能已無法讀取，忽略即可
+            pass
+
+    async def wait_for_payloads(self, timeout=15.0, quiet_period=0.5):
+        """
+        等待第一個符合的回應，再等到 quiet_period 秒內沒有新回應為止
+
+        Returns:
+            list: [(url, json)]；逾時仍未收到任何回應時為空列表
+        """
+        try:
+            await asyncio.wait_for(self._received.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            idle = time.monotonic() - self.last_received
+            if idle >= quiet_period:
+                break
+            await asyncio.sleep(quiet_period - idle)
+
+        return list(self.payloads)
+
+
+def _humanize(key):
+    """snake_case / camelCase → Title Case（作為表格列名）"""
+    text = re.sub(r'(?<=[a-z0-9])([A-Z])', r' \1', str(key)).replace('_', ' ')
+    return ' '.join(word if word.isupper() else word.capitalize() for word in text.split())
+
+
+def _period_year(record):
+    for key in PERIOD_KEYS:
+        if key in record and record[key] is not None:
+            match = _RE_YEAR.search(str(record[key]))
+            if match:
+                return int(match.group(0))
+    return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _find_period_lists(node, name='', found=None):
+    """遞迴尋找「每筆記錄一個年度」的列表：[(名稱, [record, ...])]"""
+    if found is None:
+        found = []
+
+    if isinstance(node, list):
+        records = [item for item in node if isinstance(item, dict)]
+        if len(records) >= 2 and len(records) == len(node) \
+                and all(_period_year(record) is not None for record in records) \
+                and sum(_is_number(value) for value in records[0].values()) >= 3:
+            found.append((name, records))
+            return found
+        for item in node:
+            _find_period_lists(item, name, found)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            _find_period_lists(value, key, found)
+
+    return found
+
+
+def period_records_to_dataframe(name, records):
+    """
+    年度記錄 → 與 read_html 相同形狀的 DataFrame
+
+    第一欄為項目名稱，其餘欄位為 "2024 Y" 格式的年度（由舊到新），
+    StockProcess 的年份篩選 / 反轉邏輯可直接沿用
+    """
+    by_year = {}
+    for record in records:
+        by_year[_period_year(record)] = record
+    years = sorted(by_year)
+
+    row_keys = []
+    for record in records:
+        for key, value in record.items():
+            if key not in PERIOD_KEYS and _is_number(value) and key not in row_keys:
+                row_keys.append(key)
+
+    first_col = _humanize(name) if name else 'Unnamed: 0'
+    rows = []
+    for key in row_keys:
+        row = {first_col: _humanize(key)}
+        for year in years:
+            row[f'{year} Y'] = by_year[year].get(key)
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=[first_col] + [f'{year} Y' for year in years])
+
+
+def build_period_tables(payloads, expected_count=None):
+    """
+    從擷取到的 JSON 建立年度表格
+
+    Args:
+        payloads: ResponseCapture.wait_for_payloads() 的結果
+        expected_count: 預期表格數量（financials=3、ratios=7）；數量不符時回傳 None 讓呼叫端改走 DOM
+
+    Returns:
+        list[DataFrame] 或 None
+    """
+    tables = []
+    seen = set()
+    for _, payload in payloads:
+        for name, records in _find_period_lists(payload):
+            signature = (name, len(records), tuple(records[0].keys()))
+            if signature in seen:
+                continue
+            seen.add(signature)
+            tables.append(period_records_to_dataframe(name, records))
+
+    if not tables:
+        return None
+    if expected_count is not None and len(tables) != expected_count:
+        return None
+    return tables
+
+
+def _format_compact(value):
+    """數值 → 頁面上的縮寫格式（例如 2.45T）"""
+    for divisor, suffix in ((1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if abs(value) >= divisor:
+            return f"{value / divisor:.2f}{suffix}"
+    return f"{value:.2f}"
+
+
+def _find_metric(node, keys):
+    if isinstance(node, dict):
+        for key in keys:
+            if key in node and node[key] is not None and not isinstance(node[key], (dict, list)):
+                return node[key]
+        for value in node.values():
+            found = _find_metric(value, keys)
+            if found is not None:
+                return found
+    elif isinstance(node, list):
+        for item in node:
+            found = _find_metric(item, keys)
+            if found is not None:
+                return found
+    return None
+
+
+def build_header_metrics(payloads):
+    """
+    從擷取到的 JSON 建立 EPS / P/E / Market Cap 指標（格式同 get_combined_data 的 DOM 解析結果）
+
+    Returns:
+        dict 或 None（任一指標缺少時回傳 None，讓呼叫端改走 DOM）
+    """
+    metrics = {}
+    for label, keys in METRIC_KEYS:
+        value = None
+        for _, payload in payloads:
+            value = _find_metric(payload, keys)
+            if value is not None:
+                break
+        if value is None:
+            return None
+
+        if label == 'MARKET CAP' and _is_number(value):
+            value = _format_compact(value)
+        elif label in ('EPS', 'P/E'):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                pass
+        metrics[label] = value
+
+    return metrics
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+
+# 🔥 在頁面內等到內容穩定（MutationObserver + 網路安靜）就回傳，最多等 maxMs
+# - 有 selector：目標元素出現後只觀察它的子樹（股價跑馬燈等頁面其他部分的變動不影響判斷），
+#   目標子樹 quietMs 內沒有變動即視為穩定
+# - 沒有 selector：整份文件 quietMs 內沒有變動，且沒有新完成的網路請求（Resource Timing）才視為穩定
+SETTLE_SCRIPT = """
+([selector, quietMs, maxMs]) => new Promise((resolve) => {
+    const started = performance.now();
+    const options = {subtree: true, childList: true, characterData: true, attributes: true};
+    const resources = () => performance.getEntriesByType('resource').length;
+    let lastResources = resources();
+    let observed = null;
+    let timer = null;
+    let done = false;
+
+    const finish = (reason) => {
+        if (done) return;
+        done = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        resolve({reason: reason, elapsed: performance.now() - started});
+    };
+    const target = () => selector ? document.querySelector(selector) : null;
+    const watch = () => {
+        const node = target() || document.documentElement;
+        if (node !== observed) {
+            observer.disconnect();
+            observer.observe(node, options);
+            observed = node;
+        }
+    };
+    const check = () => {
+        if (selector) {
+            if (!target()) return arm();
+            return finish('stable');
+        }
+        const current = resources();
+        if (current !== lastResources) {
+            lastResources = current;
+            return arm();
+        }
+        finish('stable');
+    };
+    const arm = () => {
+        watch();
+        clearTimeout(timer);
+        timer = setTimeout(check, quietMs);
+    };
+
+    const observer = new MutationObserver(arm);
+    const cap = setTimeout(() => finish('cap'), maxMs);
+    arm();
+})
+"""
+
+
+class ReadinessTracker:
+    """
+    導覽後的「等待渲染完成」：取代固定的 asyncio.sleep(N)
+
+    - 內容穩定（SETTLE_SCRIPT）就馬上繼續，最多等 max_wait 秒（= 原本固定等待的秒數，最慢與原本相同）
+    - 頁面評估失敗（例如頁面正在跳轉）時補足剩餘的等待時間，行為與原本的固定等待一致
+    - 依來源統計等待次數、實際等待時間與節省的時間
+
+    使用範例：
+        tracker = ReadinessTracker()
+        await tracker.settle(page, 'barchart', selector='div.bc-options-toolbar', max_wait=3.0)
+        tracker.log_stats()
+    """
+
+    def __init__(self, quiet=0.5):
+        """
+        Args:
+            quiet: 多久沒有變動視為穩定（秒）
+        """
+        self.quiet = quiet
+        self.stats = {}  # {source: {'pages', 'waited', 'saved', 'capped'}}
+
+    async def settle(self, page, source, selector=None, max_wait=2.0, quiet=None):
+        """
+        等到頁面內容穩定
+
+        Args:
+            page: Playwright Page
+            source: 資料來源（統計用）
+            selector: 要等待的目標區塊（None 表示整份文件）
+            max_wait: 最長等待秒數（取代的固定等待）
+            quiet: 覆寫預設的穩定判斷時間（秒）
+
+        Returns:
+            float: 實際等待的秒數
+        """
+        quiet = self.quiet if quiet is None else quiet
+        started = time.monotonic()
+        reason = 'stable'
+        try:
+            result = await page.evaluate(SETTLE_SCRIPT, [selector, quiet * 1000, max_wait * 1000])
+            reason = result.get('reason', 'stable')
+        except Exception:
+            reason = 'error'
+            remaining = max_wait - (time.monotonic() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+
+        waited = time.monotonic() - started
+        self._record(source, waited, max_wait, capped=reason != 'stable')
+        return waited
+
+    def _record(self, source, waited, max_wait, capped):
+        stats = self.stats.setdefault(source, {'pages': 0, 'waited': 0.0, 'saved': 0.0, 'capped': 0})
+        stats['pages'] += 1
+        stats['waited'] += waited
+        stats['saved'] += max(0.0, max_wait - waited)
+        if capped:
+            stats['capped'] += 1
+
+    def reset_stats(self):
+        self.stats = {}
+
+    def log_stats(self, log=print):
+        """輸出各來源等待渲染節省的時間"""
+        if not self.stats:
+            return
+
+        total_saved = sum(stats['saved'] for stats in self.stats.values())
+        log(f"⏱️ 渲染等待：共節省 {total_saved:.1f} 秒")
+        for source, stats in self.stats.items():
+            pages = stats['pages']
+            log(f"   • {source}: {pages} 頁，平均等待 {stats['waited'] / pages:.2f} 秒，"
+                f"每頁節省 {stats['saved'] / pages:.2f} 秒（達上限 {stats['capped']} 次）")
@@ -0,0 +1,138 @@
+from enum import Enum
+
+from stock_class.DomExtractor import ROIC_TABLE_SELECTOR
+
+
+class PageState(Enum):
+    """導覽後頁面的狀態（classify_page 的結果）"""
+    READY = 'ready'  # 數據已渲染
+    PAYWALL = 'paywall'  # 需付費（roic.ai 非美國企業的 Financial / Ratios）
+    NOT_FOUND = 'not_found'  # 股票代碼不存在
+    CHALLENGE = 'challenge'  # 驗證頁（PerimeterX / reCAPTCHA / Cloudflare）
+    BLOCKED = 'blocked'  # HTTP 403 / 429
+    ERROR = 'error'  # 伺服器或前端錯誤頁
+    TIMEOUT = 'timeout'  # 期限內沒有出現任何已知狀態
+
+    @property
+    def terminal(self):
+        """重試也不會改變結果的狀態（呼叫端不進入重試流程）"""
+        return self in (PageState.PAYWALL, PageState.NOT_FOUND)
+
+
+class PageStateError(RuntimeError):
+    """頁面狀態不是 READY（RetryPolicy 依狀態決定是否重試）"""
+
+    def __init__(self, source, state, detail=None):
+        self.source = source
+        self.state = state
+        super().__init__(f"{source} 頁面狀態：{state.value}" + (f"（{detail}）" if detail else ''))
+
+
+# 驗證頁（PerimeterX / reCAPTCHA / Cloudflare）的共同特徵
+CHALLENGE_SELECTOR = ', '.join((
+    '#px-captcha-wrapper', '#px-captcha',
+    '#frmCaptcha', '.tv-captcha-page__message-wrap', 'iframe[src*="recaptcha"]',
+    '#challenge-form', '#cf-challenge-running', 'iframe[src*="challenges.cloudflare.com"]',
+))
+CHALLENGE_TITLES = ('just a moment', 'attention required', 'access denied', 'are you a robot')
+
+# roic.ai 的付費提示卡片（非美國企業的 Financial / Ratios）
+ROIC_PAYWALL_SELECTOR = ('div.rounded-lg.bg-card.text-card-foreground.shadow-sm.mx-auto.flex.w-\\[500px\\]'
+                         '.flex-col.items-center.border.drop-shadow-lg')
+
+# 各來源的狀態特徵：selector 與 document.title / <h1> / <h2> 的關鍵字（小寫），依 PAGE_STATE_ORDER 的順序判斷
+# 🔥 roic.ai 為 Next.js：不存在的代碼顯示內建 404 頁（h1.next-error-h1），前端例外顯示 "Application error"
+#    不比對單純的數字（公司名稱可能含 "500" 等字樣，例如 S&P 500 ETF）
+PAGE_STATE_RULES = {
+    'roic': {
+        'ready': {'selector': ROIC_TABLE_SELECTOR},
+        'paywall': {'selector': ROIC_PAYWALL_SELECTOR},
+        'not_found': {'selector': 'h1.next-error-h1',
+                      'titles': ('could not be found',),
+                      'texts': ('page not found', 'could not be found', 'company not found')},
+        'error': {'titles': ('internal server error',),
+                  'texts': ('application error', 'internal server error')},
+    },
+}
+
+# 同時符合多個狀態時的優先順序（付費卡片可能蓋在表格上，因此先於 ready）
+PAGE_STATE_ORDER = ('challenge', 'paywall', 'not_found', 'error', 'ready')
+
+# 🔥 一次 page.wait_for_function 同時比對所有狀態（取代逐一 wait_for_selector），第一個符合的狀態即回傳
+CLASSIFY_SCRIPT = """
+(rules) => {
+    const title = (document.title || '').toLowerCase();
+    const headingText = Array.from(document.querySelectorAll('h1, h2'))
+        .map((heading) => (heading.textContent || '').toLowerCase()).join(' ');
+    for (const rule of rules) {
+        if (rule.selector && document.querySelector(rule.selector)) return rule.state;
+        if (rule.titles.some((text) => title.includes(text))) return rule.state;
+        if (rule.texts.some((text) => headingText.includes(text))) return rule.state;
+    }
+    return null;
+}
+"""
+
+
+def page_state_rules(source):
+    """
+    來源的狀態規則（依 PAGE_STATE_ORDER 排序，驗證頁規則所有來源共用）
+
+    Returns:
+        list: [{'state', 'selector', 'titles', 'texts'}]
+    """
+    rules = dict(PAGE_STATE_RULES.get(source, {}))
+    rules['challenge'] = {'selector': CHALLENGE_SELECTOR, 'titles': CHALLENGE_TITLES}
+    return [
+        {
+            'state': state,
+            'selector': rules[state].get('selector'),
+            'titles': list(rules[state].get('titles', ())),
+            'texts': list(rules[state].get('texts', ())),
+        }
+        for state in PAGE_STATE_ORDER if state in rules
+    ]
+
+
+async def classify_page(page, source, response=None, timeout=30000):
+    """
+    判斷頁面狀態：導覽 commit 後立即呼叫，不必等 networkidle
+
+    Args:
+        page: Playwright Page
+        source: 資料來源（決定使用的 PAGE_STATE_RULES）
+        response: page.goto 的回應（HTTP 狀態碼可直接判斷時不必等待 DOM）
+        timeout: 等待任一狀態出現的上限（毫秒）
+
+    Returns:
+        PageState
+    """
+    status = response.status if response is not None else None
+    if status in (404, 410):
+        return PageState.NOT_FOUND
+    if status in (403, 429):
+        return PageState.BLOCKED
+    if status is not None and status >= 500:
+        return PageState.ERROR
+
+    try:
+        handle = await page.wait_for_function(CLASSIFY_SCRIPT, arg=page_state_rules(source),
+                                              timeout=timeout, polling=100)
+        return PageState(await handle.json_value())
+    except Exception as e:
+        return PageState.TIMEOUT if 'Timeout' in type(e).__name__ else PageState.ERROR
+
+
+async def detect_challenge(page):
+    """頁面是否為驗證 / 封鎖頁（檢查失敗時視為不是）"""
+    try:
+        return await page.evaluate(
+            """([selector, titles]) => {
+                const title = (document.title || '').toLowerCase();
+                if (titles.some(t => title.includes(t))) return true;
+                return document.querySelector(selector) !== null;
+            }""",
+            [CHALLENGE_SELECTOR, list(CHALLENGE_TITLES)]
+        )
+    except Exception:
+        return False
@@ -0,0 +1,161 @@
+from urllib.parse import urlparse
+
+
+# 預設封鎖的資源類型（爬蟲只讀 DOM 文字，不需要這些）
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+
+# 常見廣告 / 追蹤 / 分析網域
+AD_ANALYTICS_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'amazon-adsystem.com',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'segment.io',
+    'segment.com',
+    'mixpanel.com',
+    'amplitude.com',
+    'clarity.ms',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'taboola.com',
+    'outbrain.com',
+    'criteo.com',
+    'adnxs.com',
+    'rubiconproject.com',
+    'pubmatic.com',
+    'moatads.com',
+    'newrelic.com',
+    'nr-data.net',
+    'sentry.io',
+    'intercom.io',
+)
+
+# 被封鎖請求的估計大小（bytes），用於回報節省的流量
+ESTIMATED_BYTES = {
+    'image': 25_000,
+    'media': 300_000,
+    'font': 35_000,
+    'stylesheet': 20_000,
+    'script': 40_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+def _domain_matches(host, domains):
+    """host 是否等於或隸屬於 domains 中的任一網域"""
+    if not host:
+        return False
+    return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+
+class ResourcePolicy:
+    """
+    單一資料來源的請求攔截規則（page.route）
+
+    判斷順序：
+    1. allow_domains：一律放行（例如 CAPTCHA 服務，避免驗證畫面載不出來）
+    2. deny_domains：一律封鎖（廣告 / 分析）
+    3. blocked_types：依 resource_type 封鎖（圖片 / 字型 / 影音）
+    4. first_party_only：只允許 first_party_domains 的 script / xhr / fetch
+
+    使用範例：
+        policy = ResourcePolicy('roic', deny_domains=AD_ANALYTICS_DOMAINS)
+        await policy.attach(context)
+        print(policy.stats())
+    """
+
+    def __init__(self, source, blocked_types=DEFAULT_BLOCKED_TYPES, allow_domains=(),
+                 deny_domains=AD_ANALYTICS_DOMAINS, first_party_domains=(), first_party_only=False):
+        self.source = source
+        self.blocked_types = set(blocked_types)
+        self.allow_domains = tuple(allow_domains)
+        self.deny_domains = tuple(deny_domains)
+        self.first_party_domains = tuple(first_party_domains)
+        self.first_party_only = first_party_only
+        self.reset_stats()
+
+    def reset_stats(self):
+        """重置統計（每次分析開始時呼叫）"""
+        self.allowed = 0
+        self.blocked = 0
+        self.blocked_by_reason = {}
+        self.estimated_bytes_saved = 0
+
+    def should_block(self, url, resource_type):
+        """回傳封鎖原因；None 表示放行"""
+        if resource_type == 'document':
+            return None
+
+        host = urlparse(url).hostname or ''
+
+        if _domain_matches(host, self.allow_domains):
+            return None
+        if _domain_matches(host, self.deny_domains):
+            return 'deny_domain'
+        if resource_type in self.blocked_types:
+            return f'type:{resource_type}'
+        if self.first_party_only and resource_type in ('script', 'xhr', 'fetch') \
+                and not _domain_matches(host, self.first_party_domains):
+            return 'third_party'
+        return None
+
+    def record_blocked(self, reason, resource_type):
+        self.blocked += 1
+        self.blocked_by_reason[reason] = self.blocked_by_reason.get(reason, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+    async def attach(self, context):
+        """在 context 上註冊攔截器"""
+        await context.route('**/*', self._handle_route)
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.should_block(request.url, request.resource_type)
+
+        if reason:
+            self.record_blocked(reason, request.resource_type)
+            try:
+                await route.abort('blockedbyclient')
+            except Exception:
+                pass
+            return
+
+        self.allowed += 1
+        try:
+            # 🔥 交給下一個攔截器（若有）或直接送出
+            await route.fallback()
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            'source': self.source,
+            'allowed': self.allowed,
+            'blocked': self.blocked,
+            'blocked_by_reason': dict(self.blocked_by_reason),
+            'estimated_bytes_saved': self.estimated_bytes_saved,
+        }
+
+
+def build_resource_policy(source, config):
+    """依 SourceProfiles 中的 resource_policy 設定建立 ResourcePolicy（None → 不攔截）"""
+    if config is None:
+        return None
+    return ResourcePolicy(source, **config)
+
+
+def format_bytes(num_bytes):
+    """bytes → 易讀字串"""
+    for unit in ('B', 'KB', 'MB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == 'B' else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
@@ -0,0 +1,26 @@
+"""
+fetch_* / run_* 結果項目的共同格式
+
+各來源失敗時的格式不同（StockManager / StockProcess 依此判斷）：
+- roic：{"stock": stock, "error": ...}
+- barchart / schwab：{stock: {"error": ...}}
+- 其他：{stock: None}
+
+ShardedRunner / ScrapeWorker / ScrapeCoordinator 與 Deadline（單支股票逾時）都以 failed_item 組出相同格式
+"""
+
+
+def item_stock(item):
+    """run_* 結果項目的股票代碼（{stock: data} 或 {"stock": stock, "error": ...}）"""
+    if 'error' in item and 'stock' in item:
+        return item['stock']
+    return next(iter(item))
+
+
+def failed_item(source, stock, error):
+    """分片失敗 / 逾時的結果項目（與各 fetch_* 失敗時的回傳格式相同）"""
+    if source == 'roic':
+        return {"stock": stock, "error": error}
+    if source in ('barchart', 'schwab'):
+        return {stock: {"error": error}}
+    return {stock: None}
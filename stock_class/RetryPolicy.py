@@ -0,0 +1,283 @@
+import asyncio
+import random
+import time
+
+from stock_class.Deadline import DeadlineExceeded, current_deadline
+from stock_class.PageState import PageStateError
+
+
+# 錯誤類型 → 是否代表主機本身出問題（其餘類型主機有正常回應，只是這一頁沒拿到數據）
+HOST_ERROR_KINDS = ('timeout', 'blocked', 'challenge', 'server', 'network')
+
+# 重試也不會改變結果的類型：直接放棄
+NON_RETRYABLE_KINDS = ('terminal', 'circuit')
+
+# 被擋（403 / 429 / 驗證頁）時退避時間加倍，給主機冷卻的時間
+SLOW_DOWN_KINDS = ('blocked', 'challenge')
+
+# 頁面狀態 → 錯誤類型
+PAGE_STATE_KINDS = {
+    'challenge': 'challenge',
+    'blocked': 'blocked',
+    'timeout': 'timeout',
+    'error': 'server',
+}
+
+# 斷路器預設值：連續 FAILURE_THRESHOLD 次主機錯誤就斷路，COOLDOWN 秒後放一個請求試探，再失敗則冷卻時間加倍
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30.0
+MAX_COOLDOWN = 300.0
+
+
+class ParseError(ValueError):
+    """頁面已載入，但解析不到需要的數據"""
+
+
+class CircuitOpenError(Exception):
+    """主機斷路中，請求直接略過"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        super().__init__(f"{breaker.host} 連續失敗，斷路中（{breaker.retry_in():.0f} 秒後再試）")
+
+
+def classify_error(error):
+    """
+    把抓取時的例外分類
+
+    Returns:
+        str: 'deadline' / 'circuit' / 'terminal' / 'timeout' / 'blocked' / 'challenge' /
+             'server' / 'network' / 'parse' / 'error'
+    """
+    if isinstance(error, DeadlineExceeded):
+        return 'deadline'
+    if isinstance(error, CircuitOpenError):
+        return 'circuit'
+    if isinstance(error, PageStateError):
+        if error.state.terminal:
+            return 'terminal'
+        return PAGE_STATE_KINDS.get(error.state.value, 'error')
+    if isinstance(error, asyncio.TimeoutError) or 'Timeout' in type(error).__name__:
+        return 'timeout'
+    if isinstance(error, (ValueError, KeyError, IndexError, AttributeError, TypeError)):
+        return 'parse'
+
+    message = str(error)
+    if 'net::ERR_' in message or 'ECONNRESET' in message or 'ECONNREFUSED' in message:
+        return 'network'
+    return 'error'
+
+
+class RetryPolicy:
+    """
+    重試策略：次數上限 + 有上限的指數退避（含隨機抖動）
+
+    第 n 次重試前等待 uniform(d × (1 - jitter), d)，d = min(max_delay, base_delay × 2^(n-1))；
+    被擋（blocked / challenge）時 d 加倍
+
+    使用範例：
+        policy = RetryPolicy(attempts=3, base_delay=10, max_delay=30)
+        policy.delay(1, 'timeout')  # 5–10 秒
+    """
+
+    def __init__(self, attempts=3, base_delay=5.0, max_delay=30.0, jitter=0.5):
+        """
+        Args:
+            attempts: 最多嘗試次數（含第一次）
+            base_delay: 第一次重試前的退避上限（秒）
+            max_delay: 退避上限（秒）
+            jitter: 隨機抖動比例（0 表示固定等待）
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def delay(self, retry, kind=None):
+        """第 retry 次重試前的等待秒數"""
+        backoff = self.base_delay * 2 ** (retry - 1)
+        if kind in SLOW_DOWN_KINDS:
+            backoff *= 2
+        backoff = min(self.max_delay, backoff)
+        return random.uniform(backoff * (1 - self.jitter), backoff)
+
+    def start(self, breaker=None, label=''):
+        """開始一次重試流程（每支股票 / 每個頁面一個 RetryState）"""
+        return RetryState(self, breaker, label)
+
+
+class RetryState:
+    """
+    單次抓取的重試流程，取代各 get_* 各自的 while attempt < retries 迴圈
+
+    使用範例：
+        retry = policy.start(breaker, label=stock)
+        while await retry.next_attempt():
+            try:
+                ...
+                return data
+            except Exception as e:
+                retry.failed(e)
+        return f"Error for {stock}: {retry.last_error}"
+    """
+
+    def __init__(self, policy, breaker=None, label=''):
+        self.policy = policy
+        self.breaker = breaker
+        self.label = label
+
+        self.attempt = 0  # 目前是第幾次嘗試（從 1 開始）
+        self.kind = None  # 最近一次失敗的類型
+        self.last_error = None
+
+        self._stopped = False
+        self._free = False
+
+    async def next_attempt(self):
+        """
+        是否進行下一次嘗試（重試前先依退避時間等待）
+
+        - 次數用完 / 不可重試的錯誤 → False
+        - 退避時間超過剩餘的時間預算 → False（不必等到逾時才放棄）
+        - 主機斷路中 → False（last_error 為 CircuitOpenError）
+        """
+        if self._free:
+            self._free = False
+            return True
+        if self._stopped or self.attempt >= self.policy.attempts:
+            return False
+
+        if self.attempt > 0:
+            wait_time = self.policy.delay(self.attempt, self.kind)
+            deadline = current_deadline()
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and wait_time >= remaining:
+                print(f"⌛ {self.label} 剩餘時間不足以重試，放棄")
+                return False
+            print(f"等待 {wait_time:.1f} 秒後重試...")
+            await asyncio.sleep(wait_time)
+
+        if self.breaker is not None and not self.breaker.allow():
+            self.last_error = CircuitOpenError(self.breaker)
+            self.kind = 'circuit'
+            print(f"⛔ {self.label} 略過：{self.last_error}")
+            return False
+
+        self.attempt += 1
+        return True
+
+    def failed(self, error):
+        """
+        回報這次嘗試失敗（在 except 區塊內呼叫）
+
+        Raises:
+            DeadlineExceeded: 時間預算已用完，不重試，交給 ticker_budget / 階段處理
+        """
+        kind = classify_error(error)
+        if kind == 'deadline':
+            raise error
+
+        self.kind = kind
+        self.last_error = error
+        print(f"第 {self.attempt} 次嘗試失敗（{kind}）: {error}")
+        if kind in NON_RETRYABLE_KINDS:
+            self._stopped = True
+
+    def again(self):
+        """下一輪不計入嘗試次數、也不等待（例如 HTTP 快速路徑沒拿到數據，改走瀏覽器）"""
+        self._free = True
+
+
+class CircuitBreaker:
+    """
+    單一主機的斷路器：主機對每支股票都失敗時，停止送出請求，讓整個階段快速結束
+
+    - closed：正常；連續 threshold 次主機錯誤（逾時 / 403 / 429 / 驗證頁 / 5xx / 連線錯誤）→ open
+    - open：所有請求直接略過（CircuitOpenError），cooldown 秒後 → half-open
+    - half-open：只放一個請求試探；成功 → closed，失敗 → open 且冷卻時間加倍（最多 max_cooldown）
+
+    結果由 StockScraper 的導覽入口（_goto / _goto_state）回報，與 AdaptiveLimiter 使用相同的訊號
+
+    使用範例：
+        breaker = CircuitBreaker('www.gurufocus.com')
+        if breaker.allow():
+            ...
+            breaker.record_success()
+    """
+
+    def __init__(self, host, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.reset()
+
+    def reset(self):
+        """回到 closed（每次分析開始時呼叫）"""
+        self.state = 'closed'
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self._opened_at = 0.0
+        self._probe_started = None
+
+        # 統計
+        self.trips = 0
+        self.rejected = 0
+
+    def retry_in(self):
+        """距離下一次試探的秒數"""
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """是否可以送出請求"""
+        now = time.monotonic()
+        if self.state == 'open' and now - self._opened_at >= self.cooldown:
+            self.state = 'half-open'
+            self._probe_started = None
+
+        if self.state == 'half-open':
+            # 🔥 試探請求沒有回報結果（例如解析失敗）時，過一個冷卻期再放下一個
+            if self._probe_started is None or now - self._probe_started >= self.cooldown:
+                self._probe_started = now
+                return True
+
+        if self.state == 'closed':
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != 'closed':
+            print(f"✅ [{self.host}] 試探成功，恢復請求")
+        self.state = 'closed'
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self, reason):
+        self.failures += 1
+        if self.state == 'half-open':
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open(f"試探失敗（{reason}）")
+        elif self.state == 'closed' and self.failures >= self.threshold:
+            self._open(f"連續 {self.failures} 次失敗（最後：{reason}）")
+
+    def _open(self, why):
+        self.state = 'open'
+        self._opened_at = time.monotonic()
+        self.trips += 1
+        print(f"⛔ [{self.host}] {why}，暫停 {self.cooldown:.0f} 秒（期間的請求直接略過）")
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+        }
+
+    def describe(self):
+        return f"{self.state}，斷路 {self.trips} 次，略過 {self.rejected} 個請求"
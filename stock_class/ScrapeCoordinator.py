@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+
+from stock_class.JobQueue import DONE, FAILED, LEASED, PENDING, new_run_id
+from stock_class.ResultItems import failed_item
+from stock_class.ScrapeWorker import worker_main
+from stock_class.ShardedRunner import SHARD_SOURCES
+
+
+# 🔥 分兩批排入佇列：財報日期先完成，roic 工作才能帶著下一次財報日（財報驅動快照的判斷依據）
+PHASES = (('earningshub',), ('roic', 'wacc', 'barchart'))
+
+
+class ScrapeCoordinator:
+    """
+    分散式抓取的協調端：把 (來源, 股票) 工作排入 JobQueue，等 ScrapeWorker 完成後收集結果
+
+    介面與 ShardedRunner 相同（run(stocks_dict, sources) → {來源: [結果項目]}），
+    直接交給 StockManager(sharded_runner=...)，由 StockManager / StockProcess 組出 workbook
+
+    - worker 可以是其他機器 / 程序（python -m stock_class.ScrapeWorker --queue ...），
+      也可以由 local_workers 在本機啟動（單機測試多 worker）
+    - 使用者停止時取消本次尚未完成的工作；結束後刪除本次的工作記錄
+
+    使用範例：
+        coordinator = ScrapeCoordinator(SqliteJobQueue('jobs/queue.db'), local_workers=3)
+        results = await coordinator.run(stocks_dict, ['earningshub', 'roic', 'wacc'])
+    """
+
+    def __init__(self, queue, local_workers=0, max_attempts=3, poll_interval=1.0, worker_args=()):
+        """
+        Args:
+            queue: JobQueue（local_workers > 0 時必須是 SqliteJobQueue，子程序以相同路徑開啟）
+            local_workers: 本機啟動的 worker 程序數
+            max_attempts: 每筆工作的嘗試次數上限
+            poll_interval: 檢查進度的間隔（秒）
+            worker_args: 傳給本機 worker 的額外命令列參數（例如 ['--max-concurrent', '5']）
+        """
+        self.queue = queue
+        self.local_workers = local_workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.worker_args = list(worker_args)
+
+        self._processes = []
+
+    def _start_local_workers(self):
+        if not self.local_workers:
+            return
+
+        # 🔥 spawn：與 ShardedRunner 相同，子程序不繼承 GUI / 事件循環；佇列空閒 10 秒後自行結束
+        context = multiprocessing.get_context('spawn')
+        for index in range(self.local_workers):
+            argv = ['--queue', self.queue.path, '--worker-id', f"local-{index + 1}", '--idle-exit', '10']
+            process = context.Process(target=worker_main, args=(argv + self.worker_args,), daemon=False)
+            process.start()
+            self._processes.append(process)
+
+    async def _stop_local_workers(self, wait):
+        """正常結束時等 worker 自行關閉瀏覽器（不阻塞事件循環）；停止時直接終止"""
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            if wait:
+                await loop.run_in_executor(None, process.join, 20)
+            if process.is_alive():
+                process.terminate()
+                await loop.run_in_executor(None, process.join, 5)
+        self._processes = []
+
+    @staticmethod
+    def _payload(source, stock, stocks_dict, earnings):
+        if source != 'roic':
+            return None
+        return {
+            'us_stock': stock in (stocks_dict.get('us_stocks') or []),
+            'earnings': earnings.get(stock),
+        }
+
+    async def _wait(self, run_id, log):
+        """等到本次所有工作都結束（done / failed / cancelled）"""
+        last = None
+        while True:
+            counts = self.queue.counts(run_id)
+            remaining = counts.get(PENDING, 0) + counts.get(LEASED, 0)
+            progress = (counts.get(DONE, 0), counts.get(FAILED, 0), remaining)
+            if progress != last:
+                log(f"⏳ 分散式抓取：完成 {progress[0]} / 失敗 {progress[1]} / 剩餘 {remaining}")
+                last = progress
+            if remaining == 0:
+                return
+            if self._processes and not any(process.is_alive() for process in self._processes):
+                log("⚠️ 本機 worker 都已結束，等待其他 worker 處理剩餘工作...")
+                self._processes = []
+            await asyncio.sleep(self.poll_interval)
+
+    async def run(self, stocks_dict, sources, log=print):
+        """
+        排入工作、等待完成並收集結果
+
+        Returns:
+            dict: {來源: [fetch_* 的結果項目]}，順序同 stocks_dict['final_stocks']
+        """
+        unknown = [source for source in sources if source not in SHARD_SOURCES]
+        if unknown:
+            raise ValueError(f"無法分散抓取的來源: {', '.join(unknown)}（可用：{', '.join(SHARD_SOURCES)}）")
+
+        stocks = stocks_dict.get('final_stocks') or []
+        run_id = new_run_id()
+        log(f"🧩 分散式抓取 {run_id}：{len(stocks)} 支股票（{', '.join(sources)}）")
+
+        self._start_local_workers()
+        results = {}
+        earnings = {}
+        finished = False
+        try:
+            for phase in PHASES:
+                phase_sources = [source for source in phase if source in sources]
+                if not phase_sources:
+                    continue
+
+                self.queue.enqueue(
+                    run_id,
+                    [(source, stock, self._payload(source, stock, stocks_dict, earnings))
+                     for source in phase_sources for stock in stocks],
+                    max_attempts=self.max_attempts
+                )
+                await self._wait(run_id, log)
+
+                for source in phase_sources:
+                    collected = self.queue.results(run_id, source)
+                    results[source] = [
+                        collected.get(stock) or failed_item(source, stock, "沒有 worker 回報結果")
+                        for stock in stocks
+                    ]
+
+                for item in results.get('earningshub', []):
+                    for stock, earnings_data in item.items():
+                        if earnings_data:
+                            earnings[stock] = earnings_data
+            finished = True
+            return results
+        except asyncio.CancelledError:
+            self.queue.cancel(run_id)
+            raise
+        finally:
+            await self._stop_local_workers(wait=finished)
+            self.queue.purge(run_id)
@@ -0,0 +1,214 @@
+"""
+ScrapeWorker - 從 JobQueue 借出 (來源, 股票) 工作並以 StockScraper 的 fetch_* 執行
+
+使用方式（可在同一台機器開多個）：
+    python -m stock_class.ScrapeWorker --queue jobs/queue.db
+    python -m stock_class.ScrapeWorker --queue jobs/queue.db --sources roic wacc --max-concurrent 5
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+
+from stock_class.JobQueue import SqliteJobQueue
+from stock_class.ResultItems import failed_item
+from stock_class.ShardedRunner import SHARD_SOURCES
+from stock_class.SnapshotCache import SnapshotCache, is_cacheable
+
+
+# 來源 → 單支股票的 fetch_*(stock, semaphore)
+WORKER_FETCHERS = {
+    'earningshub': 'fetch_earnings_date_data',
+    'roic': 'fetch_roic_bundle',
+    'wacc': 'fetch_wacc_data',
+    'barchart': 'fetch_barchart_data',
+}
+
+
+def job_succeeded(stock, item):
+    """fetch_* 的結果是否成功（失敗時重試，用完次數後把最後的結果交給協調端）"""
+    if 'error' in item and 'stock' in item:
+        return False
+    return is_cacheable(item.get(stock))
+
+
+class ScrapeWorker:
+    """
+    分散式抓取的 worker：一個程序一個 StockScraper（一組 Chromium），持續從佇列借工作
+
+    - 同時執行最多 max_jobs 筆工作；實際的頁面並發由各來源的 AdaptiveLimiter 控制
+    - 執行中的工作定期延長 lease，worker 當機時工作會在 lease 到期後由其他 worker 接手
+    - roic 工作的 payload 帶有 us_stock（是否抓 Financial / Ratios）與 earnings（下一次財報日，
+      讓本機快照判斷財報驅動的數據是否仍可沿用）
+
+    使用範例：
+        worker = ScrapeWorker(SqliteJobQueue('jobs/queue.db'))
+        await worker.run()
+    """
+
+    def __init__(self, queue, worker_id=None, sources=None, config=None, max_concurrent=3, max_jobs=10,
+                 snapshot_cache=None, lease_seconds=300, poll_interval=2.0):
+        """
+        Args:
+            queue: JobQueue
+            worker_id: 預設為 <主機名稱>-<pid>
+            sources: 只處理這些來源（None 表示全部）
+            config: 傳給 StockScraper 的 config（html_parser / http_fast_path）
+            max_concurrent: 各來源 AdaptiveLimiter 的起始上限
+            max_jobs: 同時借出的工作上限
+            snapshot_cache: SnapshotCache（None 表示不使用快照）
+            lease_seconds: lease 期限；執行中每 lease_seconds / 3 延長一次
+            poll_interval: 佇列沒有工作時的等待間隔（秒）
+        """
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.sources = list(sources) if sources else list(WORKER_FETCHERS)
+        self.config = config
+        self.max_concurrent = max_concurrent
+        self.max_jobs = max_jobs
+        self.snapshot_cache = snapshot_cache
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self._active = {}  # {asyncio.Task: Job}
+        self._stopping = False
+
+        # 統計
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def stop(self):
+        """不再借新的工作，執行中的工作完成後結束"""
+        self._stopping = True
+
+    async def run(self, idle_exit=None):
+        """
+        Args:
+            idle_exit: 佇列持續沒有工作超過此秒數時結束（None 表示一直等待新工作）
+        """
+        from stock_class.StockScraper import StockScraper
+
+        scraper = StockScraper(stocks={'final_stocks': [], 'us_stocks': [], 'non_us_stocks': []},
+                               config=self.config, max_concurrent=self.max_concurrent,
+                               snapshot_cache=self.snapshot_cache)
+        print(f"👷 Worker {self.worker_id} 啟動（來源：{', '.join(self.sources)}）")
+
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        idle_since = None
+        try:
+            while not self._stopping or self._active:
+                free = 0 if self._stopping else self.max_jobs - len(self._active)
+                jobs = self.queue.lease(self.worker_id, self.sources, limit=free,
+                                        lease_seconds=self.lease_seconds) if free > 0 else []
+                for job in jobs:
+                    task = asyncio.ensure_future(self._execute(scraper, job))
+                    self._active[task] = job
+
+                if self._active or jobs:
+                    idle_since = None
+                elif idle_exit is not None:
+                    loop_time = asyncio.get_running_loop().time()
+                    idle_since = idle_since or loop_time
+                    if loop_time - idle_since >= idle_exit and self.queue.outstanding(self.sources) == 0:
+                        break
+
+                if self._active:
+                    done, _ = await asyncio.wait(list(self._active), timeout=self.poll_interval,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        self._active.pop(task, None)
+                else:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            heartbeat.cancel()
+            for task in self._active:
+                task.cancel()
+            await asyncio.gather(heartbeat, *self._active, return_exceptions=True)
+            self._active = {}
+            await scraper.cleanup()
+            print(f"👷 Worker {self.worker_id} 結束：完成 {self.completed} / 重試 {self.retried} / 失敗 {self.failed}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self.queue.extend(list(self._active.values()), self.worker_id, self.lease_seconds)
+
+    async def _execute(self, scraper, job):
+        stock = job.stock
+
+        if job.payload.get('us_stock') and stock not in scraper.us_stocks:
+            scraper.us_stocks.append(stock)
+        if job.payload.get('earnings'):
+            scraper.update_earnings_calendar([{stock: job.payload['earnings']}])
+
+        fetch = getattr(scraper, WORKER_FETCHERS[job.source])
+        try:
+            item = await fetch(stock, scraper._get_limiter(job.source))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            item = failed_item(job.source, stock, str(e))
+
+        if job_succeeded(stock, item):
+            if job.source == 'earningshub':
+                scraper.update_earnings_calendar([item])
+            self.queue.complete(job, self.worker_id, item)
+            self.completed += 1
+            print(f"✅ [{job.source}] {stock} 完成")
+            return
+
+        error = item.get('error') if 'error' in item else f"{job.source} 沒有取得數據"
+        self.queue.fail(job, self.worker_id, str(error), result=item)
+        if job.last_attempt:
+            self.failed += 1
+            print(f"❌ [{job.source}] {stock} 失敗（已重試 {job.attempts} 次）：{error}")
+        else:
+            self.retried += 1
+            print(f"🔁 [{job.source}] {stock} 第 {job.attempts} 次失敗，稍後重試：{error}")
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description='分散式抓取 worker')
+    arg_parser.add_argument('--queue', required=True, help='JobQueue 的 SQLite 檔案')
+    arg_parser.add_argument('--worker-id', default=None, help='預設為 <主機名稱>-<pid>')
+    arg_parser.add_argument('--sources', nargs='+', choices=list(SHARD_SOURCES), default=None)
+    arg_parser.add_argument('--max-concurrent', type=int, default=3, help='各來源的起始並發上限')
+    arg_parser.add_argument('--max-jobs', type=int, default=10, help='同時借出的工作上限')
+    arg_parser.add_argument('--snapshot-dir', default=None, help='快照資料夾（預設與 GUI 相同）')
+    arg_parser.add_argument('--no-snapshots', action='store_true', help='不使用快照')
+    arg_parser.add_argument('--idle-exit', type=float, default=None,
+                            help='佇列持續沒有工作超過此秒數時結束（預設一直等待）')
+    arg_parser.add_argument('--html-parser', default=None, help='selectolax / lxml / html.parser')
+    arg_parser.add_argument('--no-http', action='store_true', help='關閉 HTTP 快速路徑')
+    return arg_parser.parse_args(argv)
+
+
+def worker_main(argv=None):
+    """命令列 / 子程序入口"""
+    args = parse_args(argv)
+    config = {'http_fast_path': not args.no_http}
+    if args.html_parser:
+        config['html_parser'] = args.html_parser
+
+    queue = SqliteJobQueue(args.queue)
+    worker = ScrapeWorker(
+        queue,
+        worker_id=args.worker_id,
+        sources=args.sources,
+        config=config,
+        max_concurrent=args.max_concurrent,
+        max_jobs=args.max_jobs,
+        snapshot_cache=None if args.no_snapshots else SnapshotCache(base_dir=args.snapshot_dir),
+    )
+    try:
+        asyncio.run(worker.run(idle_exit=args.idle_exit))
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Worker {worker.worker_id} 被中斷")
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    worker_main()
@@ -0,0 +1,196 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from stock_class.ResultItems import failed_item, item_stock
+
+
+# 可分片的來源 → StockScraper 的 run_* 方法（無頭、無需人工操作）
+# 🔥 依此順序執行：財報日期先抓，roic 的財報驅動快照才能判斷是否沿用
+SHARD_SOURCES = {
+    'earningshub': 'run_earnings_dates',
+    'roic': 'run_roic_bundle',
+    'wacc': 'run_wacc',
+    'barchart': 'run_barchart',
+}
+
+# 子程序只需要的 config 欄位（不帶 Schwab 金鑰：各程序不各自開啟 tokens.db）
+WORKER_CONFIG_KEYS = ('html_parser', 'http_fast_path')
+
+
+def split_stocks(stocks_dict, shards):
+    """
+    把股票字典輪流分配到 shards 組（每組保留 us / non-us 分類）
+
+    Returns:
+        list: 非空的股票字典
+    """
+    stocks = stocks_dict.get('final_stocks') or []
+    us_stocks = set(stocks_dict.get('us_stocks') or [])
+    non_us_stocks = set(stocks_dict.get('non_us_stocks') or [])
+
+    groups = []
+    for index in range(max(1, shards)):
+        shard_stocks = stocks[index::max(1, shards)]
+        if not shard_stocks:
+            continue
+        groups.append({
+            'final_stocks': shard_stocks,
+            'us_stocks': [stock for stock in shard_stocks if stock in us_stocks],
+            'non_us_stocks': [stock for stock in shard_stocks if stock in non_us_stocks],
+        })
+    return groups
+
+
+def run_shard(job):
+    """子程序入口：獨立的事件循環與 Chromium"""
+    return asyncio.run(_run_shard(job))
+
+
+async def _run_shard(job):
+    from stock_class.SnapshotCache import SnapshotCache
+    from stock_class.StockScraper import StockScraper
+
+    snapshot_cache = SnapshotCache(**job['snapshot']) if job['snapshot'] is not None else None
+    scraper = StockScraper(stocks=job['stocks'], config=job['config'], max_concurrent=job['max_concurrent'],
+                           snapshot_cache=snapshot_cache)
+
+    started = time.time()
+    results = {}
+    try:
+        for source in job['sources']:
+            results[source] = await getattr(scraper, SHARD_SOURCES[source])()
+            if source == 'earningshub':
+                scraper.update_earnings_calendar(results[source])
+        limiters = scraper.browser_session.limiter_stats()
+    finally:
+        await scraper.cleanup()
+
+    return {
+        'shard': job['shard'],
+        'results': results,
+        'limiters': limiters,
+        'elapsed': time.time() - started,
+    }
+
+
+class ShardedRunner:
+    """
+    多程序分片抓取：股票分成 N 組，每組在獨立程序中以自己的事件循環與 Chromium 執行 run_*
+
+    🔥 單一事件循環同時驅動所有頁面，又在同一顆核心上做 DataFrame / HTML 解析，
+       股票數多時 CPU 先滿；分片後每個程序各自解析，結果再合併回 StockManager 寫入 Excel
+
+    - 只分片無頭來源（SHARD_SOURCES）；SeekingAlpha / TradingView / Beta 需要人工處理驗證，
+      Schwab API 共用速率限制，仍由主程序執行
+    - 子程序共用同一個快照資料夾；FetchLedger.save() 會合併其他程序寫入的記錄
+    - 單一分片失敗時，該分片的股票以各 fetch_* 失敗時的格式回報（failed_item），其他分片不受影響
+
+    使用範例：
+        runner = ShardedRunner(shards=4, config=config, snapshot_cache=cache)
+        results = await runner.run(stocks_dict, ['earningshub', 'roic', 'wacc'])
+        # {'roic': [{stock: {...}}, ...], ...}，順序同 stocks_dict['final_stocks']
+    """
+
+    def __init__(self, shards=None, max_concurrent=3, config=None, snapshot_cache=None):
+        """
+        Args:
+            shards: 程序數（預設為 CPU 核心數）
+            max_concurrent: 每個程序內各來源的起始並發上限
+            config: 主程序的 config（只傳 WORKER_CONFIG_KEYS 給子程序）
+            snapshot_cache: 主程序的 SnapshotCache（子程序以相同設定開啟同一個資料夾）
+        """
+        self.shards = shards or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent
+        self.config = {key: config[key] for key in WORKER_CONFIG_KEYS if key in (config or {})} or None
+        self.snapshot_cache = snapshot_cache
+
+        self.last_stats = []
+
+    def _snapshot_options(self):
+        cache = self.snapshot_cache
+        if cache is None:
+            return None
+        return {'base_dir': cache.base_dir, 'max_age': cache.max_age,
+                'force_refresh': cache.force_refresh, 'ttls': cache.ttls}
+
+    def _jobs(self, stocks_dict, sources):
+        sources = [source for source in SHARD_SOURCES if source in sources]
+        return [
+            {
+                'shard': index,
+                'stocks': shard_stocks,
+                'sources': sources,
+                'config': self.config,
+                'max_concurrent': self.max_concurrent,
+                'snapshot': self._snapshot_options(),
+            }
+            for index, shard_stocks in enumerate(split_stocks(stocks_dict, self.shards))
+        ]
+
+    async def run(self, stocks_dict, sources, log=print):
+        """
+        執行所有分片並合併結果
+
+        Returns:
+            dict: {來源: [run_* 的結果項目]}，順序同 stocks_dict['final_stocks']
+        """
+        unknown = [source for source in sources if source not in SHARD_SOURCES]
+        if unknown:
+            raise ValueError(f"無法分片的來源: {', '.join(unknown)}（可用：{', '.join(SHARD_SOURCES)}）")
+
+        jobs = self._jobs(stocks_dict, sources)
+        if not jobs:
+            return {source: [] for source in sources}
+
+        log(f"🧩 分片抓取：{len(stocks_dict.get('final_stocks') or [])} 支股票分成 {len(jobs)} 個程序"
+            f"（{', '.join(jobs[0]['sources'])}）")
+
+        # 🔥 spawn：子程序不繼承主程序的事件循環 / Playwright / tkinter 狀態（Windows 也只支援 spawn）
+        executor = ProcessPoolExecutor(max_workers=len(jobs), mp_context=multiprocessing.get_context('spawn'))
+        loop = asyncio.get_running_loop()
+        cancelled = False
+        try:
+            outputs = await asyncio.gather(
+                *[loop.run_in_executor(executor, run_shard, job) for job in jobs],
+                return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if cancelled:
+                # 使用者停止：不等子程序抓完，直接結束（子程序的 Chromium 隨之關閉）
+                for process in list(getattr(executor, '_processes', {}).values()):
+                    process.terminate()
+            executor.shutdown(wait=not cancelled, cancel_futures=True)
+
+        return self._merge(stocks_dict, jobs, outputs, log)
+
+    def _merge(self, stocks_dict, jobs, outputs, log):
+        by_source = {source: {} for source in jobs[0]['sources']}
+        self.last_stats = []
+
+        for job, output in zip(jobs, outputs):
+            if isinstance(output, BaseException):
+                log(f"❌ 分片 {job['shard'] + 1} 失敗：{output}")
+                for source in job['sources']:
+                    for stock in job['stocks']['final_stocks']:
+                        by_source[source][stock] = failed_item(source, stock, f"分片失敗: {output}")
+                continue
+
+            self.last_stats.append({'shard': output['shard'], 'elapsed': output['elapsed'],
+                                    'stocks': len(job['stocks']['final_stocks']), 'limiters': output['limiters']})
+            log(f"✅ 分片 {output['shard'] + 1}：{len(job['stocks']['final_stocks'])} 支股票，"
+                f"耗時 {output['elapsed']:.1f} 秒")
+            for source, items in output['results'].items():
+                for item in items:
+                    by_source[source][item_stock(item)] = item
+
+        order = stocks_dict.get('final_stocks') or []
+        return {
+            source: [items[stock] for stock in order if stock in items]
+            for source, items in by_source.items()
+        }
@@ -0,0 +1,303 @@
+import functools
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+from stock_class.FetchLedger import FetchLedger
+from stock_class.SourceProfiles import DEFAULT_SNAPSHOT_TTL, EARNINGS_DRIVEN_SOURCES, SNAPSHOT_TTLS, source_url
+
+
+def default_snapshot_dir():
+    """快照資料夾：打包後放在 .exe 同層，開發環境放在專案根目錄"""
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, 'snapshots')
+
+
+def is_cacheable(value):
+    """
+    只快取成功的抓取結果
+
+    失敗時各 get_* 回傳 None、"Error for ..." / "Failed to ..." 字串、
+    {"error": ...} 或 ([], {})，這些都不寫入快取，下次重新抓取
+    """
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return not value.startswith(('Error for', 'Failed to'))
+    if isinstance(value, dict):
+        return bool(value) and 'error' not in value
+    if isinstance(value, tuple):
+        # get_combined_data 回傳 (summary, metrics)：任一部分失敗就不快取，避免殘缺結果沿用到過期
+        return all(is_cacheable(item) for item in value)
+    if isinstance(value, list):
+        return len(value) > 0
+    return True
+
+
+def has_tables(count):
+    """
+    快照有效性檢查：表格列表至少 count 個（snapshot(..., validate=...) 使用）
+
+    🔥 roic.ai Financial / Ratios 渲染不完整時表格會變少；財報驅動的快照會沿用到下一次財報日，
+       殘缺的結果一旦寫入就會被使用一整季
+    """
+    def validate(value):
+        return isinstance(value, list) and len(value) >= count
+    return validate
+
+
+class SnapshotCache:
+    """
+    抓取結果的本機快照（內容定址 + gzip 壓縮）
+
+    - objects/ab/<sha256>.gz：pickle 後壓縮的結果，以內容 sha256 命名，相同內容只存一份
+    - refs/<key>.json：(來源, 股票, URL) → 內容 sha256 與抓取時間；以 os.replace 原子寫入
+    - 每個來源的有效期限見 SourceProfiles.SNAPSHOT_TTLS；
+      max_age（小時）統一覆寫所有來源，force_refresh 一律重新抓取（仍會寫入新快照）
+    - EARNINGS_DRIVEN_SOURCES（財報 / 比率 / 成長率）改由 FetchLedger 判斷：
+      上次抓取後沒有新財報就沿用快照，有新財報才重新抓取（無法判斷時才看 TTL）
+
+    使用範例：
+        cache = SnapshotCache(max_age=24)
+        hit, value = cache.get('roic_financials', 'AAPL', url)
+        if not hit:
+            value = await fetch()
+            cache.put('roic_financials', 'AAPL', url, value)
+    """
+
+    def __init__(self, base_dir=None, max_age=None, force_refresh=False, ttls=None):
+        """
+        Args:
+            base_dir: 快照資料夾（預設 default_snapshot_dir()）
+            max_age: 覆寫所有來源的有效期限（小時）；None 表示使用各來源的 TTL
+            force_refresh: True 時忽略既有快照
+            ttls: {來源: 秒數}，預設 SNAPSHOT_TTLS
+        """
+        self.base_dir = base_dir or default_snapshot_dir()
+        self.max_age = max_age
+        self.force_refresh = force_refresh
+        self.ttls = dict(SNAPSHOT_TTLS if ttls is None else ttls)
+
+        self.objects_dir = os.path.join(self.base_dir, 'objects')
+        self.refs_dir = os.path.join(self.base_dir, 'refs')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+
+        # 🔥 每支股票各來源的最後抓取時間 + 當時的下一次財報日
+        self.ledger = FetchLedger(os.path.join(self.base_dir, 'fetch_ledger.json'))
+
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'writes': 0}
+
+    # ------------------------------------------------------------------
+    # 路徑 / 有效期限
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(source, stock, url):
+        return hashlib.sha256(f"{source}\n{stock}\n{url}".encode('utf-8')).hexdigest()
+
+    def _ref_path(self, key):
+        return os.path.join(self.refs_dir, f"{key}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def ttl(self, source):
+        """來源的有效期限（秒）"""
+        if self.max_age is not None:
+            return self.max_age * 3600
+        return self.ttls.get(source, DEFAULT_SNAPSHOT_TTL)
+
+    def is_fresh(self, source, stock, fetched_at):
+        """快照是否仍可使用（財報驅動的來源先問 FetchLedger，再看 TTL）"""
+        if source in EARNINGS_DRIVEN_SOURCES and self.max_age is None:
+            earnings_since = self.ledger.earnings_since(stock, source)
+            if earnings_since is not None:
+                return not earnings_since
+        return time.time() - fetched_at <= self.ttl(source)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _atomic_write(path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # 讀寫
+    # ------------------------------------------------------------------
+
+    def _read_ref(self, source, stock, url):
+        try:
+            with open(self._ref_path(self._key(source, stock, url)), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def age(self, source, stock, url):
+        """快照已存在的秒數（沒有快照時為 None）"""
+        ref = self._read_ref(source, stock, url)
+        return time.time() - ref['fetched_at'] if ref else None
+
+    def get(self, source, stock, url, validate=None):
+        """
+        Args:
+            validate: 來源的有效性檢查（不符合的舊快照視為未命中）
+
+        Returns:
+            (hit, value)：hit 為 False 時 value 為 None
+        """
+        if self.force_refresh:
+            self._count('misses')
+            return False, None
+
+        ref = self._read_ref(source, stock, url)
+        if ref is None:
+            self._count('misses')
+            return False, None
+
+        if not self.is_fresh(source, stock, ref['fetched_at']):
+            self._count('expired')
+            return False, None
+
+        try:
+            with open(self._object_path(ref['hash']), 'rb') as f:
+                value = pickle.loads(gzip.decompress(f.read()))
+        except Exception:
+            # 內容檔遺失或損毀 → 視為未命中
+            self._count('misses')
+            return False, None
+
+        if validate is not None and not validate(value):
+            self._count('misses')
+            return False, None
+
+        self._count('hits')
+        return True, value
+
+    def put(self, source, stock, url, value, validate=None):
+        """
+        寫入快照（不可快取、或未通過 validate 的結果直接略過）
+
+        Returns:
+            bool: 是否寫入
+        """
+        if not is_cacheable(value) or (validate is not None and not validate(value)):
+            return False
+
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            digest = hashlib.sha256(data).hexdigest()
+
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                self._atomic_write(object_path, gzip.compress(data, compresslevel=6))
+
+            fetched_at = time.time()
+            ref = {'source': source, 'stock': stock, 'url': url, 'hash': digest, 'fetched_at': fetched_at}
+            self._atomic_write(self._ref_path(self._key(source, stock, url)),
+                               json.dumps(ref, ensure_ascii=False).encode('utf-8'))
+            self.ledger.record_fetch(stock, source, fetched_at)
+        except Exception as e:
+            print(f"⚠️ 快照寫入失敗 [{source}] {stock}: {e}")
+            return False
+
+        self._count('writes')
+        return True
+
+    def flush(self):
+        """抓取記錄寫回檔案（快照內容在 put 時已寫入）"""
+        self.ledger.save()
+
+    def invalidate(self, source, stock, url):
+        """刪除指定快照的索引（內容檔保留，可能被其他索引共用）"""
+        try:
+            os.remove(self._ref_path(self._key(source, stock, url)))
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------
+    # 統計
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def log_stats(self, log=print):
+        stats = self.stats()
+        if not any(stats.values()):
+            return
+        mode = '強制重新抓取' if self.force_refresh else (
+            f'有效期限 {self.max_age} 小時' if self.max_age is not None else '依來源有效期限')
+        log(f"💾 快照快取（{mode}）：命中 {stats['hits']} / 未命中 {stats['misses']} / "
+            f"過期 {stats['expired']} / 寫入 {stats['writes']}")
+
+
+def snapshot_url(url_template, stock):
+    """快照鍵使用的 URL（{stock} 為原始代碼，{symbol} 為 '-' 換成 '.' 的代碼）"""
+    return url_template.format(stock=stock, symbol=stock.replace('-', '.'))
+
+
+def source_snapshot_url(source, path_template):
+    """
+    快照鍵的 URL 產生器：與導覽相同經過 SourceProfiles.source_url，base_url 覆寫時快照鍵也跟著改變
+
+    Returns:
+        callable: stock → URL
+    """
+    def url_for(stock):
+        return source_url(source, snapshot_url(path_template, stock))
+
+    return url_for
+
+
+def snapshot(source, url_for, validate=None):
+    """
+    get_*(self, stock, page, ...) 的快照裝飾器：導覽前先查快照，命中時不碰頁面
+
+    實例沒有 snapshot_cache（或為 None）時直接呼叫原函式
+
+    Args:
+        url_for: stock → 快照鍵 URL（source_snapshot_url 產生）
+        validate: 來源的有效性檢查（例如 has_tables(3)），不符合的結果不寫入、舊快照不使用
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, stock, *args, **kwargs):
+            cache = getattr(self, 'snapshot_cache', None)
+            if cache is None:
+                return await func(self, stock, *args, **kwargs)
+
+            url = url_for(stock)
+            hit, value = cache.get(source, stock, url, validate=validate)
+            if hit:
+                print(f"💾 {stock} [{source}] 使用快照")
+                return value
+
+            value = await func(self, stock, *args, **kwargs)
+            cache.put(source, stock, url, value, validate=validate)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,340 @@
+"""
+各資料來源的瀏覽器設定（context 參數、反偵測腳本、請求攔截規則）
+
+🔥 原本每個 fetch_* 都各自複製一份 new_context(...) 參數，
+   集中在這裡後，ContextPool 依來源建立並重用 context。
+🔥 resource_policy：爬蟲只讀 DOM 文字，圖片 / 字型 / 影音與廣告分析請求一律攔截
+🔥 http_fast_path：伺服器端渲染的頁面先以 HTTP 抓取（HttpFetcher），
+   回應中找不到 selector 時才改用瀏覽器
+🔥 base_url：各來源網址的前綴；benchmarks 以 set_base_url_overrides() 指向本機替身伺服器
+"""
+
+from urllib.parse import urlparse
+
+from stock_class.ResourcePolicy import AD_ANALYTICS_DOMAINS, DEFAULT_BLOCKED_TYPES
+
+USER_AGENT_130 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+USER_AGENT_131 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+
+# 反偵測腳本（含 permissions 覆蓋，WACC 使用）
+STEALTH_SCRIPT_EN = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+
+    window.chrome = {
+        runtime: {},
+        loadTimes: function() {},
+        csi: function() {},
+        app: {}
+    };
+
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['en-US', 'en']
+    });
+"""
+
+# 反偵測腳本（繁中語系，TradingView / Beta / earningshub 使用）
+STEALTH_SCRIPT_ZH_TW = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+
+    window.chrome = {
+        runtime: {},
+        loadTimes: function() {},
+        csi: function() {},
+        app: {}
+    };
+
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['zh-TW', 'zh', 'en-US', 'en']
+    });
+"""
+
+ZH_TW_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# 🔥 驗證服務網域：必須放行，否則 CAPTCHA / PerimeterX 驗證畫面無法顯示
+RECAPTCHA_DOMAINS = ('google.com', 'gstatic.com', 'recaptcha.net')
+PERIMETERX_DOMAINS = ('perimeterx.net', 'px-cdn.net', 'px-cloud.net', 'px-client.net')
+
+DEFAULT_RESOURCE_POLICY = {
+    'blocked_types': DEFAULT_BLOCKED_TYPES,
+    'deny_domains': AD_ANALYTICS_DOMAINS,
+}
+
+TRADINGVIEW_HEADERS = dict(
+    ZH_TW_HEADERS,
+    Accept='text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8'
+)
+
+SOURCE_PROFILES = {
+    # roic.ai：quote / financials / ratios 三個頁面共用
+    'roic': {
+        'base_url': 'https://www.roic.ai',
+        'headless': True,
+        'context_options': {
+            'user_agent': USER_AGENT_130,
+            'viewport': {"width": 800, "height": 600},
+            'java_script_enabled': True,
+        },
+        'init_script': None,
+        'resource_policy': DEFAULT_RESOURCE_POLICY,
+        # JSON 擷取模式（StockScraper(capture_json=True)）要記錄的 XHR / fetch 網址
+        'capture_patterns': (r'roic\.ai/api/', r'roic\.ai/_next/data/'),
+    },
+    'seekingalpha': {
+        'base_url': 'https://seekingalpha.com',
+        'headless': False,  # 🔥 需要有頭模式處理 PerimeterX
+        'context_options': {
+            'user_agent': USER_AGENT_130,
+            'viewport': {"width": 1920, "height": 1080},
+            'java_script_enabled': True,
+        },
+        'init_script': None,
+        'resource_policy': dict(DEFAULT_RESOURCE_POLICY, allow_domains=PERIMETERX_DOMAINS),
+    },
+    'wacc': {
+        'base_url': 'https://www.gurufocus.com',
+        'headless': True,
+        'context_options': {
+            'user_agent': USER_AGENT_131,
+            'viewport': {"width": 1920, "height": 1080},
+            'java_script_enabled': True,
+            'locale': 'en-US',
+            'timezone_id': 'America/New_York',
+            'extra_http_headers': {
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'DNT': '1',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Sec-Fetch-Dest': 'document',
+                'Sec-Fetch-Mode': 'navigate',
+                'Sec-Fetch-Site': 'none',
+                'Cache-Control': 'max-age=0',
+            },
+        },
+        'init_script': STEALTH_SCRIPT_EN,
+        'resource_policy': DEFAULT_RESOURCE_POLICY,
+        'http_fast_path': {
+            'path': '/term/wacc/{symbol}',
+            'selector': 'font[style]',
+        },
+    },
+    'barchart': {
+        'base_url': 'https://www.barchart.com',
+        'headless': True,
+        'context_options': {
+            'user_agent': USER_AGENT_130,
+            'viewport': {"width": 1920, "height": 1080},
+            'java_script_enabled': True,
+        },
+        'init_script': None,
+        'resource_policy': DEFAULT_RESOURCE_POLICY,
+        'http_fast_path': {
+            'path': '/stocks/quotes/{stock}/volatility-charts',
+            'selector': 'div.bc-datatable-toolbar.bc-options-toolbar.volatility',
+        },
+    },
+    'earningshub': {
+        'base_url': 'https://earningshub.com',
+        'headless': True,
+        'context_options': {
+            'user_agent': USER_AGENT_131,
+            'viewport': {"width": 1920, "height": 1080},
+            'java_script_enabled': True,
+            'locale': 'zh-TW',
+            'timezone_id': 'Asia/Taipei',
+            'extra_http_headers': ZH_TW_HEADERS,
+        },
+        'init_script': STEALTH_SCRIPT_ZH_TW,
+        'resource_policy': DEFAULT_RESOURCE_POLICY,
+        # 日期需為 zh-TW 格式（_parse_chinese_date）；伺服器端 HTML 解析不到時自動改走瀏覽器
+        'http_fast_path': {
+            'path': '/quote/{symbol}',
+            'selector': 'div.MuiAlert-root',
+        },
+    },
+    # TradingView 財報頁 / 個股頁：有頭模式集中處理 CAPTCHA（頁面不進池，需同時保留）
+    'tradingview': {
+        'base_url': 'https://www.tradingview.com',
+        'headless': False,
+        'context_options': {
+            'user_agent': USER_AGENT_131,
+            'viewport': {"width": 1920, "height": 1080},
+            'java_script_enabled': True,
+            'locale': 'zh-TW',
+            'timezone_id': 'Asia/Taipei',
+            'extra_http_headers': TRADINGVIEW_HEADERS,
+        },
+        'init_script': STEALTH_SCRIPT_ZH_TW,
+        'resource_policy': dict(DEFAULT_RESOURCE_POLICY, allow_domains=RECAPTCHA_DOMAINS),
+    },
+    'beta': {
+        'base_url': 'https://tw.tradingview.com',
+        'headless': False,
+        'context_options': {
+            'user_agent': USER_AGENT_131,
+            'viewport': {"width": 1280, "height": 960},
+            'java_script_enabled': True,
+            'locale': 'zh-TW',
+            'timezone_id': 'Asia/Taipei',
+            'extra_http_headers': TRADINGVIEW_HEADERS,
+        },
+        'init_script': STEALTH_SCRIPT_ZH_TW,
+        'resource_policy': dict(DEFAULT_RESOURCE_POLICY, allow_domains=RECAPTCHA_DOMAINS),
+    },
+}
+
+
+# 🔥 抓取結果快照的有效期限（秒），SnapshotCache 使用
+# roic 財報每年更新、比率每季更新、SeekingAlpha 成長率很少變動；報價 / 波動率則需要較新的數據
+HOUR = 3600
+DAY = 24 * HOUR
+SNAPSHOT_TTLS = {
+    'roic_quote': 12 * HOUR,        # Summary + EPS / P/E / Market Cap
+    'roic_financials': 30 * DAY,
+    'roic_ratios': 7 * DAY,
+    'seekingalpha': 30 * DAY,
+    'wacc': 7 * DAY,
+    'tradingview': 7 * DAY,
+    'beta': 7 * DAY,
+    'barchart': 6 * HOUR,
+    'earningshub': 1 * DAY,
+}
+DEFAULT_SNAPSHOT_TTL = 12 * HOUR
+
+# 🔥 roic.ai Financial / Ratios 頁面應有的表格數：少於此數代表頁面尚未渲染完成（重試，不寫入）
+ROIC_TABLE_COUNTS = {
+    'roic_financials': 3,
+    'roic_ratios': 7,
+}
+
+# 🔥 只在財報發布後才會變動的來源：FetchLedger 判斷上次抓取後沒有新財報時，忽略 TTL 直接沿用快照
+# roic_quote 的 Summary 也是財報數據，但同一頁的 P/E / Market Cap 隨股價變動，因此仍依 TTL 更新
+EARNINGS_DRIVEN_SOURCES = ('roic_financials', 'roic_ratios', 'seekingalpha')
+EARNINGS_MAX_AGE = 120 * DAY  # 財報日期來源失準時的上限：超過一季多一點一律重新抓取
+# 財報發布後資料來源需要幾天才會更新：這段期間內抓到的數據可能仍是舊的，不沿用到下一次財報日
+EARNINGS_GRACE = 7 * DAY
+
+# 🔥 各來源的並發範圍（AdaptiveLimiter）：從 StockScraper 的 max_concurrent 起步，依延遲 / 錯誤在範圍內自動調整
+# gurufocus / Barchart 對大量同時請求較敏感，上限壓低；roic.ai 可承受較多
+CONCURRENCY_LIMITS = {
+    'roic': {'min': 2, 'max': 24},
+    'wacc': {'min': 1, 'max': 12},
+    'barchart': {'min': 1, 'max': 12},
+    'earningshub': {'min': 1, 'max': 20},
+}
+DEFAULT_CONCURRENCY_LIMITS = {'min': 1, 'max': 15}
+
+# 🔥 單支股票的時間預算（秒，取得並發名額後開始計算，含重試）：超過時取消該股票並回報失敗，不拖住整個階段
+# roic 打包抓取含 quote / financials / ratios 三頁；schwab 為選擇權鏈 API（Client 本身 30 秒逾時）
+# 有頭來源（SeekingAlpha / TradingView / Beta）需等待使用者處理驗證，不設預算，只受分析 / 階段預算限制
+TICKER_BUDGETS = {
+    'roic': 300,
+    'wacc': 180,
+    'barchart': 120,
+    'earningshub': 120,
+    'schwab': 60,
+}
+
+# 🔥 各來源的重試退避（RetryPolicy）：第 n 次重試前等待 base 的 2^(n-1) 倍（不超過 max），再隨機取 50%–100%
+# 第一次重試的等待與原本各 get_* 的固定區間相當：SeekingAlpha / TradingView 20–40 秒、gurufocus 7.5–15 秒
+RETRY_DELAYS = {
+    'roic': {'base': 5, 'max': 20},
+    'seekingalpha': {'base': 40, 'max': 90},
+    'tradingview': {'base': 40, 'max': 90},
+    'wacc': {'base': 15, 'max': 45},
+    'barchart': {'base': 10, 'max': 30},
+    'earningshub': {'base': 10, 'max': 30},
+}
+DEFAULT_RETRY_DELAYS = {'base': 5, 'max': 30}
+
+# 🔥 各主機的導覽節流（TokenBucket，每秒 rate 次、閒置後最多連續 burst 次），所有來源 / 協程共用
+# 以主機為鍵（同一主機的來源共用一個 bucket，速率不因階段順序而不同）；主機名稱同 source_host()
+# 取代 page.goto 前各自的 random.uniform 等待；有頭來源（SeekingAlpha / TradingView）維持原本逐頁數秒的節奏
+NAVIGATION_RATES = {
+    'www.roic.ai': {'rate': 3.0, 'burst': 6},
+    'www.gurufocus.com': {'rate': 1.0, 'burst': 3},
+    'www.barchart.com': {'rate': 1.0, 'burst': 3},
+    'earningshub.com': {'rate': 2.0, 'burst': 4},
+    'seekingalpha.com': {'rate': 0.1, 'burst': 1},
+    'www.tradingview.com': {'rate': 0.25, 'burst': 1},
+    'tw.tradingview.com': {'rate': 0.25, 'burst': 1},
+}
+DEFAULT_NAVIGATION_RATE = {'rate': 1.0, 'burst': 2}
+
+
+def get_source_profile(source):
+    """取得資料來源設定（找不到時拋出 KeyError）"""
+    if source not in SOURCE_PROFILES:
+        raise KeyError(f"未定義的資料來源: {source}")
+    return SOURCE_PROFILES[source]
+
+
+# 🔥 base_url 覆寫（{來源: base_url}），只供 benchmarks / 測試使用
+_BASE_URL_OVERRIDES = {}
+
+
+def set_base_url_overrides(overrides):
+    """
+    覆寫來源的 base_url（例如 {'roic': 'http://127.0.0.1:8765'}）；傳入空 dict 還原
+    """
+    _BASE_URL_OVERRIDES.clear()
+    _BASE_URL_OVERRIDES.update(overrides or {})
+
+
+def concurrency_limits(source):
+    """來源的並發範圍 {'min', 'max'}（未設定時使用預設值）"""
+    return CONCURRENCY_LIMITS.get(source, DEFAULT_CONCURRENCY_LIMITS)
+
+
+def retry_delays(source):
+    """來源的重試退避 {'base', 'max'}（秒，未設定時使用預設值）"""
+    return RETRY_DELAYS.get(source, DEFAULT_RETRY_DELAYS)
+
+
+def navigation_rate(host):
+    """主機的導覽節流 {'rate', 'burst'}（未設定時使用預設值，例如 benchmarks 的本機替身網站）"""
+    return NAVIGATION_RATES.get(host, DEFAULT_NAVIGATION_RATE)
+
+
+def source_host(source):
+    """來源的主機名稱（斷路器以主機為單位，TradingView 財報頁與 Beta 頁分屬不同主機）"""
+    base_url = _BASE_URL_OVERRIDES.get(source) or get_source_profile(source)['base_url']
+    return urlparse(base_url).netloc
+
+
+def ticker_budget_seconds(source):
+    """來源的單支股票時間預算（秒，None 表示不限制）"""
+    return TICKER_BUDGETS.get(source)
+
+
+def source_url(source, path):
+    """來源網址：base_url（或覆寫值）+ path"""
+    base_url = _BASE_URL_OVERRIDES.get(source) or get_source_profile(source)['base_url']
+    return base_url.rstrip('/') + path
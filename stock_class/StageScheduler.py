@@ -0,0 +1,226 @@
+import asyncio
+import time
+
+from stock_class.Deadline import Deadline, DeadlineExceeded, deadline_scope
+
+
+# async_analysis 使用的資源上限：
+# - headful：有頭瀏覽器階段（SeekingAlpha / TradingView / Beta）需要使用者處理驗證，一次只跑一個
+# - headless：無頭瀏覽器階段，每個階段內部已有 max_concurrent 個頁面
+# - schwab：Schwab API 階段共用同一組速率限制
+# - option_workbook：以 xlwings 寫入選擇權模板的階段各自啟動 Excel，一次只開一個
+ANALYSIS_RESOURCE_LIMITS = {'headful': 1, 'headless': 2, 'schwab': 1, 'option_workbook': 1}
+
+FINISHED = ('done', 'failed', 'skipped', 'timeout')
+UNSUCCESSFUL = ('failed', 'skipped', 'timeout')
+
+
+class Stage:
+    """排程中的單一階段"""
+
+    def __init__(self, name, func, deps=(), resources=(), label=None, after=(), budget=None, finalize=False):
+        self.name = name
+        self.func = func  # 無參數的 coroutine function
+        self.deps = tuple(deps)  # 必須成功完成的前置階段
+        self.after = tuple(after)  # 只需結束（成功或失敗皆可）的前置階段
+        self.resources = tuple(sorted(resources))  # 🔥 固定順序取得資源，避免互相等待
+        self.label = label or name
+        self.budget = budget  # 本階段的時間預算（秒），None 表示只受整體預算限制
+        self.finalize = finalize  # 收尾階段（保存 Excel）：不受整體預算限制，逾時後仍要保存已完成的數據
+
+        self.status = 'pending'  # pending / queued / running / done / failed / skipped / timeout
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class StageScheduler:
+    """
+    依相依關係（DAG）執行各階段
+
+    🔥 取代 async_analysis 中「一個接一個」的流程：
+    - 相依的階段完成後立即啟動，互不相依的階段同時執行
+    - 每個階段宣告使用的資源（例如 headful 瀏覽器、Schwab API），
+      資源上限由 limits 控制（例如有頭瀏覽器同時只跑一個階段，CAPTCHA 才不會互相搶視窗）
+    - 階段失敗時，依賴它（deps）的階段標記為 skipped，其他分支照常執行；
+      after 只等待前置階段結束，例如「保存 Excel」在部分階段失敗時仍要保存已寫入的數據
+    - 使用者停止（CancelledError）時取消所有執行中的階段並往上拋出
+    - 時間預算：整體（run(budget=...)）與各階段（add(budget=...)）；超過時取消該階段並標記為 timeout，
+      已寫入的結果保留（部分完成），依賴它的階段略過；finalize 的收尾階段不受整體預算限制
+
+    使用範例：
+        scheduler = StageScheduler(limits={'headful': 1, 'schwab': 1})
+        scheduler.add('init', manager.initialize_excel_files)
+        scheduler.add('roic', manager.process_roic_bundle, deps=['init'], resources=['headless'])
+        await scheduler.run(budget=1800)
+    """
+
+    def __init__(self, limits=None, log=print, on_stage_start=None, on_stage_done=None):
+        """
+        Args:
+            limits: {資源名稱: 同時執行的階段上限}；未列出的資源不限制
+            log: 日誌函式
+            on_stage_start / on_stage_done: 階段開始 / 結束時的回呼，參數為 Stage
+        """
+        self.limits = dict(limits or {})
+        self.log = log
+        self.on_stage_start = on_stage_start
+        self.on_stage_done = on_stage_done
+
+        self.stages = {}
+        self._semaphores = {}
+        self.deadline = None
+
+    def add(self, name, func, deps=(), resources=(), label=None, after=(), budget=None, finalize=False):
+        if name in self.stages:
+            raise ValueError(f"重複的階段名稱: {name}")
+        for dep in tuple(deps) + tuple(after):
+            if dep not in self.stages:
+                raise ValueError(f"階段 {name} 依賴未定義的階段: {dep}")
+        self.stages[name] = Stage(name, func, deps, resources, label, after, budget, finalize)
+        return self.stages[name]
+
+    def __len__(self):
+        return len(self.stages)
+
+    def _semaphore(self, resource):
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(self.limits.get(resource, 1_000_000))
+        return self._semaphores[resource]
+
+    async def _run_stage(self, stage):
+        # 依序取得資源（名稱排序，避免兩個階段各持有一個資源互相等待）
+        acquired = []
+        try:
+            for resource in stage.resources:
+                await self._semaphore(resource).acquire()
+                acquired.append(resource)
+
+            stage.status = 'running'
+            stage.started_at = time.time()
+            if self.on_stage_start:
+                self.on_stage_start(stage)
+
+            # 🔥 階段預算不晚於整體預算；到期時取消階段內所有工作（已逐支寫入的結果不受影響）
+            parent = None if stage.finalize else self.deadline
+            async with deadline_scope(stage.budget, label=f"階段「{stage.label}」", parent=parent):
+                stage.result = await stage.func()
+            stage.status = 'done'
+        except DeadlineExceeded as e:
+            stage.status = 'timeout'
+            stage.error = e
+            self.log(f"⌛ {e}，已取消（已完成的部分照常保留）")
+        except asyncio.CancelledError:
+            stage.status = 'failed'
+            stage.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            stage.status = 'failed'
+            stage.error = e
+            self.log(f"❌ 階段「{stage.label}」失敗：{e}")
+        finally:
+            stage.finished_at = time.time()
+            for resource in reversed(acquired):
+                self._semaphore(resource).release()
+
+        if self.on_stage_done:
+            self.on_stage_done(stage)
+
+    def _skip_dependents(self):
+        """依賴失敗 / 略過階段的階段一律略過"""
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.status != 'pending':
+                    continue
+                if any(self.stages[dep].status in UNSUCCESSFUL for dep in stage.deps):
+                    stage.status = 'skipped'
+                    self.log(f"⏭️  階段「{stage.label}」因前置階段失敗而略過")
+                    if self.on_stage_done:
+                        self.on_stage_done(stage)
+                    changed = True
+
+    def _ready(self):
+        return [
+            stage for stage in self.stages.values()
+            if stage.status == 'pending'
+            and all(self.stages[dep].status == 'done' for dep in stage.deps)
+            and all(self.stages[dep].status in FINISHED for dep in stage.after)
+        ]
+
+    async def run(self, budget=None):
+        """
+        執行所有階段
+
+        Args:
+            budget: 整體時間預算（秒），None 表示不限制
+
+        Returns:
+            dict: {階段名稱: Stage}
+        """
+        start = time.time()
+        self.deadline = Deadline(budget, label='整體分析') if budget is not None else None
+        running = {}
+
+        try:
+            while True:
+                self._skip_dependents()
+                for stage in self._ready():
+                    stage.status = 'queued'
+                    running[asyncio.ensure_future(self._run_stage(stage))] = stage
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.pop(task)
+                    task.result()  # 🔥 CancelledError 往上拋出
+        except BaseException:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+        self._log_timing(time.time() - start)
+        return self.stages
+
+    def critical_path(self):
+        """耗時最長的相依鏈（秒, [階段名稱]）"""
+        memo = {}
+
+        def longest(name):
+            if name not in memo:
+                stage = self.stages[name]
+                best = max((longest(dep) for dep in stage.deps + stage.after),
+                           key=lambda x: x[0], default=(0.0, []))
+                memo[name] = (best[0] + stage.duration, best[1] + [name])
+            return memo[name]
+
+        return max((longest(name) for name in self.stages), key=lambda x: x[0], default=(0.0, []))
+
+    def _log_timing(self, wall_clock):
+        total = sum(stage.duration for stage in self.stages.values())
+        path_time, path = self.critical_path()
+
+        self.log(f"⏱️  階段排程：實際耗時 {wall_clock:.1f} 秒（各階段合計 {total:.1f} 秒，"
+                 f"最長路徑 {path_time:.1f} 秒）")
+        if path:
+            self.log(f"   最長路徑：{' → '.join(self.stages[name].label for name in path)}")
+
+    def failed(self):
+        """失敗的階段"""
+        return [stage for stage in self.stages.values() if stage.status == 'failed']
+
+    def timed_out(self):
+        """超過時間預算而取消的階段（部分完成）"""
+        return [stage for stage in self.stages.values() if stage.status == 'timeout']
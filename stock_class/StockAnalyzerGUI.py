@@ -29,10 +29,30 @@ from stock_class.StockScraper import StockScraper
 from stock_class.StockProcess import StockProcess
 from stock_class.StockManager import StockManager
 from stock_class.StockValidator import StockValidator
+from stock_class.BrowserSessionManager import BrowserSessionManager
+from stock_class.HarArchive import HarArchive
+from stock_class.JobQueue import SqliteJobQueue
+from stock_class.ScrapeCoordinator import ScrapeCoordinator
+from stock_class.ShardedRunner import ShardedRunner
+from stock_class.SnapshotCache import SnapshotCache
+from stock_class.StageScheduler import ANALYSIS_RESOURCE_LIMITS, StageScheduler
 from utils import get_resource_path
 # ====== GUI 部分 ======
 class StockAnalyzerGUI:
-    def __init__(self, config=None):
+    def __init__(self, config=None, max_age=None, force_refresh=False, har_mode=None, har_dir=None, shards=None,
+                 job_queue=None, local_workers=0, run_budget=None, stage_budget=None):
+        """
+        Args:
+            max_age: 快照有效期限（小時），覆寫各來源的預設值
+            force_refresh: 忽略既有快照，全部重新抓取
+            har_mode: 'record' 錄製所有回應 / 'replay' 以錄製檔離線回放；None 為正常連網
+            har_dir: HAR 錄製檔資料夾
+            shards: 無頭來源分成幾個程序抓取（None / 1 為單一程序；HAR 模式下不分片）
+            job_queue: JobQueue 的 SQLite 檔案；提供時無頭來源交給 ScrapeWorker 抓取（優先於 shards）
+            local_workers: 分散式模式下在本機啟動的 worker 數
+            run_budget: 每次分析的時間預算（秒，含驗證）；超過時取消未完成的階段，已完成的數據照常保存
+            stage_budget: 每個抓取階段的時間預算（秒）
+        """
         self.root = tk.Tk()
         self.root.title("財報數據自動化程式 v3.0")
         self.root.geometry("1400x1000")
@@ -67,6 +87,27 @@ class StockAnalyzerGUI:
         self.current_manager = None
         self.cleanup_lock = threading.Lock()  # 防止重複清理
 
+        # 🔥 新增：整個 GUI 工作階段共用的瀏覽器會話（分析之間保持暖機）
+        self.browser_session = BrowserSessionManager()
+        self.warm_loop = None  # 瀏覽器會話所綁定、保留到下一次分析的事件循環
+
+        # 🔥 新增：抓取結果快照（同一天重跑時直接使用，不重新爬取）
+        self.snapshot_cache = SnapshotCache(max_age=max_age, force_refresh=force_refresh)
+
+        # 🔥 新增：HAR 錄製 / 離線回放（重現慢的執行、效能回歸測試）
+        self.har_archive = HarArchive(har_dir, mode=har_mode) if har_mode else None
+
+        # 🔥 新增：大量股票時，無頭來源分成多個程序（各自的事件循環與 Chromium）抓取
+        self.shards = shards if shards and shards > 1 and self.har_archive is None else None
+
+        # 🔥 新增：分散式模式（多個 worker 程序 / 機器共用 JobQueue），GUI 只負責組出 workbook
+        self.job_queue = job_queue if self.har_archive is None else None
+        self.local_workers = local_workers
+
+        # 🔥 新增：時間預算（None 表示不限制；單支股票的預算見 SourceProfiles.TICKER_BUDGETS）
+        self.run_budget = run_budget
+        self.stage_budget = stage_budget
+
         self.setup_ui()
 
         # 用於追蹤當前運行的任務和線程
@@ -106,11 +147,31 @@ class StockAnalyzerGUI:
                 import time
                 time.sleep(3)  # 增加到 3 秒
 
+                self._shutdown_warm_session()
                 self.root.destroy()
         else:
-            # 沒有運行，直接關閉
+            # 沒有運行，關閉暖機中的瀏覽器後直接關閉
+            self._shutdown_warm_session()
             self.root.destroy()
 
+    def _shutdown_warm_session(self):
+        """關閉分析之間保持暖機的瀏覽器會話與事件循環"""
+        loop = self.warm_loop
+        self.warm_loop = None
+
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            if not loop.is_running():
+                loop.run_until_complete(
+                    asyncio.wait_for(self.browser_session.shutdown(), timeout=8.0)
+                )
+                loop.close()
+                print("✓ 暖機中的瀏覽器會話已關閉")
+        except Exception as e:
+            print(f"⚠️ 關閉暖機瀏覽器會話時發生錯誤: {e}")
+
     def setup_custom_styles(self):
         """設定現代化樣式 - 統一字體配置"""
 
@@ -993,24 +1054,32 @@ class StockAnalyzerGUI:
 
     def run_analysis(self, stocks):
         """執行分析的主函數"""
+        keep_warm = False
+
         try:
-            # 🔥 確保舊的事件循環完全關閉
-            try:
-                old_loop = asyncio.get_event_loop()
-                if old_loop and not old_loop.is_closed():
-                    old_loop.close()
-            except RuntimeError:
-                pass
-
-            # 🔥 創建全新的事件循環
-            self.event_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.event_loop)
-            print("✓ 新的事件循環已創建並設定")
+            # 🔥 若上一次分析留下暖機中的瀏覽器，沿用同一個事件循環（Playwright 綁定在其上）
+            warm_loop, self.warm_loop = self.warm_loop, None
+
+            if warm_loop and not warm_loop.is_closed() and self.browser_session.is_warm(warm_loop):
+                self.event_loop = warm_loop
+                asyncio.set_event_loop(self.event_loop)
+                print("♻️ 沿用暖機中的事件循環與瀏覽器")
+            else:
+                if warm_loop and not warm_loop.is_closed():
+                    warm_loop.close()
+
+                # 🔥 創建全新的事件循環
+                self.event_loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self.event_loop)
+                print("✓ 新的事件循環已創建並設定")
 
             # 執行異步分析
             self.current_task = self.event_loop.create_task(self.async_analysis(stocks))
             self.event_loop.run_until_complete(self.current_task)
 
+            # 🔥 正常完成：保留瀏覽器會話給下一次分析
+            keep_warm = self.is_running and self.browser_session.is_warm(self.event_loop)
+
         except asyncio.CancelledError:
             self.log("🛑 異步任務已被成功取消")
 
@@ -1036,8 +1105,10 @@ class StockAnalyzerGUI:
                 try:
                     # Step 1: 取消所有待處理任務
                     if not self.event_loop.is_closed():
+                        # 🔥 Playwright 的內部任務交給瀏覽器會話自行處理，不在這裡取消
+                        protected = self.browser_session.protected_tasks
                         pending = [task for task in asyncio.all_tasks(self.event_loop)
-                                   if not task.done()]
+                                   if not task.done() and task not in protected]
 
                         if pending:
                             print(f"🧹 取消 {len(pending)} 個待處理任務...")
@@ -1061,24 +1132,36 @@ class StockAnalyzerGUI:
                             except Exception as e:
                                 print(f"⚠️ 等待任務取消時發生錯誤: {e}")
 
-                    # 🔥 Step 2: 額外等待，確保 Playwright 子進程完全結束
-                    print("🧹 等待 Playwright 子進程完全結束...")
-                    import time
-                    time.sleep(1.5)  # 🔥 給 1.5 秒讓子進程清理
-                    print("✓ Playwright 子進程已結束")
+                    if keep_warm and not self.event_loop.is_closed():
+                        # 🔥 保留事件循環與瀏覽器，下一次分析直接沿用
+                        self.warm_loop = self.event_loop
+                        print("♻️ 瀏覽器會話保持暖機，等待下一次分析")
+                    else:
+                        # 🔥 Step 2: 關閉瀏覽器會話，確保 Playwright 子進程完全結束
+                        print("🧹 等待 Playwright 子進程完全結束...")
+                        if not self.event_loop.is_closed() and not self.event_loop.is_running():
+                            try:
+                                self.event_loop.run_until_complete(
+                                    asyncio.wait_for(self.browser_session.shutdown(), timeout=8.0)
+                                )
+                            except Exception as e:
+                                print(f"⚠️ 關閉瀏覽器會話時發生錯誤: {e}")
+                        import time
+                        time.sleep(0.5)
+                        print("✓ Playwright 子進程已結束")
 
-                    # Step 3: 停止事件循環
-                    if self.event_loop.is_running():
-                        self.event_loop.stop()
+                        # Step 3: 停止事件循環
+                        if self.event_loop.is_running():
+                            self.event_loop.stop()
 
-                    # Step 4: 再等一下
-                    time.sleep(0.2)
+                        # Step 4: 再等一下
+                        time.sleep(0.2)
 
-                    # Step 5: 關閉事件循環
-                    if not self.event_loop.is_closed():
-                        self.event_loop.close()
+                        # Step 5: 關閉事件循環
+                        if not self.event_loop.is_closed():
+                            self.event_loop.close()
 
-                    print("✓ 事件循環已正確關閉")
+                        print("✓ 事件循環已正確關閉")
                 except Exception as e:
                     print(f"⚠️ 關閉事件循環時發生錯誤: {e}")
                 finally:
@@ -1091,6 +1174,21 @@ class StockAnalyzerGUI:
                 self.reset_progress()
                 self.is_running = False
 
+    async def prewarm_browser(self, sources, stock_count):
+        """
+        背景預熱：啟動無頭 Chromium 並建立各來源的 context 池，第一個抓取階段開始時瀏覽器已就緒
+
+        預熱失敗不影響分析（各階段借用瀏覽器時會自行啟動）
+        """
+        try:
+            await self.browser_session.use_har_archive(self.har_archive)
+            elapsed = await self.browser_session.prewarm(sources, initial=3, contexts=stock_count)
+            self.log(f"🔥 瀏覽器預熱完成（{elapsed:.1f} 秒，{', '.join(sources)}）")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log(f"⚠️ 瀏覽器預熱失敗，將於抓取時再啟動: {e}")
+
     async def async_analysis(self, stocks):
         """
         異步執行分析 - 改進版
@@ -1104,23 +1202,34 @@ class StockAnalyzerGUI:
         scraper = None
         processor = None
         manager = None
+        prewarm_task = None
 
         try:
             # 獲取選擇的模板
             do_stock_analysis = self.stock_analysis_var.get()
             do_option_analysis = self.option_analysis_var.get()
 
+            # 無頭瀏覽器的資料來源（依第一次使用的順序）
+            headless_sources = ['earningshub']
+            if do_stock_analysis:
+                headless_sources += ['roic', 'wacc']
+            if do_option_analysis:
+                headless_sources += ['barchart']
+
             # 計算總步驟數
             total_steps = 0
+            # 驗證 + 分類 2 步，其餘每個排程階段 1 步（建立排程後會重新計算）
             if do_stock_analysis and do_option_analysis:
-                total_steps = 16
+                total_steps = 17
             elif do_stock_analysis:
-                total_steps = 10
+                total_steps = 11
             elif do_option_analysis:
-                total_steps = 6
+                total_steps = 9
 
             current_step = 0
             start_time = time.time()
+            self.browser_session.reset_resource_stats()
+            self.snapshot_cache.reset_stats()
 
             # ===== 啟動訊息 =====
             self.log("🎯" + "=" * 80)
@@ -1140,6 +1249,11 @@ class StockAnalyzerGUI:
                     self.log("🛑 檢測到停止信號，正在中止操作...")
                     raise asyncio.CancelledError("使用者請求停止")
 
+            # ===== 🔥 瀏覽器預熱（背景執行，與驗證 / 分類的 Schwab、yfinance I/O 重疊）=====
+            # 分片 / 分散式模式下無頭來源在其他程序抓取，本程序不需要預熱
+            if not self.shards and not self.job_queue:
+                prewarm_task = asyncio.ensure_future(self.prewarm_browser(headless_sources, len(stocks)))
+
             # ===== 驗證階段 =====
 
             # 初始化 Schwab API
@@ -1153,7 +1267,9 @@ class StockAnalyzerGUI:
                 'non_us_stocks': []
             }
 
-            scraper = StockScraper(stocks=temp_stocks_dict, config=self.config, max_concurrent=3)
+            scraper = StockScraper(stocks=temp_stocks_dict, config=self.config, max_concurrent=3,
+                                   browser_session=self.browser_session, snapshot_cache=self.snapshot_cache,
+                                   har_archive=self.har_archive)
             self.current_scraper = scraper
 
             if not scraper.schwab_client:
@@ -1216,256 +1332,162 @@ class StockAnalyzerGUI:
             self.log(f"\n🎯 將處理 {len(valid_stocks)} 支股票")
             self.log("🎯" + "=" * 80)
 
-            # ===== 股票分析階段 =====
-            saved_stock_files = []
-
-            if do_stock_analysis:
-                check_if_stopped()
-                self.log("\n【第一階段：股票分析】")
-                self.log("=" * 80)
-
-                # 初始化系統
-                self.update_status("設定基本面模板分析系統")
-                self.log("🔧 設定系統中...")
-
-                scraper = StockScraper(stocks=stocks_dict, config=self.config, max_concurrent=3)
-                processor = StockProcess(max_concurrent=2)
-                manager = StockManager(scraper=scraper, processor=processor,
-                                       stocks=stocks_dict, validator=validator, max_concurrent=15)
-
-                self.current_scraper = scraper
-                self.current_manager = manager
-
-                self.log("✅ 系統設定完成")
-
-                # 初始化 Excel
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] 初始化 Excel")
-                self.log(f"\n📄 步驟 {current_step}/{total_steps}：初始化 Excel 檔案...")
-
-                success = await manager.initialize_excel_files()
-                if not success:
-                    self.log("❌ Excel 檔案初始化失敗")
-                    return
-                self.log("✅ Excel 檔案初始化完成")
-
-                # Summary 和關鍵指標
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] Summary 和關鍵指標")
-                self.log(f"\n📊 步驟 {current_step}/{total_steps}：抓取 Summary 和關鍵指標...")
-
-                await manager.process_combined_summary_and_metrics()
-                self.log("✅ Summary 和關鍵指標完成")
-
-                # 🔥 Financial（只跑美國公司）
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] Financial")
-                self.log(f"\n💰 步驟 {current_step}/{total_steps}：處理 Financial...")
-
-                if us_stocks:
-                    self.log(f"   抓取 {len(us_stocks)} 支美國公司的 Financial 數據")
-                    await manager.process_financial()
-                    self.log("✅ Financial 數據完成")
-
-                if non_us_stocks:
-                    self.log(f"   ⏭️  跳過 {len(non_us_stocks)} 支非美國公司（roic.ai 需付費）")
-
-                # 🔥 Ratios（只跑美國公司）
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] Ratios")
-                self.log(f"\n📈 步驟 {current_step}/{total_steps}：處理 Ratios...")
-
-                if us_stocks:
-                    self.log(f"   抓取 {len(us_stocks)} 支美國公司的 Ratios 數據")
-                    await manager.process_ratios()
-                    self.log("✅ Ratios 數據完成")
-
-                if non_us_stocks:
-                    self.log(f"   ⏭️  跳過 {len(non_us_stocks)} 支非美國公司（roic.ai 需付費）")
-
-                # 其他數據（所有股票）
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] 其他數據")
-                self.log(f"\n📋 步驟 {current_step}/{total_steps}：抓取其他數據...")
-
-                await manager.process_others_data()
-                self.log("✅ 其他數據完成")
-
-                # Revenue Growth 和 WACC
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] Revenue Growth & WACC")
-                self.log(f"\n📈 步驟 {current_step}/{total_steps}：處理 Revenue Growth 和 WACC...")
+            # ===== 🔥 建立階段排程（DAG）=====
+            # 互不相依的階段同時執行：Schwab API 階段與瀏覽器階段並行、兩個模板的流程並行，
+            # 有頭瀏覽器（需要人工處理驗證）與 Schwab API 各自一次只跑一個階段
+            check_if_stopped()
+            self.update_status("設定分析系統")
+            self.log("\n🔧 設定系統中...")
+
+            if prewarm_task is not None:
+                await prewarm_task
+
+            scraper = StockScraper(stocks=stocks_dict, config=self.config, max_concurrent=3,
+                                   browser_session=self.browser_session, snapshot_cache=self.snapshot_cache,
+                                   har_archive=self.har_archive)
+            processor = StockProcess(max_concurrent=2)
+            sharded_runner = None
+            if self.job_queue:
+                sharded_runner = ScrapeCoordinator(SqliteJobQueue(self.job_queue), local_workers=self.local_workers)
+                shard_label = f"分散式抓取（本機 {self.local_workers} 個 worker）"
+            elif self.shards:
+                sharded_runner = ShardedRunner(shards=self.shards, max_concurrent=3, config=self.config,
+                                               snapshot_cache=self.snapshot_cache)
+                shard_label = f"分片抓取（{self.shards} 個程序）"
+            manager = StockManager(scraper=scraper, processor=processor,
+                                   stocks=stocks_dict, validator=validator, max_concurrent=15,
+                                   sharded_runner=sharded_runner)
 
-                await manager.process_seekingalpha()
-                await manager.process_wacc()
-                self.log("✅ Revenue Growth 和 WACC 完成")
+            self.current_scraper = scraper
+            self.current_manager = manager
 
-                # TradingView
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] TradingView")
-                self.log(f"\n📈 步驟 {current_step}/{total_steps}：處理 TradingView...")
+            self.log("✅ 系統設定完成")
 
-                await manager.process_TradingView()
-                self.log("✅ TradingView 完成")
+            output_folder = self.output_folder_var.get()
+            saved_stock_files = []
+            saved_option_files = []
 
-                # 🔥 修復：財報日期處理（在保存檔案前完成寫入）
-                check_if_stopped()
-                current_step += 1
+            def stage_step(func):
+                """每個階段開始前檢查停止信號"""
+                async def run_stage():
+                    check_if_stopped()
+                    return await func()
+                return run_stage
 
-                if do_option_analysis:
-                    # 🎯 情況1：兩個模板都選 → 抓取並立即寫入 Fundamental（稍後再寫入 Option）
-                    self.update_progress(current_step, total_steps, "[股票] 抓取並寫入財報日期")
-                    self.log(f"\n📅 步驟 {current_step}/{total_steps}：處理財報日期...")
-
-                    # 抓取
-                    await manager.fetch_earnings_dates()
-                    # 立即寫入 Fundamental（確保保存檔案前有數據）
-                    await manager.write_earnings_to_fundamental()
-                    self.log("✅ 財報日期已寫入 Fundamental 模板（稍後也會寫入 Option 模板）")
-
-                else:
-                    # 🎯 情況2：只選股票分析 → 抓取並立即寫入 Fundamental
-                    self.update_progress(current_step, total_steps, "[股票] 財報日期")
-                    self.log(f"\n📅 步驟 {current_step}/{total_steps}：處理財報日期...")
-
-                    # 抓取
-                    await manager.fetch_earnings_dates()
-                    # 寫入 Fundamental
-                    await manager.write_earnings_to_fundamental()
-                    self.log("✅ 財報日期完成")
-
-                # 保存檔案
-                check_if_stopped()
-                current_step += 1
-                self.update_progress(current_step, total_steps, "[股票] 保存 Excel")
-                self.log(f"\n💾 步驟 {current_step}/{total_steps}：保存 Excel...")
+            async def init_fundamental():
+                if not await manager.initialize_excel_files():
+                    raise RuntimeError("Excel 檔案初始化失敗")
 
-                output_folder = self.output_folder_var.get()
+            async def save_fundamental():
+                nonlocal saved_stock_files
                 saved_stock_files = manager.save_all_excel_files(output_folder)
                 self.log(f"✅ 已保存 {len(saved_stock_files)} 個股票分析檔案")
-                self.log("=" * 80)
-
-            # ===== 選擇權分析階段（保持不變）=====
-            saved_option_files = []
-            if do_option_analysis:
-                check_if_stopped()
-                self.log("\n【第二階段:選擇權分析】")
-                self.log("🎯" + "=" * 80)
-
-                # 如果股票分析沒執行,需要創建 manager
-                if not do_stock_analysis:
-                    self.update_status("設定選擇權分析系統")
-                    self.log("🔧 正在設定選擇權分析系統...")
 
-                    scraper = StockScraper(stocks=stocks_dict, config=self.config, max_concurrent=3)
-                    processor = StockProcess(max_concurrent=2)
-                    manager = StockManager(scraper=scraper, processor=processor,
-                                           stocks=stocks_dict, validator=validator, max_concurrent=15)
+            async def init_option():
+                if not await manager.initialize_option_excel_files():
+                    raise RuntimeError("選擇權 Excel 檔案設定失敗")
 
-                    # 🔥 保存引用
-                    self.current_scraper = scraper
-                    self.current_manager = manager
+            async def save_option():
+                nonlocal saved_option_files
+                saved_option_files = manager.save_all_option_excel_files(output_folder)
+                self.log(f"✅ 選擇權 Excel 檔案保存完成（{len(saved_option_files)} 個檔案）")
 
-                    self.log("✅ 選擇權系統設定完成")
+            def on_stage_start(stage):
+                self.update_status(stage.label)
+                self.log(f"\n▶️  開始：{stage.label}")
 
-                # 初始化選擇權 Excel
+            def on_stage_done(stage):
+                nonlocal current_step
                 current_step += 1
-                step_num = f"{current_step}/{total_steps}"
-                self.update_progress(current_step, total_steps, "[選擇權] 設定 Excel 檔案")
-                self.log(f"\n📄 步驟 {step_num}:[選擇權] 正在設定 Excel 檔案...")
-
-                try:
-                    success = await manager.initialize_option_excel_files()
-                    if not success:
-                        self.log("⚠️ 選擇權 Excel 檔案設定失敗")
-                        if do_stock_analysis:
-                            self.log("⚠️ 股票分析已完成,將跳過選擇權分析")
-                        else:
-                            self.log("❌ 選擇權分析失敗,停止")
-                            self.update_status("失敗:選擇權 Excel 初始化錯誤")
-                            return
-                    else:
-                        self.log("✅ 選擇權 Excel 檔案初始化完成")
-
-                        # 🔥 步驟 1: 批次抓取所有數據
-                        check_if_stopped()
-                        current_step += 1
-                        step_num = f"{current_step}/{total_steps}"
-                        self.update_progress(current_step, total_steps, "[選擇權] 批次抓取所有數據")
-                        self.log(f"\n📊 步驟 {step_num}:[選擇權] 正在批次抓取 Beta、Barchart 和 Option Chain...")
-
-                        # 依序抓取但不寫入
-                        await manager.process_beta()
-                        await manager.process_barchart_for_options()
-                        await manager.process_option_chains()
+                self.update_progress(current_step, total_steps, stage.label)
+                if stage.status == 'done':
+                    self.log(f"✅ {stage.label} 完成（{stage.duration:.1f} 秒）")
 
-                        self.log("✅ 所有選擇權數據抓取完成")
+            scheduler = StageScheduler(limits=ANALYSIS_RESOURCE_LIMITS, log=self.log,
+                                       on_stage_start=on_stage_start, on_stage_done=on_stage_done)
 
-                        # 🔥 修改：財報日期處理（智能判斷）
-                        check_if_stopped()
-                        current_step += 1
-                        step_num = f"{current_step}/{total_steps}"
+            # 🔥 分片 / 分散式模式：無頭來源先由多個程序一起抓完，之後的階段直接取用結果（失敗的股票照常回報失敗）
+            sharded = []
+            if sharded_runner is not None:
+                scheduler.add('shard_fetch', stage_step(lambda: manager.prefetch_sharded(headless_sources)),
+                              resources=['headless'], label=shard_label, budget=self.stage_budget)
+                sharded = ['shard_fetch']
 
-                        if do_stock_analysis:
-                            # 🎯 情況1：兩個模板都選 → Fundamental 已寫入，只需寫入 Option
-                            self.update_progress(current_step, total_steps, "[選擇權] 寫入財報日期")
-                            self.log(f"\n📅 步驟 {step_num}：將財報日期寫入 Option 模板...")
+            # 財報日期兩個模板共用，只抓一次
+            scheduler.add('earnings_fetch', stage_step(manager.fetch_earnings_dates),
+                          resources=['headless'], label="抓取財報日期", after=sharded, budget=self.stage_budget)
 
-                            # Fundamental 已在股票分析階段寫入，這裡只寫入 Option
-                            self.log("   ℹ️  Fundamental 模板已在股票分析階段寫入")
-
-                            # 寫入 Option
-                            self.log("   📄 寫入 Option 模板...")
-                            await manager.write_earnings_to_option()
-
-                            self.log("✅ 財報日期已寫入 Option 模板")
-
-                        else:
-                            # 🎯 情況2：只選選擇權 → 需要抓取並寫入 Option
-                            self.update_progress(current_step, total_steps, "[選擇權] 財報日期")
-                            self.log(f"\n📅 步驟 {step_num}：處理財報日期...")
-
-                            # 抓取
-                            await manager.fetch_earnings_dates()
-                            # 寫入 Option
-                            await manager.write_earnings_to_option()
-                            self.log("✅ 財報日期完成")
-
-                        # 🔥 步驟 2: 批次寫入 (實際上已在上面的方法中完成)
-                        check_if_stopped()
-                        current_step += 1
-                        step_num = f"{current_step}/{total_steps}"
-                        self.update_progress(current_step, total_steps, "[選擇權] 批次寫入 Excel")
-                        self.log(f"\n💾 步驟 {step_num}:[選擇權] 已完成批次寫入到 Excel")
-                        self.log("✅ 選擇權數據批次處理完成")
-
-                        # 保存選擇權檔案
-                        check_if_stopped()
-                        current_step += 1
-                        step_num = f"{current_step}/{total_steps}"
-                        self.update_progress(current_step, total_steps, "[選擇權] 保存 Excel 檔案")
-                        self.log(f"\n💾 步驟 {step_num}:[選擇權] 正在保存選擇權 Excel 檔案...")
-
-                        output_folder = self.output_folder_var.get()
-                        saved_option_files = manager.save_all_option_excel_files(output_folder)
-                        self.log(f"✅ 選擇權 Excel 檔案保存完成（{len(saved_option_files)} 個檔案）")
-
-                except Exception as e:
-                    self.log(f"⚠️ 選擇權分析過程發生錯誤: {e}")
-                    if do_stock_analysis:
-                        self.log("⚠️ 股票分析已完成,將繼續完成流程")
-                    else:
-                        self.log("❌ 選擇權分析失敗,停止")
-                        raise e
+            if do_stock_analysis:
+                if non_us_stocks:
+                    self.log(f"   ⏭️  {len(non_us_stocks)} 支非美國公司只抓 Summary（roic.ai Financial/Ratios 需付費）")
+
+                scheduler.add('init_fundamental', stage_step(init_fundamental), label="[股票] 初始化 Excel")
+                fundamental_writers = [
+                    # (名稱, 函式, 資源, 標籤)
+                    ('roic', manager.process_roic_bundle, ['headless'], "[股票] roic.ai 數據"),
+                    ('others', manager.process_others_data, ['schwab'], "[股票] 其他數據"),
+                    ('seekingalpha', manager.process_seekingalpha, ['headful'], "[股票] Revenue Growth"),
+                    ('wacc', manager.process_wacc, ['headless'], "[股票] WACC"),
+                    ('tradingview', manager.process_TradingView, ['headful'], "[股票] TradingView"),
+                ]
+                # 🔥 財報驅動的階段等財報日期抓完（成功或失敗皆可）再開始，才能判斷快照是否仍可沿用
+                earnings_driven = ('roic', 'seekingalpha')
+                for name, func, resources, label in fundamental_writers:
+                    scheduler.add(name, stage_step(func), deps=['init_fundamental'],
+                                  resources=resources, label=label, budget=self.stage_budget,
+                                  after=(['earnings_fetch'] if name in earnings_driven else []) + sharded)
+
+                scheduler.add('earnings_fundamental', stage_step(manager.write_earnings_to_fundamental),
+                              deps=['init_fundamental', 'earnings_fetch'], label="[股票] 寫入財報日期")
+
+                # 🔥 部分階段失敗時仍保存已寫入的數據
+                scheduler.add('save_fundamental', stage_step(save_fundamental), deps=['init_fundamental'],
+                              after=[name for name, *_ in fundamental_writers] + ['earnings_fundamental'],
+                              label="[股票] 保存 Excel", finalize=True)
 
-                self.log("🎯" + "=" * 80)
+            if do_option_analysis:
+                scheduler.add('init_option', stage_step(init_option), label="[選擇權] 設定 Excel 檔案")
+                option_fetchers = [
+                    ('beta', manager.fetch_beta, ['headful'], "[選擇權] Beta"),
+                    ('barchart', manager.fetch_barchart_for_options, ['headless'], "[選擇權] Barchart"),
+                    ('option_chains', manager.fetch_option_chains, ['schwab'], "[選擇權] Option Chain"),
+                ]
+                for name, func, resources, label in option_fetchers:
+                    scheduler.add(name, stage_step(func), deps=['init_option'], resources=resources, label=label,
+                                  after=sharded if name == 'barchart' else (), budget=self.stage_budget)
+
+                # 🔥 xlwings 寫入集中在 option_workbook 資源（一次一個 Excel），抓取階段只暫存數據
+                scheduler.add('write_option', stage_step(manager.write_option_data), deps=['init_option'],
+                              after=[name for name, *_ in option_fetchers], resources=['option_workbook'],
+                              label="[選擇權] 寫入數據", finalize=True)
+                scheduler.add('earnings_option', stage_step(manager.write_earnings_to_option),
+                              deps=['init_option', 'earnings_fetch'], resources=['option_workbook'],
+                              label="[選擇權] 寫入財報日期")
+                scheduler.add('save_option', stage_step(save_option), deps=['init_option'],
+                              after=['write_option', 'earnings_option'],
+                              label="[選擇權] 保存 Excel 檔案", finalize=True)
+
+            total_steps = current_step + len(scheduler)
+            self.log(f"\n🗺️  共 {len(scheduler)} 個階段，互不相依的階段將同時執行")
+
+            # 🔥 整體預算扣掉驗證階段已用的時間；保存 Excel 的階段不受限制
+            run_budget = None
+            if self.run_budget is not None:
+                run_budget = max(0.0, self.run_budget - (time.time() - start_time))
+                self.log(f"⌛ 時間預算：剩餘 {run_budget / 60:.1f} 分鐘")
+            await scheduler.run(budget=run_budget)
+
+            timed_out_stages = scheduler.timed_out()
+            if timed_out_stages:
+                self.log(f"⌛ {len(timed_out_stages)} 個階段超過時間預算（部分完成）："
+                         f"{', '.join(stage.label for stage in timed_out_stages)}")
+
+            # 🔥 沒有任何檔案保存成功時，視為整體失敗
+            failed_stages = scheduler.failed()
+            if failed_stages:
+                self.log(f"⚠️ {len(failed_stages)} 個階段失敗：{', '.join(stage.label for stage in failed_stages)}")
+                if not saved_stock_files and not saved_option_files:
+                    raise failed_stages[0].error
 
             # 完成
             self.update_progress(total_steps, total_steps, "完成！")
@@ -1494,6 +1516,14 @@ class StockAnalyzerGUI:
             if do_option_analysis:
                 self.log(f"   💾 選擇權檔案：{len(saved_option_files)} 個")
 
+            self.browser_session.log_resource_stats(self.log)
+            self.browser_session.log_limiter_stats(self.log)
+            self.browser_session.log_breaker_stats(self.log)
+            self.browser_session.log_pacing_stats(self.log)
+            self.browser_session.log_memory_stats(self.log)
+            self.browser_session.readiness.log_stats(self.log)
+            self.snapshot_cache.log_stats(self.log)
+
             self.log(f"📁 保存位置：{self.output_folder_var.get()}")
             self.log("🎉" + "=" * 80)
 
@@ -1532,6 +1562,11 @@ class StockAnalyzerGUI:
             # 🔥 優雅地清理資源
             self.log("🧹 開始最終清理...")
 
+            # 提前結束（沒有有效股票 / 使用者停止）時，預熱仍在進行就取消
+            if prewarm_task is not None and not prewarm_task.done():
+                prewarm_task.cancel()
+                await asyncio.gather(prewarm_task, return_exceptions=True)
+
             cleanup_tasks = []
 
             # 清理 Scraper
@@ -1,13 +1,14 @@
 import asyncio
 import os
 from stock_class.RareLimitManager import RateLimitManager
+from stock_class.ResultItems import item_stock
 import shutil
 import tempfile
 import sys
 
 
 class StockManager:
-    def __init__(self, scraper, processor, stocks, validator=None, max_concurrent=3, delay=1):
+    def __init__(self, scraper, processor, stocks, validator=None, max_concurrent=3, delay=1, sharded_runner=None):
         """
         初始化 StockManager
 
@@ -19,6 +20,7 @@ class StockManager:
                 'us_stocks': [...],          # 美國公司（可跑 financial/ratios）
                 'non_us_stocks': [...]       # 非美國公司（全跳過 financial/ratios）
             }
+            sharded_runner: ShardedRunner；提供時 prefetch_sharded() 以多程序抓取無頭來源
         """
         self.scraper = scraper
         self.processor = processor
@@ -36,6 +38,7 @@ class StockManager:
         # 修改：分別管理兩種模板的Excel檔案
         self.fundamental_excel_files = {}
         self.option_excel_files = {}
+        self.option_stock_data = {}  # 🔥 {stock: {'beta': ..., 'barchart': ..., 'option_chain': df}}，等待 write_option_data 寫入
 
         self.max_concurrent = max_concurrent
 
@@ -45,6 +48,13 @@ class StockManager:
 
         self.cached_earnings_data = None  # 緩存財報日期數據
 
+        # 🔥 多程序分片抓取的結果 {來源: [run_* 結果]}；各階段取用一次後移除，沒有時照常由 scraper 抓取
+        self.sharded_runner = sharded_runner
+        self.sharded_results = {}
+
+        # 🔥 每支股票一把 workbook 鎖：階段並行時，避免「讀取 base64 → await → 寫回」之間被其他階段覆蓋
+        self._workbook_locks = {}
+
         # 使用共享的速率限制管理器
         if hasattr(processor, 'rate_limiter'):
             self.rate_limiter = processor.rate_limiter
@@ -70,6 +80,80 @@ class StockManager:
             self.processor.schwab_client = self.scraper.schwab_client
             print(f"✓ 已傳遞 Schwab Client 給 StockProcess")
 
+    def _workbook_lock(self, stock):
+        if stock not in self._workbook_locks:
+            self._workbook_locks[stock] = asyncio.Lock()
+        return self._workbook_locks[stock]
+
+    async def _update_fundamental(self, stock, writer, *args):
+        """
+        在鎖內完成一次 Fundamental workbook 的讀取 → 寫入 → 存回
+
+        Args:
+            writer: StockProcess 的 async 寫入方法，最後一個參數為 excel_base64，回傳 (modified_base64, message)；
+                    modified_base64 為 None 時保留原本的 workbook
+        """
+        async with self._workbook_lock(stock):
+            modified_base64, message = await writer(*args, self.fundamental_excel_files[stock])
+            if modified_base64:
+                self.fundamental_excel_files[stock] = modified_base64
+        return message
+
+    async def _write_fundamental(self, stock, writer, **kwargs):
+        """
+        同步的 write_*_to_excel（關鍵字參數 excel_base64）同樣經過 _update_fundamental 的鎖
+
+        🔥 others_data 在鎖內等待 Schwab API 時，WACC / SeekingAlpha / TradingView / 財報日期的寫入會排隊，
+           不會在它寫回時被覆蓋
+
+        Returns:
+            (bool, str): 是否寫入成功與訊息
+        """
+        written = []
+
+        async def adapter(excel_base64):
+            modified_base64, message = writer(excel_base64=excel_base64, **kwargs)
+            written.append(bool(modified_base64))
+            return modified_base64, message
+
+        message = await self._update_fundamental(stock, adapter)
+        return written[0], message
+
+    async def prefetch_sharded(self, sources):
+        """
+        以 ShardedRunner 分片抓取無頭來源，結果交給之後的 process_* / fetch_* 階段
+
+        Args:
+            sources: SHARD_SOURCES 中的來源（earningshub / roic / wacc / barchart）
+        """
+        if self.sharded_runner is None or not sources:
+            return
+
+        stocks_dict = {
+            'final_stocks': self.stocks,
+            'us_stocks': self.us_stocks,
+            'non_us_stocks': self.non_us_stocks,
+        }
+        self.sharded_results = await self.sharded_runner.run(stocks_dict, sources)
+
+    async def _stream_results(self, source, stream):
+        """分片預先抓好的結果（依股票順序），沒有時改用 scraper 的串流"""
+        results = self.sharded_results.pop(source, None)
+        if results is None:
+            async for stock, item in stream():
+                yield stock, item
+            return
+
+        for item in results:
+            yield item_stock(item), item
+
+    async def _run_results(self, source, run):
+        """分片預先抓好的結果，沒有時呼叫 scraper 的 run_*"""
+        results = self.sharded_results.pop(source, None)
+        if results is None:
+            results = await run()
+        return results
+
     def _get_option_template_path(self):
         """取得選擇權模板路徑"""
         if getattr(sys, 'frozen', False):
@@ -144,15 +228,12 @@ class StockManager:
 
         print(f"\n🔄 開始處理 Financial 數據（僅 {len(self.us_stocks)} 支美國公司）...")
 
-        # 🔥 只跑美國公司
-        raw_df_financial = await self.scraper.run_financial()
-
-        for index, stock in enumerate(self.us_stocks):
+        # 🔥 只跑美國公司；每完成一支立即寫入
+        async for stock, raw_df_financial in self.scraper.stream_financial():
             if stock in self.fundamental_excel_files:
-                modified_base64, message = await self.processor.process_df_financial(
-                    raw_df_financial[index], stock, self.fundamental_excel_files[stock]
+                message = await self._update_fundamental(
+                    stock, self.processor.process_df_financial, raw_df_financial, stock
                 )
-                self.fundamental_excel_files[stock] = modified_base64
                 print(f"✅ {message}")
 
         # 🔥 非美國公司：清空 Financial 區域
@@ -161,10 +242,9 @@ class StockManager:
             for stock in self.non_us_stocks:
                 if stock in self.fundamental_excel_files:
                     # print('stock:',stock)
-                    modified_base64, message = await self.processor.process_df_financial(
-                        None, stock, self.fundamental_excel_files[stock]
+                    message = await self._update_fundamental(
+                        stock, self.processor.process_df_financial, None, stock
                     )
-                    self.fundamental_excel_files[stock] = modified_base64
                     print(f"✅ {message}")
 
     async def process_ratios(self):
@@ -179,15 +259,12 @@ class StockManager:
 
         print(f"\n🔄 開始處理 Ratios 數據（僅 {len(self.us_stocks)} 支美國公司）...")
 
-        # 🔥 只跑美國公司
-        raw_df_ratios = await self.scraper.run_ratios()
-
-        for index, stock in enumerate(self.us_stocks):
+        # 🔥 只跑美國公司；每完成一支立即寫入
+        async for stock, raw_df_ratios in self.scraper.stream_ratios():
             if stock in self.fundamental_excel_files:
-                modified_base64, message = await self.processor.process_df_ratios(
-                    raw_df_ratios[index], stock, self.fundamental_excel_files[stock]
+                message = await self._update_fundamental(
+                    stock, self.processor.process_df_ratios, raw_df_ratios, stock
                 )
-                self.fundamental_excel_files[stock] = modified_base64
                 print(f"✅ {message}")
 
         # 🔥 非美國公司：清空 Ratios 區域
@@ -195,10 +272,9 @@ class StockManager:
             print(f"\n⚠️  正在清空 {len(self.non_us_stocks)} 支非美國公司的 Ratios 區域...")
             for stock in self.non_us_stocks:
                 if stock in self.fundamental_excel_files:
-                    modified_base64, message = await self.processor.process_df_ratios(
-                        None, stock, self.fundamental_excel_files[stock]
+                    message = await self._update_fundamental(
+                        stock, self.processor.process_df_ratios, None, stock
                     )
-                    self.fundamental_excel_files[stock] = modified_base64
                     print(f"✅ {message}")
 
     async def process_others_data(self):
@@ -211,10 +287,9 @@ class StockManager:
 
         for stock in self.stocks:
             if stock in self.fundamental_excel_files:
-                modified_base64, message = await self.processor.others_data(
-                    stock, self.fundamental_excel_files[stock]
+                message = await self._update_fundamental(
+                    stock, self.processor.others_data, stock
                 )
-                self.fundamental_excel_files[stock] = modified_base64
                 print(f"✅ {message}")
 
     async def process_combined_summary_and_metrics(self):
@@ -225,41 +300,89 @@ class StockManager:
         """
         print(f"\n🔄 開始處理 Summary 和指標數據（{len(self.stocks)} 支股票）...")
 
-        summary_results, metrics_results = await self.scraper.run_combined_summary_and_metrics()
+        # 🔥 每完成一支立即寫入
+        async for stock, item in self.scraper.stream_combined_summary_and_metrics():
+            if stock not in self.fundamental_excel_files:
+                continue
 
-        for index, stock in enumerate(self.stocks):
-            if stock in self.fundamental_excel_files and index < len(summary_results):
-                modified_base64, message = await self.processor.process_df_summary(
-                    summary_results[index][stock], stock, self.fundamental_excel_files[stock]
-                )
-                self.fundamental_excel_files[stock] = modified_base64
-                print(f"✅ {message}")
+            data = item.get(stock)
+            if data is None:
+                print(f"❌ {stock} 的 Summary 和指標數據抓取失敗: {item.get('error')}")
+                continue
 
-        for index, stock in enumerate(self.stocks):
-            if stock in self.fundamental_excel_files and index < len(metrics_results):
-                modified_base64, message = await self.processor.EPS_PE_MarketCap_data_write_to_excel(
-                    {stock: [metrics_results[index][stock]]}, stock, self.fundamental_excel_files[stock]
-                )
-                self.fundamental_excel_files[stock] = modified_base64
-                print(f"✅ {message}")
+            message = await self._update_fundamental(
+                stock, self.processor.process_df_summary, data['summary'], stock
+            )
+            print(f"✅ {message}")
+
+            message = await self._update_fundamental(
+                stock, self.processor.EPS_PE_MarketCap_data_write_to_excel, {stock: [data['metrics']]}, stock
+            )
+            print(f"✅ {message}")
+
+    async def process_roic_bundle(self):
+        """
+        處理 roic.ai 打包數據（Summary + 指標 + Financial + Ratios）
+
+        🔥 每支股票只借用一個 context 依序訪問三個頁面，取代原本三個獨立階段
+        🔥 非美國公司：只寫入 Summary / 指標，並清空 Financial / Ratios 區域
+        🔥 逐支寫入：一支股票抓完立即寫入 workbook，不等全部股票完成
+        """
+        print(f"\n🔄 開始處理 roic.ai 打包數據（{len(self.stocks)} 支股票，"
+              f"其中 {len(self.us_stocks)} 支美國公司含 Financial / Ratios）...")
+
+        async for stock, item in self._stream_results('roic', self.scraper.stream_roic_bundle):
+            if stock not in self.fundamental_excel_files:
+                continue
+
+            bundle = item.get(stock)
+            if bundle is None:
+                print(f"❌ {stock} 的 roic.ai 數據抓取失敗: {item.get('error')}")
+                # 🔥 非美國公司不論抓取成敗都要清空模板的 Financial / Ratios 區域
+                if stock in self.non_us_stocks:
+                    for writer in (self.processor.process_df_financial, self.processor.process_df_ratios):
+                        message = await self._update_fundamental(stock, writer, None, stock)
+                        print(f"✅ {message}")
+                continue
+
+            message = await self._update_fundamental(
+                stock, self.processor.process_df_summary, bundle['summary'], stock
+            )
+            print(f"✅ {message}")
+
+            message = await self._update_fundamental(
+                stock, self.processor.EPS_PE_MarketCap_data_write_to_excel, {stock: [bundle['metrics']]}, stock
+            )
+            print(f"✅ {message}")
+
+            # 🔥 非美國公司傳入 None → 清空 Financial / Ratios 區域
+            raw_financial = {stock: bundle['financials']} if bundle['financials'] is not None else None
+            message = await self._update_fundamental(
+                stock, self.processor.process_df_financial, raw_financial, stock
+            )
+            print(f"✅ {message}")
+
+            raw_ratios = {stock: bundle['ratios']} if bundle['ratios'] is not None else None
+            message = await self._update_fundamental(
+                stock, self.processor.process_df_ratios, raw_ratios, stock
+            )
+            print(f"✅ {message}")
 
     async def process_seekingalpha(self):
         """處理 Revenue Growth（COE + ADR 都處理）"""
         print(f"\n🔄 開始處理 Revenue Growth 數據（{len(self.stocks)} 支股票）...")
 
-        raw_revenue_growth = await self.scraper.run_seekingalpha()
-
-        for revenue_dict in raw_revenue_growth:
+        # 🔥 每完成一支立即寫入
+        async for _, revenue_dict in self.scraper.stream_seekingalpha():
             for stock, revenue_data in revenue_dict.items():
                 if stock in self.fundamental_excel_files and revenue_data is not None:
                     if isinstance(revenue_data, dict) and "error" not in revenue_data:
-                        modified_base64, message = self.processor.write_seekingalpha_data_to_excel(
+                        written, message = await self._write_fundamental(
+                            stock, self.processor.write_seekingalpha_data_to_excel,
                             stock=stock,
-                            raw_revenue_growth=revenue_data,
-                            excel_base64=self.fundamental_excel_files[stock]
+                            raw_revenue_growth=revenue_data
                         )
-                        if modified_base64:
-                            self.fundamental_excel_files[stock] = modified_base64
+                        if written:
                             print(f"✅ {message}")
                         else:
                             print(f"❌ {message}")
@@ -268,18 +391,16 @@ class StockManager:
         """處理 WACC（COE + ADR 都處理）"""
         print(f"\n🔄 開始處理 WACC 數據（{len(self.stocks)} 支股票）...")
 
-        raw_wacc = await self.scraper.run_wacc()
-
-        for wacc_dict in raw_wacc:
+        # 🔥 每完成一支立即寫入
+        async for _, wacc_dict in self._stream_results('wacc', self.scraper.stream_wacc):
             for stock, wacc_value in wacc_dict.items():
                 if stock in self.fundamental_excel_files and wacc_value is not None:
-                    modified_base64, message = self.processor.write_wacc_data_to_excel(
+                    written, message = await self._write_fundamental(
+                        stock, self.processor.write_wacc_data_to_excel,
                         stock=stock,
-                        wacc_value=wacc_value,
-                        excel_base64=self.fundamental_excel_files[stock]
+                        wacc_value=wacc_value
                     )
-                    if modified_base64:
-                        self.fundamental_excel_files[stock] = modified_base64
+                    if written:
                         print(f"✅ {message}")
 
     async def process_TradingView(self):
@@ -291,13 +412,12 @@ class StockManager:
         for TradingView_dict in raw_TradingView:
             for stock, TradingView_value in TradingView_dict.items():
                 if stock in self.fundamental_excel_files and TradingView_value is not None:
-                    modified_base64, message = self.processor.write_TradeingView_data_to_excel(
+                    written, message = await self._write_fundamental(
+                        stock, self.processor.write_TradeingView_data_to_excel,
                         stock=stock,
-                        tradingview_data=TradingView_value,
-                        excel_base64=self.fundamental_excel_files[stock]
+                        tradingview_data=TradingView_value
                     )
-                    if modified_base64:
-                        self.fundamental_excel_files[stock] = modified_base64
+                    if written:
                         print(f"✅ {message}")
 
     async def fetch_earnings_dates(self):
@@ -310,7 +430,10 @@ class StockManager:
         print(f"\n🔄 開始抓取財報日期（{len(self.stocks)} 支股票）...")
 
         # 🔥 關鍵：抓取並緩存
-        self.cached_earnings_data = await self.scraper.run_earnings_dates()
+        self.cached_earnings_data = await self._run_results('earningshub', self.scraper.run_earnings_dates)
+
+        # 🔥 更新下一次財報日：之後的財報 / 比率 / 成長率階段據此決定是否沿用快照
+        self.scraper.update_earnings_calendar(self.cached_earnings_data)
 
         print(f"✅ 財報日期抓取完成")
         return self.cached_earnings_data
@@ -335,13 +458,12 @@ class StockManager:
 
                 # 只寫入 Fundamental 模板
                 if stock in self.fundamental_excel_files:
-                    modified_base64, message = self.processor.write_earnings_date_to_fundamental_excel(
+                    written, message = await self._write_fundamental(
+                        stock, self.processor.write_earnings_date_to_fundamental_excel,
                         stock=stock,
-                        earnings_data=earnings_data,
-                        excel_base64=self.fundamental_excel_files[stock]
+                        earnings_data=earnings_data
                     )
-                    if modified_base64:
-                        self.fundamental_excel_files[stock] = modified_base64
+                    if written:
                         print(f"   ✅ {message}")
                     else:
                         print(f"   ❌ {message}")
@@ -368,7 +490,10 @@ class StockManager:
 
                 # 只寫入 Option 模板
                 if stock in self.option_excel_files:
-                    file_path, message = self.processor.write_earnings_date_to_option_excel(
+                    # 🔥 xlwings 在工作執行緒中執行，不阻塞事件循環
+                    file_path, message = await asyncio.to_thread(
+                        self._run_option_excel,
+                        self.processor.write_earnings_date_to_option_excel,
                         stock=stock,
                         earnings_data=earnings_data,
                         file_path=self.option_excel_files[stock]
@@ -448,64 +573,86 @@ class StockManager:
 
         return saved_files
 
-    async def process_barchart_for_options(self):
-        """處理 Barchart 波動率數據（批次優化版）"""
-        # 🔥 步驟 1: 批次抓取
-        raw_barchart = await self.scraper.run_barchart()
-        print(f"獲取到的 Barchart 數據: {raw_barchart}")
+    @staticmethod
+    def _run_option_excel(func, *args, **kwargs):
+        """
+        在工作執行緒中執行一次 xlwings 寫入（每次都會啟動自己的 xw.App）
 
-        # 🔥 步驟 2: 暫存數據
-        barchart_cache = {}
-        for barchart_dict in raw_barchart:
-            for stock, barchart_text in barchart_dict.items():
-                if barchart_text is not None and not isinstance(barchart_text, dict):
-                    barchart_cache[stock] = barchart_text
+        🔥 Windows 的 COM 需要在每個執行緒各自初始化
+        """
+        try:
+            import pythoncom
+        except ImportError:
+            pythoncom = None
+
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
+
+    def _stash_option_data(self, stock, key, value):
+        """暫存一支股票的選擇權模板數據，由 write_option_data 一次寫入"""
+        self.option_stock_data.setdefault(stock, {})[key] = value
+
+    async def write_option_data(self):
+        """
+        將 fetch_beta / fetch_barchart_for_options / fetch_option_chains 暫存的數據批次寫入 Option 模板
 
-        # 🔥 步驟 3: 批次寫入
-        if barchart_cache:
-            print(f"\n📝 開始批次寫入 {len(barchart_cache)} 支股票的 Barchart 數據...")
+        🔥 xlwings 在工作執行緒中執行，寫入期間其他瀏覽器 / Schwab 階段照常進行；
+           三個來源合併成一次寫入，只啟動一個 Excel
+        """
+        stock_data = {}
+        excel_files = {}
+        for stock in list(self.option_stock_data):
+            if stock in self.option_excel_files:
+                stock_data[stock] = self.option_stock_data.pop(stock)
+                excel_files[stock] = self.option_excel_files[stock]
 
-            stock_data = {}
-            excel_files = {}
+        if not stock_data:
+            print("⚠️ 沒有需要寫入的選擇權數據")
+            return
 
-            for stock, barchart_text in barchart_cache.items():
-                if stock in self.option_excel_files:
-                    stock_data[stock] = {'barchart': barchart_text}
-                    excel_files[stock] = self.option_excel_files[stock]
+        print(f"\n📝 開始批次寫入 {len(stock_data)} 支股票的選擇權模板數據...")
+        updated_files, messages = await asyncio.to_thread(
+            self._run_option_excel, self.processor.batch_write_options_to_excel, stock_data, excel_files
+        )
 
-            if stock_data:
-                updated_files, messages = self.processor.batch_write_options_to_excel(
-                    stock_data,
-                    excel_files
-                )
+        for stock, file_path in updated_files.items():
+            self.option_excel_files[stock] = file_path
 
-                for stock, new_base64 in updated_files.items():
-                    self.option_excel_files[stock] = new_base64
+        for stock, message in messages.items():
+            print(f"   {stock}: {message}")
 
-                for stock, message in messages.items():
-                    print(message)
+    async def fetch_barchart_for_options(self):
+        """抓取 Barchart 波動率數據並暫存（由 write_option_data 寫入）"""
+        # 🔥 步驟 1: 批次抓取
+        raw_barchart = await self._run_results('barchart', self.scraper.run_barchart)
+        print(f"獲取到的 Barchart 數據: {raw_barchart}")
 
-    async def process_option_chains(self):
-        """處理選擇權鏈數據（批次優化版）"""
+        # 🔥 步驟 2: 暫存數據
+        count = 0
+        for barchart_dict in raw_barchart:
+            for stock, barchart_text in barchart_dict.items():
+                if barchart_text is not None and not isinstance(barchart_text, dict):
+                    self._stash_option_data(stock, 'barchart', barchart_text)
+                    count += 1
+        print(f"✅ 已暫存 {count} 支股票的 Barchart 數據")
+
+    async def fetch_option_chains(self):
+        """抓取選擇權鏈數據並暫存（由 write_option_data 寫入）"""
         print("\n開始抓取選擇權鏈數據...")
 
         # 🔥 步驟 1: 批次抓取所有選擇權數據
         raw_option_data = await self.scraper.run_option_chains()
         print(f"獲取到的選擇權數據: {len(raw_option_data)} 檔")
 
-        # 🔥 步驟 2: 準備數據結構 (不立即寫入)
-        stock_data_cache = {}  # {stock: {'option_chain': df, 'beta': None, 'barchart': None}}
-
+        # 🔥 步驟 2: 展平並暫存 (不立即寫入)
+        count = 0
         for option_dict in raw_option_data:
             for stock, option_data in option_dict.items():
-                # 初始化該股票的數據容器
-                if stock not in stock_data_cache:
-                    stock_data_cache[stock] = {
-                        'option_chain': None,
-                        'beta': None,
-                        'barchart': None
-                    }
-
                 # 檢查是否有錯誤
                 if isinstance(option_data, dict) and "error" in option_data:
                     print(f"❌ {stock} 選擇權數據抓取失敗: {option_data['error']}")
@@ -515,45 +662,17 @@ class StockManager:
                 option_df = self.processor.flatten_option_chain(option_data, stock)
 
                 if option_df is not None and not option_df.empty:
-                    stock_data_cache[stock]['option_chain'] = option_df
+                    self._stash_option_data(stock, 'option_chain', option_df)
+                    count += 1
                     print(f"✅ {stock} 選擇權數據已準備 ({len(option_df)} 筆合約)")
                 else:
                     print(f"❌ {stock} 的選擇權數據展平失敗")
 
-        # 🔥 步驟 3: 批次寫入所有數據
-        if stock_data_cache:
-            print(f"\n📝 開始批次寫入 {len(stock_data_cache)} 支股票的選擇權數據...")
-
-            # 準備要寫入的數據
-            stocks_to_write = {}
-            excel_files_to_write = {}
-
-            for stock in stock_data_cache.keys():
-                if stock in self.option_excel_files:
-                    stocks_to_write[stock] = stock_data_cache[stock]
-                    excel_files_to_write[stock] = self.option_excel_files[stock]
-
-            if stocks_to_write:
-                # 呼叫批次寫入方法
-                updated_files, messages = self.processor.batch_write_options_to_excel(
-                    stocks_to_write,
-                    excel_files_to_write
-                )
-
-                # 更新 Excel 檔案
-                for stock, new_base64 in updated_files.items():
-                    self.option_excel_files[stock] = new_base64
-
-                # 顯示結果
-                for stock, message in messages.items():
-                    print(message)
-            else:
-                print("⚠️ 沒有需要寫入的數據")
-        else:
+        if not count:
             print("⚠️ 沒有成功抓取到任何選擇權數據")
 
-    async def process_beta(self):
-        """處理 Beta 數據（批次優化版）"""
+    async def fetch_beta(self):
+        """抓取 Beta 數據並暫存（由 write_option_data 寫入）"""
         if not self.option_excel_files:
             print("ℹ️ 未啟用選擇權模板，跳過 Beta 數據處理")
             return
@@ -563,35 +682,28 @@ class StockManager:
         print(f"獲取到的 Beta 數據: {raw_beta}")
 
         # 🔥 步驟 2: 暫存數據
-        beta_cache = {}
+        count = 0
         for beta_dict in raw_beta:
             for stock, beta_value in beta_dict.items():
                 if beta_value is not None:
-                    beta_cache[stock] = beta_value
+                    self._stash_option_data(stock, 'beta', beta_value)
+                    count += 1
+        print(f"✅ 已暫存 {count} 支股票的 Beta 數據")
 
-        # 🔥 步驟 3: 批次寫入
-        if beta_cache:
-            print(f"\n📝 開始批次寫入 {len(beta_cache)} 支股票的 Beta 數據...")
-
-            stock_data = {}
-            excel_files = {}
-
-            for stock, beta_value in beta_cache.items():
-                if stock in self.option_excel_files:
-                    stock_data[stock] = {'beta': beta_value}
-                    excel_files[stock] = self.option_excel_files[stock]
-
-            if stock_data:
-                updated_files, messages = self.processor.batch_write_options_to_excel(
-                    stock_data,
-                    excel_files
-                )
+    async def process_barchart_for_options(self):
+        """處理 Barchart 波動率數據（抓取後立即寫入）"""
+        await self.fetch_barchart_for_options()
+        await self.write_option_data()
 
-                for stock, new_base64 in updated_files.items():
-                    self.option_excel_files[stock] = new_base64
+    async def process_option_chains(self):
+        """處理選擇權鏈數據（抓取後立即寫入）"""
+        await self.fetch_option_chains()
+        await self.write_option_data()
 
-                for stock, message in messages.items():
-                    print(message)
+    async def process_beta(self):
+        """處理 Beta 數據（抓取後立即寫入）"""
+        await self.fetch_beta()
+        await self.write_option_data()
 # 🔥 總結修改：
 # 1. 新增 coe_stocks, adr_stocks, non_us_stocks 分類
 # 2. 新增 scrapable_stocks = coe_stocks + adr_stocks
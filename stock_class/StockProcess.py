@@ -10,6 +10,7 @@ from openpyxl.styles import Font
 from openpyxl.utils.dataframe import dataframe_to_rows
 from excel_template.fundamental_excel_template import Fundamental_Excel_Template_Base64
 import os
+from stock_class.RetryPolicy import RetryPolicy
 
 class StockProcess:
     def __init__(self, max_concurrent=2, request_delay=2.0):
@@ -533,17 +534,15 @@ class StockProcess:
         self.last_request_time[api_key] = time.time()
 
     async def _fetch_stock_data_with_retry(self, stock, max_retries=3):
-        """帶重試機制的數據獲取 - 使用 Schwab API"""
-        for attempt in range(max_retries):
+        """帶重試機制的數據獲取 - 使用 Schwab API（RetryPolicy 指數退避）"""
+        retry = RetryPolicy(attempts=max_retries, base_delay=8, max_delay=30).start(label=f"[schwab] {stock}")
+        while await retry.next_attempt():
             try:
                 return await asyncio.to_thread(self._fetch_stock_data, stock)
             except Exception as e:
-                if attempt == max_retries - 1:
-                    raise e
+                retry.failed(e)
 
-                wait_time = (2 ** attempt) * 3 + random.uniform(2, 5)
-                print(f"⚠️ 獲取 {stock} 資料失敗，{wait_time:.1f}秒後重試... (嘗試 {attempt + 1}/{max_retries})")
-                await asyncio.sleep(wait_time)
+        raise retry.last_error
 
     def _fetch_stock_data(self, stock):
         """
@@ -76,11 +76,24 @@ setup_playwright_path()
 import asyncio
 import pandas as pd
 import random
-from io import StringIO
-from bs4 import BeautifulSoup
+import time
 import json
 import re
 import schwabdev
+from stock_class.BrowserSessionManager import BrowserSessionManager
+from stock_class.Deadline import budget_ms, budget_seconds, ticker_budget
+from stock_class.DomExtractor import ROIC_TABLE_SELECTOR, extract_fragment, extract_tables
+from stock_class.HtmlParser import HtmlParser
+from stock_class.SnapshotCache import has_tables, snapshot, source_snapshot_url
+from stock_class.HttpFetcher import HttpFetcher, fast_path_url, http_fast_path
+from stock_class.NetworkCapture import ResponseCapture, build_header_metrics, build_period_tables
+from stock_class.PageState import PageState, PageStateError, classify_page, detect_challenge
+from stock_class.RetryPolicy import ParseError, RetryPolicy
+from stock_class.SourceProfiles import ROIC_TABLE_COUNTS, get_source_profile, retry_delays, source_url
+
+# SeekingAlpha 成長率頁的快照鍵（{symbol}：'-' 換成 '.' 的代碼）
+SEEKINGALPHA_URL = source_snapshot_url('seekingalpha', '/symbol/{symbol}/growth')
+
 
 # 自定義異常類別
 class TokenExpiredException(Exception):
@@ -89,9 +102,33 @@ class TokenExpiredException(Exception):
 
 
 class StockScraper:
-    def __init__(self, stocks, config=None, headless=True, max_concurrent=15):
+    # 🔥 只需要頁面某一區塊的擷取器：只取出該區塊的 outerHTML 再解析，不序列化整頁
+    SUBTREE_SELECTORS = {
+        'seekingalpha': 'section[data-test-id="card-container-growth-rates"]',
+        'barchart': 'div.bc-datatable-toolbar.volatility',
+        'earningshub': 'div.MuiAlert-root',
+    }
+
+    # TradingView 財報區塊（Reported 列出現並穩定後才解析，頁面其他部分有即時報價持續變動）
+    TRADINGVIEW_READY_SELECTOR = 'div[data-name="Reported"]'
+
+    # TradingView 指標區塊（Beta 所在的數值卡片）
+    BETA_READY_SELECTOR = 'div.wrapper-QCJM7wcY'
+
+    def __init__(self, stocks, config=None, headless=True, max_concurrent=15, browser_session=None,
+                 capture_json=False, snapshot_cache=None, har_archive=None):
         """
         初始化爬蟲類別。
+
+        Args:
+            browser_session: 共用的 BrowserSessionManager（未提供時自行建立並在 cleanup 時關閉）
+            capture_json: roic.ai 改由頁面抓回的 JSON 建立表格（找不到符合的 JSON 時自動改走 DOM）
+            snapshot_cache: SnapshotCache；提供時各 get_* 在導覽前先查本機快照
+            har_archive: HarArchive；錄製本次所有回應，或以錄製檔回放（不連網）。
+                         啟用時不使用快照與 HTTP 快速路徑，所有頁面都經過瀏覽器
+
+        config 可選填 'html_parser'：selectolax / lxml / html.parser（未指定時自動選擇最快的可用解析器）
+        config 可選填 'http_fast_path': False 關閉 HTTP 快速路徑（一律使用瀏覽器）
         """
         self.stocks = stocks.get('final_stocks')
         self.us_stocks = stocks.get('us_stocks')
@@ -104,10 +141,25 @@ class StockScraper:
         self.config = config
         self.headless = headless
         self.max_concurrent = max_concurrent
+        self.capture_json = capture_json
+        self.har_archive = har_archive
+        self.snapshot_cache = None if har_archive else snapshot_cache
         self.browser = None
-        self.playwright = None
+
+        # 🔥 HTML 解析器：依 config 選擇，未安裝時退回 html.parser
+        self.html_parser = HtmlParser((config or {}).get('html_parser'))
+        print(f"🧩 HTML 解析器：{self.html_parser.describe()}")
+
+        # 🔥 伺服器端渲染的來源先以 HTTP 抓取（SourceProfiles 的 http_fast_path），共用連線池
+        self.use_http = (config or {}).get('http_fast_path', True) and har_archive is None
+        self.http = HttpFetcher()
         self.contexts = []
         self.contexts_lock = asyncio.Lock()
+
+        # 🔥 瀏覽器會話：整次分析（甚至多次分析）共用同一組 Chromium
+        self._owns_session = browser_session is None
+        self.browser_session = browser_session or BrowserSessionManager()
+
         self._validate_schwab_config()
 
         # 🔥 關鍵修改：Schwab Client 重用
@@ -188,77 +240,333 @@ class StockScraper:
             print("✓ Schwab API 配置已載入")
             self.schwab_available = True
 
-    async def setup_browser(self):
-        """啟動瀏覽器（加入反偵測）- 自動偵測螢幕並置中"""
-        print("🔧 正在啟動 Playwright...")
-        from playwright.async_api import async_playwright
-
-        self.playwright = await async_playwright().start()
-
-        print(f"🔧 正在啟動 Chromium（{'無頭' if self.headless else '有頭'}模式，反偵測）...")
-
-        # 🔥 基礎參數（headless 和 有頭模式都需要）
-        base_args = [
-            '--disable-blink-features=AutomationControlled',
-            '--disable-dev-shm-usage',
-            '--disable-web-security',
-            '--disable-features=IsolateOrigins,site-per-process',
-            '--no-sandbox',
-            '--disable-setuid-sandbox',
-            '--disable-infobars',
-            '--ignore-certifcate-errors',
-            '--ignore-certifcate-errors-spki-list',
-        ]
-
-        # 🔥 根據 headless 狀態決定是否添加視窗參數
-        if not self.headless:
-            # 只有在有頭模式才處理視窗位置
-            try:
-                from screeninfo import get_monitors
-                monitors = get_monitors()
-                primary_monitor = next((m for m in monitors if m.is_primary), monitors[0])
+    async def setup_browser(self, headless=None):
+        """
+        取得瀏覽器（由 BrowserSessionManager 提供長駐實例）
+
+        🔥 不再每個階段重新啟動 Chromium：無頭 / 有頭模式各自只啟動一次，
+           之後的階段直接沿用。
+        """
+        if headless is None:
+            headless = self.headless
 
-                screen_width = primary_monitor.width
-                screen_height = primary_monitor.height
-                x_offset = primary_monitor.x
-                y_offset = primary_monitor.y
+        browser = await self.browser_session.get_browser(headless=headless)
 
-                print(f"📺 偵測到主螢幕解析度: {screen_width}x{screen_height} (偏移: {x_offset}, {y_offset})")
-                print(f"📺 共 {len(monitors)} 個螢幕")
+        # 🔥 self.browser 固定指向預設模式的瀏覽器（供 fetch_* 使用）
+        if headless == self.headless:
+            self.browser = browser
 
+        return browser
+
+    def _get_limiter(self, source):
+        """取得資料來源的自適應並發上限（起始值 = max_concurrent，由會話管理器跨分析保存）"""
+        return self.browser_session.get_limiter(source, initial=self.max_concurrent)
+
+    def _get_pool(self, source):
+        """取得資料來源的 context 池（大小 = 並發上限的最大值，由會話管理器保持暖機）"""
+        return self.browser_session.get_pool(source, size=self._get_limiter(source).max_limit)
+
+    async def _prepare_pool(self, source, stocks):
+        """預先建立本階段需要的 context（不超過股票數量與目前的並發上限）"""
+        await self._apply_har()
+        pool = self._get_pool(source)
+        await pool.fill(min(len(stocks), self._get_limiter(source).limit))
+        return pool
+
+    async def _apply_har(self):
+        """讓瀏覽器會話使用本爬蟲的 HAR 設定（錄製 / 回放 / 正常連網）"""
+        await self.browser_session.use_har_archive(self.har_archive)
+
+    def _log_pool_stats(self, source):
+        """輸出 context 池命中統計"""
+        stats = self._get_pool(source).stats()
+        print(f"📊 [{source}] context 池：命中 {stats['hits']} / 未命中 {stats['misses']} / "
+              f"重建 {stats['resets']} / 回收 {stats['recycled']}（命中率 {stats['hit_rate']:.0%}）")
+        print(f"⚙️ [{source}] {self._get_limiter(source).describe()}")
+
+    async def _stream_results(self, fetch, stocks, source=None, queue_size=None):
+        """
+        逐支產出抓取結果（完成一支就產出一支），取代 asyncio.gather 全部完成才回傳
+
+        🔥 有界：同時「抓取中 + 等待取用」的股票不超過並發上限 + queue_size，
+           呼叫端寫入 Excel 較慢時，後面的股票會暫停啟動（back-pressure）
+
+        Args:
+            fetch: fetch_*_data(stock, semaphore)，回傳 {stock: data} 或 {"stock": stock, "error": ...}
+            stocks: 股票列表
+            source: context 池名稱（提供時使用該來源的 AdaptiveLimiter、預先建立 context 並在結束時輸出統計）
+
+        Yields:
+            (stock, fetch 的原始回傳值)，依完成順序
+        """
+        if source:
+            await self._prepare_pool(source, stocks)
+
+        queue_size = queue_size or self.max_concurrent
+        if source:
+            semaphore = self._get_limiter(source)
+            slots = asyncio.Semaphore(semaphore.max_limit + queue_size)
+        else:
+            semaphore = asyncio.Semaphore(self.max_concurrent)
+            slots = asyncio.Semaphore(self.max_concurrent + queue_size)
+        queue = asyncio.Queue()
+        tasks = []
+
+        async def worker(stock):
+            try:
+                item = await fetch(stock, semaphore)
             except Exception as e:
-                print(f"⚠️ 無法偵測螢幕解析度，使用預設值: {e}")
-                screen_width = 1920
-                screen_height = 1080
-                x_offset = 0
-                y_offset = 0
-
-            # 設定視窗大小
-            window_width = int(screen_width * 0.8)
-            window_height = int(screen_height * 0.85)
-            x_position = x_offset + (screen_width - window_width) // 2
-            y_position = y_offset + (screen_height - window_height) // 2
-
-            print(f"🪟 瀏覽器視窗: {window_width}x{window_height} (位置: {x_position},{y_position})")
-
-            # 添加視窗相關參數
-            base_args.append('--start-maximized')
+                item = {"stock": stock, "error": str(e)}
+            await queue.put((stock, item))
+
+        async def producer():
+            for stock in stocks:
+                await slots.acquire()
+                tasks.append(asyncio.ensure_future(worker(stock)))
+
+        producer_task = asyncio.ensure_future(producer())
+        try:
+            for _ in range(len(stocks)):
+                stock, item = await queue.get()
+                slots.release()
+                yield stock, item
+        finally:
+            producer_task.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(producer_task, *tasks, return_exceptions=True)
+            if source:
+                self._log_pool_stats(source)
+
+    def stream_roic_bundle(self):
+        """roic.ai 打包抓取（逐支產出）"""
+        return self._stream_results(self.fetch_roic_bundle, self.stocks, source='roic')
+
+    def stream_financial(self):
+        return self._stream_results(self.fetch_financials_data, self.us_stocks, source='roic')
+
+    def stream_ratios(self):
+        return self._stream_results(self.fetch_ratios_data, self.us_stocks, source='roic')
+
+    def stream_combined_summary_and_metrics(self):
+        return self._stream_results(self.fetch_combined_summary_and_metrics_data, self.stocks, source='roic')
+
+    def stream_wacc(self):
+        return self._stream_results(self.fetch_wacc_data, self.stocks, source='wacc')
+
+    async def _goto_with_capture(self, page, url, source='roic', timeout=50000):
+        """
+        以 domcontentloaded 載入頁面並記錄符合的 JSON 回應（不等待表格渲染）
+
+        Returns:
+            list: [(url, json)]；沒有符合的回應時為空列表
+        """
+        capture = ResponseCapture(page, get_source_profile(source)['capture_patterns'])
+        capture.attach()
+        try:
+            await self._goto(page, url, source, wait_until='domcontentloaded', timeout=timeout)
+            return await capture.wait_for_payloads(timeout=budget_seconds(15.0))
+        finally:
+            capture.detach()
+
+    async def _goto(self, page, url, source, wait_until='load', timeout=60000):
+        """
+        頁面導覽的共同入口：先經過主機的 TokenBucket 節流，再把延遲與結果回報給該來源的
+        AdaptiveLimiter 與主機的 CircuitBreaker
+
+        - 逾時 / HTTP 429 / 403 / 驗證頁 → 降低並發上限（例外照常拋出，由呼叫端的重試流程處理）
+        - 成功 → 累積延遲基準，健康時逐步提高上限
+        - timeout 不超過目前期限（分析 / 階段 / 單支股票預算）的剩餘時間
+        """
+        await self._pace(source)
+        timeout = budget_ms(timeout)
+        started = time.monotonic()
+        try:
+            response = await page.goto(url, wait_until=wait_until, timeout=timeout)
+        except Exception as e:
+            self._report_navigation(source, started, 'timeout' if 'Timeout' in type(e).__name__ else 'error')
+            raise
+
+        status = response.status if response is not None else None
+        if status == 429:
+            self._report_navigation(source, started, '429')
+        elif status == 403:
+            self._report_navigation(source, started, 'blocked')
+        elif status is not None and status >= 500:
+            self._report_navigation(source, started, 'error')
+        elif await detect_challenge(page):
+            self._report_navigation(source, started, 'challenge')
         else:
-            # 無頭模式：不添加任何視窗參數
-            print("👻 無頭模式：瀏覽器將在背景執行")
+            self._report_navigation(source, started, kind=wait_until)
+        return response
+
+    # 頁面狀態 → AdaptiveLimiter 的失敗原因（其餘狀態代表主機正常回應）
+    PAGE_STATE_SIGNALS = {
+        PageState.CHALLENGE: 'challenge',
+        PageState.BLOCKED: 'blocked',
+        PageState.ERROR: 'error',
+        PageState.TIMEOUT: 'timeout',
+    }
+
+    async def _goto_state(self, page, url, source, timeout=60000):
+        """
+        導覽並在 commit 後立即判斷頁面狀態（classify_page），取代 networkidle + 逐一等待 selector
 
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=base_args
-        )
+        - 付費 / 不存在（PageState.terminal）馬上回傳，呼叫端不必重試
+        - 驗證頁 / 封鎖 / 錯誤頁 / 逾時同樣回報給 AdaptiveLimiter 降低並發
 
-        if self.headless:
-            print("✅ 瀏覽器啟動成功（無頭模式）")
+        Returns:
+            PageState
+        """
+        await self._pace(source)
+        goto_timeout = budget_ms(timeout)
+        started = time.monotonic()
+        try:
+            response = await page.goto(url, wait_until='commit', timeout=goto_timeout)
+        except Exception as e:
+            self._report_navigation(source, started, 'timeout' if 'Timeout' in type(e).__name__ else 'error')
+            raise
+
+        state = await classify_page(page, source, response, timeout=budget_ms(timeout))
+        if state is PageState.BLOCKED and response is not None and response.status == 429:
+            self._report_navigation(source, started, '429')
+        elif state in self.PAGE_STATE_SIGNALS:
+            self._report_navigation(source, started, self.PAGE_STATE_SIGNALS[state])
         else:
-            print("✅ 瀏覽器啟動成功（視窗已置中）")
+            self._report_navigation(source, started, kind='state')
+        return state
+
+    async def _pace(self, source):
+        """等到主機的 TokenBucket 允許下一次導覽（排隊時間不計入 AdaptiveLimiter 的延遲）"""
+        pacer = self.browser_session.get_pacer(source)
+        if pacer is not None:
+            await pacer.acquire()
+
+    def _report_navigation(self, source, started, reason=None, kind=None):
+        """
+        回報一次導覽的結果（reason 為 None 表示成功）
+
+        🔥 有頭來源的驗證頁由使用者處理，不算主機錯誤，不計入斷路器
+        """
+        limiter = self._get_limiter(source)
+        breaker = self.browser_session.get_breaker(source)
+        if reason is None:
+            limiter.record_success(started, kind=kind)
+            breaker.record_success()
+            return
+
+        limiter.record_failure(reason, started)
+        if reason != 'challenge' or get_source_profile(source)['headless']:
+            breaker.record_failure(reason)
+
+    def _retry(self, source, stock, retries):
+        """
+        單支股票的重試流程（RetryPolicy）：退避時間依 SourceProfiles.RETRY_DELAYS，主機斷路時直接略過
+
+        使用範例：
+            retry = self._retry('wacc', stock, retries)
+            while await retry.next_attempt():
+                try:
+                    ...
+                except Exception as e:
+                    retry.failed(e)
+        """
+        delays = retry_delays(source)
+        policy = RetryPolicy(attempts=retries, base_delay=delays['base'], max_delay=delays['max'])
+        return policy.start(self.browser_session.get_breaker(source), label=f"[{source}] {stock}")
+
+    async def _settle(self, page, source, selector=None, max_wait=2.0):
+        """等到頁面內容穩定再繼續（取代導覽後固定的 asyncio.sleep，最多等 max_wait 秒）"""
+        return await self.browser_session.readiness.settle(page, source, selector=selector,
+                                                           max_wait=budget_seconds(max_wait))
+
+    async def _page_fragment(self, page, extractor):
+        """取出擷取器宣告的區塊 HTML（取代 page.content()）"""
+        return await extract_fragment(page, self.SUBTREE_SELECTORS[extractor])
+
+    async def _fetch_http(self, source, stock):
+        """
+        以 HTTP 抓取伺服器端渲染的頁面（不經過瀏覽器）
+
+        Returns:
+            str: 含有 http_fast_path selector 的 HTML；
+            None: 來源不支援、請求失敗或回應中找不到 selector（呼叫端改走瀏覽器）
+        """
+        fast_path = http_fast_path(source)
+        if not self.use_http or fast_path is None:
+            return None
+
+        content = await self.http.fetch(source, fast_path_url(source, stock))
+        if content is None:
+            return None
+
+        if not self.html_parser.select_texts(content, fast_path['selector']):
+            print(f"↪️ {stock} [{source}] HTTP 回應中沒有 {fast_path['selector']}，改用瀏覽器")
+            return None
+        return content
+
+    def _split_snapshots(self, source, stocks, url_for):
+        """
+        依快照拆分股票（TradingView / Beta 這類整批開頁面的流程使用）
+
+        Returns:
+            ({stock: 快照內容}, [需要抓取的股票])
+        """
+        if self.snapshot_cache is None:
+            return {}, list(stocks)
+
+        cached, pending = {}, []
+        for stock in stocks:
+            hit, value = self.snapshot_cache.get(source, stock, url_for(stock))
+            if hit:
+                cached[stock] = value
+            else:
+                pending.append(stock)
+
+        if cached:
+            print(f"💾 [{source}] {len(cached)} 支股票使用快照，{len(pending)} 支需要抓取")
+        return cached, pending
+
+    def _save_snapshot(self, source, stock, url, value):
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.put(source, stock, url, value)
+
+    def update_earnings_calendar(self, earnings_results):
+        """
+        把 run_earnings_dates 的結果交給 FetchLedger
+
+        🔥 財報 / 比率 / 成長率的快照依「上次抓取後是否已發布財報」決定是否重新抓取，
+           必須在這些階段開始前更新下一次財報日
+        """
+        if self.snapshot_cache is None:
+            return
+
+        ledger = self.snapshot_cache.ledger
+        for item in earnings_results or []:
+            for stock, earnings_data in item.items():
+                if not earnings_data or not earnings_data.get('earnings_date'):
+                    continue
+                try:
+                    ledger.set_next_earnings(stock, self._parse_chinese_date(earnings_data['earnings_date']))
+                except ValueError:
+                    pass
+        ledger.save()
+
+    def _tradingview_symbol(self, stock):
+        """TradingView 代碼：交易所-股票（'-' 換成 '.'）"""
+        # 🔥 移除 yfinance，改用 stock_exchanges
+        exchange_name = self.stock_exchanges.get(stock, 'NYSE')  # 預設 NYSE
+        stock_symbol = ''.join(['.' if char == '-' else char for char in stock]) if '-' in stock else stock
+        return f'{exchange_name}-{stock_symbol}'
+
+    def _tradingview_url(self, stock):
+        return source_url('tradingview', f'/symbols/{self._tradingview_symbol(stock)}/financials-earnings/?earnings-period=FY&revenues-period=FY')
+
+    def _beta_url(self, stock):
+        return source_url('beta', f'/symbols/{self._tradingview_symbol(stock)}/')
 
     async def cleanup(self):
-        """清理資源 - 確保 Playwright 子進程完全關閉"""
+        """清理資源 - 關閉本爬蟲開啟的 context；瀏覽器由會話管理器決定是否關閉"""
         import asyncio
 
         print("🧹 開始清理 StockScraper 資源...")
@@ -278,34 +586,26 @@ class StockScraper:
                 self.contexts.clear()
                 print("✅ 所有 context 已關閉")
 
-            # Step 2: 關閉瀏覽器
-            if self.browser:
-                print("🧹 關閉 Playwright 瀏覽器...")
-                try:
-                    await asyncio.wait_for(self.browser.close(), timeout=3.0)
-                    print("✅ 瀏覽器已關閉")
-                except Exception as e:
-                    print(f"⚠️ 瀏覽器關閉錯誤: {e}")
-                finally:
-                    self.browser = None
+            # Step 2: 只有自行建立的會話才在這裡關閉（GUI 共用的會話會保持暖機）
+            if self._owns_session:
+                await self.browser_session.shutdown()
+            else:
+                print("♻️ 瀏覽器會話由外部管理，保持暖機")
+            self.browser = None
 
-            # Step 3: 停止 Playwright
-            if self.playwright:
-                print("🧹 停止 Playwright...")
-                try:
-                    await asyncio.wait_for(self.playwright.stop(), timeout=3.0)
-                    print("✅ Playwright 已停止")
-                except Exception as e:
-                    print(f"⚠️ Playwright 停止錯誤: {e}")
-                finally:
-                    self.playwright = None
+            # 🔥 關閉 HTTP 連線池
+            await self.http.close()
+
+            # 🔥 寫出 HAR 錄製檔
+            if self.har_archive is not None:
+                self.har_archive.save()
+                print(self.har_archive.describe())
 
-            # 🔥 Step 4: 關鍵！等待子進程完全結束
-            print("🧹 等待子進程完全結束...")
-            await asyncio.sleep(1.0)  # 給 1 秒讓子進程清理
-            print("✅ 子進程清理完成")
+            # Step 3: 抓取記錄寫回檔案
+            if self.snapshot_cache is not None:
+                self.snapshot_cache.flush()
 
-            # Step 5: 清理 Schwab Client
+            # Step 4: 清理 Schwab Client
             if self.schwab_client:
                 self.schwab_client = None
 
@@ -315,168 +615,157 @@ class StockScraper:
             print(f"❌ 清理過程發生錯誤: {e}")
             # 確保變數被重置
             self.browser = None
-            self.playwright = None
             self.schwab_client = None
             if hasattr(self, 'contexts'):
                 self.contexts.clear()
 
+    @ticker_budget('roic')
     async def fetch_financials_data(self, stock, semaphore):
         """抓取單一股票的數據（financials）。"""
         async with semaphore:
-            context = None  # 🔥 初始化
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                    viewport={"width": 800, "height": 600},
-                    java_script_enabled=True
-                )
-                # 🔥 追蹤 context
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-                try:
-                    page_financials = await context.new_page()
+                # 🔥 從 roic 的 context 池借用頁面，用完歸還
+                async with self._get_pool('roic').leased() as page_financials:
                     financials = await asyncio.gather(self.get_financials(stock, page_financials))
                     return {stock: financials}
-                finally:
-                    await context.close()
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
             except Exception as e:
-                # 確保 context 被關閉
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {"stock": stock, "error": str(e)}
 
+    @staticmethod
+    def _roic_page_result(stock, state):
+        """
+        依頁面狀態決定 Financial / Ratios 的結果
+
+        Returns:
+            str: 付費 / 不存在時的結果（不重試）；None 表示表格已渲染，可以讀取
+        Raises:
+            PageStateError: 驗證頁 / 錯誤頁 / 逾時等可重試的狀態
+        """
+        if state is PageState.PAYWALL:
+            return f'{stock}是非美國企業，此頁面須付費！'
+        if state is PageState.NOT_FOUND:
+            return f"Failed to retrieve data for {stock}: roic.ai 沒有此股票"
+        if state is not PageState.READY:
+            raise PageStateError('roic.ai', state)
+        return None
+
+    async def _read_roic_tables(self, page, expected, timeout=30000):
+        """
+        讀取 roic.ai Financial / Ratios 的表格
+
+        🔥 classify_page 在第一個表格出現時就回報 READY，其餘表格可能仍在渲染：
+           等到表格數達到 expected、表格內容穩定後才讀取
+
+        Raises:
+            PageStateError: 期限內表格數仍不足（交給重試流程，不寫入殘缺的結果）
+        """
+        wait_timeout = budget_ms(timeout)
+        try:
+            await page.wait_for_function(
+                "([selector, expected]) => document.querySelectorAll(selector).length >= expected",
+                arg=[ROIC_TABLE_SELECTOR, expected], timeout=wait_timeout, polling=100
+            )
+        except Exception:
+            # 數量不足時由下面的檢查處理
+            pass
+        await self._settle(page, 'roic', ROIC_TABLE_SELECTOR)
+
+        dfs = await extract_tables(page, ROIC_TABLE_SELECTOR)
+        if len(dfs) < expected:
+            raise PageStateError('roic.ai', PageState.TIMEOUT, f"表格只有 {len(dfs)} / {expected} 個")
+        return dfs
+
+    @snapshot('roic_financials', source_snapshot_url('roic', '/quote/{stock}/financials'),
+              validate=has_tables(ROIC_TABLE_COUNTS['roic_financials']))
     async def get_financials(self, stock, page, retries=3):
         """抓取特定股票的財務資料並回傳 DataFrame。"""
-        URL = f'https://www.roic.ai/quote/{stock}/financials'
-        attempt = 0
+        URL = source_url('roic', f'/quote/{stock}/financials')
+        retry = self._retry('roic', stock, retries)
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                await asyncio.sleep(random.uniform(1, 3))
-                await page.goto(URL, wait_until='networkidle', timeout=100000) # networkidle
-
-                # 2025/09/23 更新新邏輯
-                # await page.wait_for_selector('table.w-full.caption-bottom.text-sm.table-fixed', timeout=100000)
-                # content = await page.content()
-                # dfs = pd.read_html(StringIO(content))
-                # return dfs
-
-                # 之前的邏輯
-                if await page.query_selector(
-                        'div.rounded-lg.bg-card.text-card-foreground.shadow-sm.mx-auto.flex.w-\\[500px\\].flex-col.items-center.border.drop-shadow-lg'):
-                    return f'{stock}是非美國企業，此頁面須付費！'
+                if self.capture_json:
+                    payloads = await self._goto_with_capture(page, URL, timeout=100000)
+                    dfs = build_period_tables(payloads, expected_count=ROIC_TABLE_COUNTS['roic_financials'])
+                    if dfs:
+                        print(f"⚡ {stock} Financial 由 JSON 建立（{len(dfs)} 個表格）")
+                        return dfs
+                    # 🔥 沒有符合的 JSON → 沿用 DOM 流程（直接判斷頁面狀態，不再等 networkidle）
+                    state = await classify_page(page, 'roic', timeout=budget_ms(100000))
                 else:
-                    await page.wait_for_selector('table.w-full.caption-bottom.text-sm.table-fixed', timeout=100000)
-                    content = await page.content()
-                    dfs = pd.read_html(StringIO(content))
-                    return dfs
+                    state = await self._goto_state(page, URL, 'roic', timeout=100000)
+
+                # 🔥 付費 / 不存在的頁面直接回傳（不重試）；表格已渲染時直接在瀏覽器內讀出
+                terminal = self._roic_page_result(stock, state)
+                if terminal is not None:
+                    return terminal
+                dfs = await self._read_roic_tables(page, ROIC_TABLE_COUNTS['roic_financials'])
+                return dfs
 
             except Exception as e:
-                attempt += 1
-                if attempt == retries:
-                    return f"Error for {stock}: {e}"
+                retry.failed(e)
 
-        return f"Failed to retrieve data for {stock}"
+        return f"Error for {stock}: {retry.last_error}"
 
     async def run_financial(self):
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_financials_data(stock, semaphore) for stock in self.us_stocks]
-            result = await asyncio.gather(*tasks)
-        finally:
-            await self.cleanup()
+        await self._prepare_pool('roic', self.us_stocks)
+        semaphore = self._get_limiter('roic')
+        tasks = [self.fetch_financials_data(stock, semaphore) for stock in self.us_stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('roic')
         return result
 
+    @ticker_budget('roic')
     async def fetch_ratios_data(self, stock, semaphore):
         """抓取單一股票的數據（Ratios）。"""
         async with semaphore:
-            context = None  # 🔥 初始化
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                    viewport={"width": 800, "height": 600},
-                    java_script_enabled=True
-                )
-                # 🔥 追蹤 context
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-                try:
-                    page_ratios = await context.new_page()
+                # 🔥 從 roic 的 context 池借用頁面，用完歸還
+                async with self._get_pool('roic').leased() as page_ratios:
                     ratios = await asyncio.gather(self.get_ratios(stock, page_ratios))
                     # print({stock: ratios})
                     return {stock: ratios}
-                finally:
-                    await context.close()
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
             except Exception as e:
-                # 確保 context 被關閉
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {"stock": stock, "error": str(e)}
 
+    @snapshot('roic_ratios', source_snapshot_url('roic', '/quote/{stock}/ratios'),
+              validate=has_tables(ROIC_TABLE_COUNTS['roic_ratios']))
     async def get_ratios(self, stock, page, retries=3):
         """抓取特定股票的比率資料並回傳 DataFrame。"""
-        URL = f'https://www.roic.ai/quote/{stock}/ratios'
-        attempt = 0
+        URL = source_url('roic', f'/quote/{stock}/ratios')
+        retry = self._retry('roic', stock, retries)
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                await asyncio.sleep(random.uniform(1, 3))
-                await page.goto(URL, wait_until='load', timeout=50000)
-
-                # 2025/09/23 更新新邏輯
-                # await page.wait_for_selector('table.w-full.caption-bottom.text-sm.table-fixed', timeout=100000)
-                # content = await page.content()
-                # dfs = pd.read_html(StringIO(content))
-                # return dfs
-
-                # 之前的邏輯
-                if await page.query_selector(
-                        'div.rounded-lg.bg-card.text-card-foreground.shadow-sm.mx-auto.flex.w-\\[500px\\].flex-col.items-center.border.drop-shadow-lg'):
-                    return f'{stock}是非美國企業，此頁面須付費！'
+                if self.capture_json:
+                    payloads = await self._goto_with_capture(page, URL)
+                    dfs = build_period_tables(payloads, expected_count=ROIC_TABLE_COUNTS['roic_ratios'])
+                    if dfs:
+                        print(f"⚡ {stock} Ratios 由 JSON 建立（{len(dfs)} 個表格）")
+                        return dfs
+                    # 🔥 沒有符合的 JSON → 沿用 DOM 流程（直接判斷頁面狀態）
+                    state = await classify_page(page, 'roic', timeout=budget_ms(100000))
                 else:
-                    await page.wait_for_selector('table.w-full.caption-bottom.text-sm.table-fixed', timeout=100000)
-                    content = await page.content()
-                    dfs = pd.read_html(StringIO(content))
-                    return dfs
+                    state = await self._goto_state(page, URL, 'roic', timeout=100000)
+
+                # 🔥 付費 / 不存在的頁面直接回傳（不重試）；表格已渲染時直接在瀏覽器內讀出
+                terminal = self._roic_page_result(stock, state)
+                if terminal is not None:
+                    return terminal
+                dfs = await self._read_roic_tables(page, ROIC_TABLE_COUNTS['roic_ratios'])
+                return dfs
 
             except Exception as e:
-                attempt += 1
-                if attempt == retries:
-                    return f"Error for {stock}: {e}"
+                retry.failed(e)
 
-        return f"Failed to retrieve data for {stock}"
+        return f"Error for {stock}: {retry.last_error}"
 
     async def run_ratios(self):
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_ratios_data(stock, semaphore) for stock in self.us_stocks]
-            result = await asyncio.gather(*tasks)
-        finally:
-            await self.cleanup()
+        await self._prepare_pool('roic', self.us_stocks)
+        semaphore = self._get_limiter('roic')
+        tasks = [self.fetch_ratios_data(stock, semaphore) for stock in self.us_stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('roic')
         return result
 
     # async def fetch_EPS_PE_MarketCap_data(self, stock, semaphore):
@@ -606,21 +895,13 @@ class StockScraper:
     #
     #     return {'error': f'Failed to retrieve data for {stock}'}
 
+    @ticker_budget('roic')
     async def fetch_combined_summary_and_metrics_data(self, stock, semaphore):
         """同時抓取Summary表格數據和EPS/PE/MarketCap指標數據"""
         async with semaphore:
-            context = None  # 🔥 初始化
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                    viewport={"width": 800, "height": 600},
-                )
-                # 🔥 追蹤 context
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-                try:
-                    page = await context.new_page()
-
+                # 🔥 從 roic 的 context 池借用頁面，用完歸還
+                async with self._get_pool('roic').leased() as page:
                     # 一次性獲取兩種數據
                     summary_data, metrics_data = await self.get_combined_data(stock, page)
 
@@ -630,46 +911,41 @@ class StockScraper:
                             'metrics': metrics_data
                         }
                     }
-                finally:
-                    await context.close()
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
             except Exception as e:
-                # 確保 context 被關閉
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {"stock": stock, "error": str(e)}
 
+    @snapshot('roic_quote', source_snapshot_url('roic', '/quote/{stock}'))
     async def get_combined_data(self, stock, page, retries=3):
         """從同一頁面同時獲取Summary表格和指標數據 - 2025新版"""
-        URL = f'https://www.roic.ai/quote/{stock}'
-        attempt = 0
+        URL = source_url('roic', f'/quote/{stock}')
+        retry = self._retry('roic', stock, retries)
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                await asyncio.sleep(random.uniform(1, 3))
-                await page.goto(URL, wait_until='load', timeout=50000)
+                json_metrics = None
+                if self.capture_json:
+                    payloads = await self._goto_with_capture(page, URL)
+                    json_metrics = build_header_metrics(payloads)
+                    state = await classify_page(page, 'roic', timeout=budget_ms(100000))
+                else:
+                    state = await self._goto_state(page, URL, 'roic', timeout=100000)
 
-                # 等待兩種關鍵元素載入完成
-                await page.wait_for_selector('table.w-full.caption-bottom.text-sm.table-fixed', timeout=100000)
-                await page.wait_for_selector('div[data-cy="company_header_ratios"]', timeout=30000)
+                # 🔥 不存在的代碼不重試（Summary 表格已渲染才繼續）
+                if state.terminal:
+                    print(f"⚠️ {stock} roic.ai 頁面狀態：{state.value}，不再重試")
+                    return [], {}
+                if state is not PageState.READY:
+                    raise PageStateError('roic.ai', state)
 
-                # 獲取頁面內容
-                content = await page.content()
+                # 等待指標區塊載入完成（指標已由 JSON 取得時不需等待）
+                if json_metrics is None:
+                    await page.wait_for_selector('div[data-cy="company_header_ratios"]', timeout=budget_ms(30000))
 
                 # ===== 1. 解析 Summary 表格數據 =====
                 summary_data = None
                 try:
-                    dfs = pd.read_html(StringIO(content))
+                    # 🔥 直接在瀏覽器內讀出表格，不再對整頁 HTML 執行 read_html
+                    dfs = await extract_tables(page)
                     summary_data = dfs
                     print(f"成功解析 {stock} 的表格數據，共 {len(dfs)} 個表格")
                 except Exception as e:
@@ -677,28 +953,58 @@ class StockScraper:
                     summary_data = []
 
                 # ===== 2. 解析指標數據（EPS/PE/Market Cap）=====
-                metrics_data = None
-                try:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    ratios_container = soup.find('div', {'data-cy': 'company_header_ratios'})
-
-                    if ratios_container:
-                        metric_items = ratios_container.find_all('div', class_='shrink-0 flex-col')
-
-                        if len(metric_items) >= 3:
-                            metrics_data = {}
-
-                            for item in metric_items:
-                                # 🔥 關鍵修正：適應新class順序
-                                value_span = item.find('span', class_='text-foreground')
-
-                                if value_span and 'text-lg' in value_span.get('class', []):
-                                    label_span = item.find('span', class_='text-muted-foreground')
-
-                                    if label_span and 'text-sm' in label_span.get('class', []):
-                                        label = label_span.get_text(strip=True)
-                                        value_text = value_span.get_text(strip=True)
+                metrics_data = json_metrics
+                if metrics_data is not None:
+                    print(f"⚡ {stock} 指標數據由 JSON 建立: {metrics_data}")
+                else:
+                    try:
+                        # 獲取頁面內容（指標數據由 BeautifulSoup 解析）
+                        content = await page.content()
+                        soup = self.html_parser.soup(content)
+                        ratios_container = soup.find('div', {'data-cy': 'company_header_ratios'})
+
+                        if ratios_container:
+                            metric_items = ratios_container.find_all('div', class_='shrink-0 flex-col')
+
+                            if len(metric_items) >= 3:
+                                metrics_data = {}
+
+                                for item in metric_items:
+                                    # 🔥 關鍵修正：適應新class順序
+                                    value_span = item.find('span', class_='text-foreground')
+
+                                    if value_span and 'text-lg' in value_span.get('class', []):
+                                        label_span = item.find('span', class_='text-muted-foreground')
+
+                                        if label_span and 'text-sm' in label_span.get('class', []):
+                                            label = label_span.get_text(strip=True)
+                                            value_text = value_span.get_text(strip=True)
+
+                                            if label in ['EPS', 'P/E']:
+                                                try:
+                                                    metrics_data[label] = float(value_text)
+                                                except ValueError:
+                                                    metrics_data[label] = value_text
+                                            else:
+                                                metrics_data[label] = value_text
 
+                                print(f"成功解析 {stock} 的指標數據: {metrics_data}")
+                            else:
+                                metrics_data = {}
+                        else:
+                            # 🔥 備用方案
+                            value_spans = [s for s in soup.find_all('span', class_='text-foreground')
+                                           if 'text-lg' in s.get('class', [])]
+                            label_spans = [s for s in soup.find_all('span', class_='text-muted-foreground')
+                                           if 'text-sm' in s.get('class', []) and 'uppercase' in s.get('class', [])]
+
+                            if len(value_spans) >= 3 and len(label_spans) >= 3:
+                                metrics_data = {}
+                                for i in range(min(len(value_spans), len(label_spans))):
+                                    label = label_spans[i].get_text(strip=True)
+                                    value_text = value_spans[i].get_text(strip=True)
+
+                                    if label in ['EPS', 'P/E', 'MARKET CAP', 'Market Cap', 'NEXT EARN', 'Next Earn']:
                                         if label in ['EPS', 'P/E']:
                                             try:
                                                 metrics_data[label] = float(value_text)
@@ -707,78 +1013,90 @@ class StockScraper:
                                         else:
                                             metrics_data[label] = value_text
 
-                            print(f"成功解析 {stock} 的指標數據: {metrics_data}")
-                        else:
-                            metrics_data = {}
-                    else:
-                        # 🔥 備用方案
-                        value_spans = [s for s in soup.find_all('span', class_='text-foreground')
-                                       if 'text-lg' in s.get('class', [])]
-                        label_spans = [s for s in soup.find_all('span', class_='text-muted-foreground')
-                                       if 'text-sm' in s.get('class', []) and 'uppercase' in s.get('class', [])]
-
-                        if len(value_spans) >= 3 and len(label_spans) >= 3:
-                            metrics_data = {}
-                            for i in range(min(len(value_spans), len(label_spans))):
-                                label = label_spans[i].get_text(strip=True)
-                                value_text = value_spans[i].get_text(strip=True)
-
-                                if label in ['EPS', 'P/E', 'MARKET CAP', 'Market Cap', 'NEXT EARN', 'Next Earn']:
-                                    if label in ['EPS', 'P/E']:
-                                        try:
-                                            metrics_data[label] = float(value_text)
-                                        except ValueError:
-                                            metrics_data[label] = value_text
-                                    else:
-                                        metrics_data[label] = value_text
-
-                            if metrics_data:
-                                print(f"備用方案成功: {metrics_data}")
-                        else:
-                            metrics_data = {}
+                                if metrics_data:
+                                    print(f"備用方案成功: {metrics_data}")
+                            else:
+                                metrics_data = {}
 
-                except Exception as e:
-                    print(f"解析 {stock} 指標數據失敗: {e}")
-                    metrics_data = {}
+                    except Exception as e:
+                        print(f"解析 {stock} 指標數據失敗: {e}")
+                        metrics_data = {}
 
                 return summary_data, metrics_data
 
             except Exception as e:
-                attempt += 1
-                print(f"第 {attempt} 次嘗試失敗: {e}")
-                if attempt == retries:
-                    return [], {}
-                await asyncio.sleep(random.uniform(2, 5))
+                retry.failed(e)
 
         return [], {}
 
     async def run_combined_summary_and_metrics(self):
         """執行合併的Summary和指標數據抓取"""
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_combined_summary_and_metrics_data(stock, semaphore) for stock in self.stocks]
-            result = await asyncio.gather(*tasks)
+        await self._prepare_pool('roic', self.stocks)
+        semaphore = self._get_limiter('roic')
+        tasks = [self.fetch_combined_summary_and_metrics_data(stock, semaphore) for stock in self.stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('roic')
+
+        # 分離結果以保持與現有代碼的兼容性
+        summary_results = []
+        metrics_results = []
+
+        for item in result:
+            for stock, data in item.items():
+                if stock != "stock" and "error" not in item:  # 排除錯誤項目
+                    summary_results.append({stock: data['summary']})
+                    metrics_results.append({stock: data['metrics']})
+                else:
+                    # 處理錯誤情況
+                    summary_results.append(item)
+                    metrics_results.append(item)
 
-            # 分離結果以保持與現有代碼的兼容性
-            summary_results = []
-            metrics_results = []
+        return summary_results, metrics_results
 
-            for item in result:
-                for stock, data in item.items():
-                    if stock != "stock" and "error" not in item:  # 排除錯誤項目
-                        summary_results.append({stock: data['summary']})
-                        metrics_results.append({stock: data['metrics']})
-                    else:
-                        # 處理錯誤情況
-                        summary_results.append(item)
-                        metrics_results.append(item)
+    @ticker_budget('roic')
+    async def fetch_roic_bundle(self, stock, semaphore):
+        """
+        roic.ai 單一股票打包抓取：quote → financials → ratios 在同一個 context 內依序完成
 
-            return summary_results, metrics_results
+        🔥 取代三個各自開 context 的階段，cookie 與 HTTP 快取在三個頁面之間沿用
+        🔥 非美國公司只抓 quote（financials / ratios 需付費）
+        """
+        async with semaphore:
+            try:
+                async with self._get_pool('roic').leased() as page:
+                    summary_data, metrics_data = await self.get_combined_data(stock, page)
 
-        finally:
-            await self.cleanup()
+                    financials = None
+                    ratios = None
+                    if stock in self.us_stocks:
+                        financials = [await self.get_financials(stock, page)]
+                        ratios = [await self.get_ratios(stock, page)]
 
+                    return {
+                        stock: {
+                            'summary': summary_data,
+                            'metrics': metrics_data,
+                            'financials': financials,
+                            'ratios': ratios
+                        }
+                    }
+            except Exception as e:
+                return {"stock": stock, "error": str(e)}
+
+    async def run_roic_bundle(self):
+        """
+        執行 roic.ai 打包抓取（Summary + 指標 + Financial + Ratios）
+
+        Returns:
+            list: [{stock: {'summary', 'metrics', 'financials', 'ratios'}}, ...]，順序同 self.stocks；
+                  失敗時為 {"stock": stock, "error": ...}
+        """
+        await self._prepare_pool('roic', self.stocks)
+        semaphore = self._get_limiter('roic')
+        tasks = [self.fetch_roic_bundle(stock, semaphore) for stock in self.stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('roic')
+        return result
 
     # async def EPS_Growth_Rate_and_write_to_excel(self, stock, excel_base64):
     #     """抓取EPS成長率並寫入Excel"""
@@ -853,28 +1171,26 @@ class StockScraper:
     #         except Exception as e:
     #             return {"stock": stock, "error": str(e)}
 
+    @snapshot('seekingalpha', SEEKINGALPHA_URL)
     async def get_seekingalpha_html(self, stock, page, retries=3):
         """抓取特定股票的摘要資料 - PerimeterX CAPTCHA 檢測版"""
         if '-' in stock:
             stock = ''.join(['.' if char == '-' else char for char in stock])
 
-        URL = f'https://seekingalpha.com/symbol/{stock}/growth'
-        attempt = 0
+        URL = source_url('seekingalpha', f'/symbol/{stock}/growth')
+        retry = self._retry('seekingalpha', stock, retries)
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                print(f"正在嘗試抓取 {stock} 的資料 (第 {attempt + 1} 次)...")
+                print(f"正在嘗試抓取 {stock} 的資料 (第 {retry.attempt} 次)...")
 
-                # 隨機等待
-                await asyncio.sleep(random.uniform(3, 7))
+                # 前往頁面（節流由 _goto 的 TokenBucket 統一處理）
+                await self._goto(page, URL, 'seekingalpha', wait_until='domcontentloaded', timeout=60000)
 
-                # 前往頁面
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
+                # 等待頁面渲染（Growth Rates 區塊穩定即繼續）
+                await self._settle(page, 'seekingalpha', self.SUBTREE_SELECTORS['seekingalpha'], max_wait=4.0)
 
-                # 等待頁面渲染
-                await asyncio.sleep(random.uniform(2, 4))
-
-                # 模擬人類瀏覽行為
+                # 模擬人類瀏覽行為（隨機間隔為刻意保留的擬人化行為，不是等待渲染）
                 for _ in range(random.randint(2, 4)):
                     x = random.randint(100, 800)
                     y = random.randint(100, 600)
@@ -919,18 +1235,18 @@ class StockScraper:
                 # 🔥 確認目標元素已載入
                 await page.wait_for_selector(
                     'section[data-test-id="card-container-growth-rates"] table[data-test-id="table"]',
-                    timeout=10000
+                    timeout=budget_ms(10000)
                 )
                 await page.wait_for_selector(
                     'section[data-test-id="card-container-growth-rates"] th:has-text("Revenue")',
-                    timeout=10000
+                    timeout=budget_ms(10000)
                 )
 
-                await asyncio.sleep(2)
+                await self._settle(page, 'seekingalpha', self.SUBTREE_SELECTORS['seekingalpha'])
 
-                # ===== 開始解析數據 =====
-                content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
+                # ===== 開始解析數據（只取出 Growth Rates 區塊）=====
+                content = await self._page_fragment(page, 'seekingalpha')
+                soup = self.html_parser.soup(content)
 
                 growth_section = soup.find('section', {'data-test-id': 'card-container-growth-rates'})
 
@@ -1019,14 +1335,9 @@ class StockScraper:
                     return {"error": "未找到Growth Rates表格"}
 
             except Exception as e:
-                print(f"第 {attempt + 1} 次嘗試失敗: {e}")
-                attempt += 1
-                if attempt < retries:
-                    wait_time = random.uniform(20, 40)
-                    print(f"等待 {wait_time:.1f} 秒後重試...")
-                    await asyncio.sleep(wait_time)
+                retry.failed(e)
 
-        return {"error": f"Failed to retrieve data for {stock} after {retries} attempts"}
+        return {"error": f"Failed to retrieve data for {stock} after {retry.attempt} attempts: {retry.last_error}"}
 
     async def _wait_for_px_captcha_resolution(self, stock, page):
         """等待 PerimeterX CAPTCHA 被解決（無限等待）"""
@@ -1085,145 +1396,68 @@ class StockScraper:
 
     async def run_seekingalpha(self):
         """執行 SeekingAlpha 數據抓取 - 強制有頭模式處理 Cloudflare"""
+        return [{stock: item[stock]} async for stock, item in self.stream_seekingalpha()]
 
-        # 🔥 臨時保存原始 headless 設定
-        original_headless = self.headless
+    async def stream_seekingalpha(self):
+        """SeekingAlpha 數據抓取（逐支產出 (stock, {stock: data})）"""
 
-        # 🔥 強制使用有頭模式（顯示瀏覽器）
-        self.headless = False
+        # 🔥 有快照的股票直接產出，不開有頭瀏覽器、也不需要股票之間的延遲
+        cached, pending = self._split_snapshots(
+            'seekingalpha', self.stocks, SEEKINGALPHA_URL)
+        for stock, stock_data in cached.items():
+            yield stock, {stock: stock_data}
 
-        try:
-            await self.setup_browser()
-
-            context = await self.browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                java_script_enabled=True,
-            )
-
-            try:
-                page = await context.new_page()
-                result = []
-
-                # 依序處理每個股票
-                for i, stock in enumerate(self.stocks):
-                    print(f"\n{'=' * 50}")
-                    print(f"正在處理 {stock} ({i + 1}/{len(self.stocks)})...")
-                    print(f"{'=' * 50}")
-
-                    stock_data = await self.get_seekingalpha_html(stock, page)
-                    result.append({stock: stock_data})
-
-                    # 🔥 強化: 增加延遲變化幅度
-                    if i < len(self.stocks) - 1:
-                        base_delay = 3 + (i * 2)
-                        wait_time = random.uniform(base_delay, base_delay + 10)
-                        print(f"\n⏳ 等待 {wait_time:.1f} 秒後處理下一個股票...")
-                        await asyncio.sleep(wait_time)
-
-                return result
+        if not pending:
+            return
 
-            finally:
-                await context.close()
+        # 🔥 強制使用有頭模式（顯示瀏覽器）- 從 seekingalpha 的 context 池借用有頭瀏覽器的頁面
+        await self._apply_har()
+        async with self._get_pool('seekingalpha').leased() as page:
+            # 依序處理每個股票
+            for i, stock in enumerate(pending):
+                print(f"\n{'=' * 50}")
+                print(f"正在處理 {stock} ({i + 1}/{len(pending)})...")
+                print(f"{'=' * 50}")
 
-        finally:
-            # 🔥 恢復原始設定
-            self.headless = original_headless
-            await self.cleanup()
+                # 🔥 股票之間的間隔由 seekingalpha 主機的 TokenBucket 控制（_goto）
+                stock_data = await self.get_seekingalpha_html(stock, page)
+                yield stock, {stock: stock_data}
 
+    @ticker_budget('wacc')
     async def fetch_wacc_data(self, stock, semaphore):
         async with semaphore:
-            context = None
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    java_script_enabled=True,
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Cache-Control': 'max-age=0',
-                    }
-                )
-
-                # 注入反偵測腳本
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-
-                    window.chrome = {
-                        runtime: {},
-                        loadTimes: function() {},
-                        csi: function() {},
-                        app: {}
-                    };
-
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                            Promise.resolve({ state: Notification.permission }) :
-                            originalQuery(parameters)
-                    );
-
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en']
-                    });
-                """)
-
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-                try:
-                    page = await context.new_page()
+                # 🔥 從 wacc 的 context 池借用頁面（反偵測腳本已在建立 context 時注入）
+                async with self._get_pool('wacc').leased() as page:
                     wacc_value = await self.get_wacc_html(stock, page)
                     return {stock: wacc_value}
-                finally:
-                    await context.close()
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
             except Exception as e:
                 print(f"❌ {stock} 發生錯誤: {e}")
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {stock: None}
 
+    @snapshot('wacc', source_snapshot_url('wacc', '/term/wacc/{symbol}'))
     async def get_wacc_html(self, stock, page, retries=3):
         """抓取特定股票的WACC資料並回傳int數值。"""
         if '-' in stock:
             stock = ''.join(['.' if char == '-' else char for char in stock])
 
-        URL = f'https://www.gurufocus.com/term/wacc/{stock}'
-        attempt = 0
+        URL = source_url('wacc', f'/term/wacc/{stock}')
 
-        while attempt < retries:
-            try:
-                print(f"正在嘗試抓取 {stock} 的WACC資料 (第 {attempt + 1} 次)...")
+        # 🔥 伺服器端渲染：先以 HTTP 取得，解析不到 WACC 才開頁面
+        content = await self._fetch_http('wacc', stock)
+        if content is not None:
+            wacc_value = self._parse_wacc(stock, content)
+            if wacc_value is not None:
+                print(f"⚡ {stock} WACC 由 HTTP 取得")
+                return wacc_value
 
-                # 隨機等待時間
-                await asyncio.sleep(random.uniform(3, 6))
+        retry = self._retry('wacc', stock, retries)
+        while await retry.next_attempt():
+            try:
+                print(f"正在嘗試抓取 {stock} 的WACC資料 (第 {retry.attempt} 次)...")
 
-                # 前往頁面
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
+                # 前往頁面（節流由 _goto 的 TokenBucket 統一處理）
+                await self._goto(page, URL, 'wacc', wait_until='domcontentloaded', timeout=60000)
 
                 # 模擬人類瀏覽行為
                 await asyncio.sleep(random.uniform(1, 2))
@@ -1232,29 +1466,14 @@ class StockScraper:
 
                 # 等待關鍵內容載入
                 try:
-                    await page.wait_for_selector('h1', timeout=30000)
-                    await asyncio.sleep(2)
+                    await page.wait_for_selector('h1', timeout=budget_ms(30000))
+                    await self._settle(page, 'wacc')
                 except Exception as e:
                     print(f"等待頁面載入時發生錯誤: {e}")
 
                 # 獲取頁面內容
                 content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-
-                # 尋找包含WACC數值的特定元素
-                wacc_value = None
-
-                # 方法1: 尋找包含":X.X% (As of"模式的font標籤
-                font_elements = soup.find_all('font', style=True)
-                for font in font_elements:
-                    text = font.get_text(strip=True)
-                    if '% (As of' in text and text.startswith(':'):
-                        # 提取百分比數值
-                        match = re.search(r':(\d+\.?\d*)%', text)
-                        if match:
-                            wacc_value = float(match.group(1)) / 100
-                            print(f"✓ 找到 {stock} 的WACC值: {wacc_value}")
-                            break
+                wacc_value = self._parse_wacc(stock, content)
 
                 if wacc_value is not None:
                     return wacc_value
@@ -1263,82 +1482,43 @@ class StockScraper:
                     return None
 
             except Exception as e:
-                print(f"第 {attempt + 1} 次嘗試失敗: {e}")
-                attempt += 1
-                if attempt < retries:
-                    wait_time = random.uniform(8, 15)
-                    print(f"等待 {wait_time:.1f} 秒後重試...")
-                    await asyncio.sleep(wait_time)
-
-        print(f"❌ Failed to retrieve WACC data for {stock} after {retries} attempts")
+                retry.failed(e)
+
+        print(f"❌ Failed to retrieve WACC data for {stock} after {retry.attempt} attempts: {retry.last_error}")
+        return None
+
+    def _parse_wacc(self, stock, content):
+        """從 gurufocus 頁面 HTML 解析 WACC（找不到時回傳 None）"""
+        soup = self.html_parser.soup(content)
+
+        # 方法1: 尋找包含":X.X% (As of"模式的font標籤
+        font_elements = soup.find_all('font', style=True)
+        for font in font_elements:
+            text = font.get_text(strip=True)
+            if '% (As of' in text and text.startswith(':'):
+                # 提取百分比數值
+                match = re.search(r':(\d+\.?\d*)%', text)
+                if match:
+                    wacc_value = float(match.group(1)) / 100
+                    print(f"✓ 找到 {stock} 的WACC值: {wacc_value}")
+                    return wacc_value
         return None
 
     async def run_wacc(self):
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_wacc_data(stock, semaphore) for stock in self.stocks]
-            result = await asyncio.gather(*tasks)
-        finally:
-            await self.cleanup()
+        await self._prepare_pool('wacc', self.stocks)
+        semaphore = self._get_limiter('wacc')
+        tasks = [self.fetch_wacc_data(stock, semaphore) for stock in self.stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('wacc')
         return result
 
-
     async def fetch_TradingView_data(self, stock, semaphore):
         async with semaphore:
             context = None
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    java_script_enabled=True,
-                    locale='zh-TW',
-                    timezone_id='Asia/Taipei',
-                    # 添加更多真實瀏覽器特徵
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Cache-Control': 'max-age=0',
-                    }
-                )
-
-                # 注入反偵測腳本
-                await context.add_init_script("""
-                    // 覆蓋 webdriver 檢測
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-
-                    // 覆蓋 Chrome 特徵
-                    window.chrome = {
-                        runtime: {}
-                    };
-
-                    // 覆蓋 permissions
-                    const originalQuery = window.navigator.permissions.query;
-                    window.navigator.permissions.query = (parameters) => (
-                        parameters.name === 'notifications' ?
-                            Promise.resolve({ state: Notification.permission }) :
-                            originalQuery(parameters)
-                    );
-
-                    // 覆蓋 plugins
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-
-                    // 覆蓋 languages
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['zh-TW', 'zh', 'en-US', 'en']
-                    });
-                """)
+                # 🔥 依 SourceProfiles 建立 context（context 參數、反偵測腳本與請求攔截只在 profile 定義一次）
+                await self._apply_har()
+                context = await self.browser_session.new_context('tradingview')
 
                 async with self.contexts_lock:
                     self.contexts.append(context)
@@ -1374,23 +1554,21 @@ class StockScraper:
             stock = ''.join(['.' if char == '-' else char for char in stock])
 
         # 🔥 直接使用 exchangeName，不需要再做對應
-        URL = f'https://www.tradingview.com/symbols/{exchange_name}-{stock}/financials-earnings/?earnings-period=FY&revenues-period=FY'
+        URL = source_url('tradingview', f'/symbols/{exchange_name}-{stock}/financials-earnings/?earnings-period=FY&revenues-period=FY')
 
-        attempt = 0
+        retry = self._retry('tradingview', stock, retries)
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                print(f"正在嘗試抓取 {stock} 的trading-view資料 (第 {attempt + 1} 次)...")
+                print(f"正在嘗試抓取 {stock} 的trading-view資料 (第 {retry.attempt} 次)...")
 
-                # 🔥 強化: 更長的隨機等待
-                await asyncio.sleep(random.uniform(3, 7))
+                # 前往頁面（節流由 _goto 的 TokenBucket 統一處理）
+                await self._goto(page, URL, 'tradingview', wait_until='networkidle', timeout=60000)
 
-                # 前往頁面
-                await page.goto(URL, wait_until='networkidle', timeout=60000)
-
-                # 🔥 強化: 更真實的瀏覽行為
-                await asyncio.sleep(random.uniform(2, 4))
+                # 等待頁面渲染（財報區塊穩定即繼續）
+                await self._settle(page, 'tradingview', self.TRADINGVIEW_READY_SELECTOR, max_wait=4.0)
 
+                # 🔥 強化: 更真實的瀏覽行為（隨機間隔為刻意保留的擬人化行為，不是等待渲染）
                 # 模擬滑鼠移動軌跡
                 for _ in range(random.randint(2, 4)):
                     x = random.randint(100, 800)
@@ -1406,8 +1584,8 @@ class StockScraper:
 
                 # 等待關鍵內容載入
                 try:
-                    await page.wait_for_selector('h1', timeout=30000)
-                    await asyncio.sleep(3)
+                    await page.wait_for_selector('h1', timeout=budget_ms(30000))
+                    await self._settle(page, 'tradingview', self.TRADINGVIEW_READY_SELECTOR, max_wait=3.0)
                 except Exception as e:
                     print(f"等待頁面載入時發生錯誤: {e}")
 
@@ -1415,7 +1593,7 @@ class StockScraper:
                 content = await page.content()
 
                 # 使用BeautifulSoup解析trading-view數值
-                soup = BeautifulSoup(content, 'html.parser')
+                soup = self.html_parser.soup(content)
 
                 # 解析年份
                 years = []
@@ -1517,145 +1695,112 @@ class StockScraper:
                     return None
 
             except Exception as e:
-                print(f"第 {attempt + 1} 次嘗試失敗: {e}")
-                attempt += 1
-                if attempt < retries:
-                    wait_time = random.uniform(20, 40)  # 🔥 增加重試等待時間
-                    print(f"等待 {wait_time:.1f} 秒後重試...")
-                    await asyncio.sleep(wait_time)
-
-        print(f"Failed to retrieve TradingView data for {stock} after {retries} attempts")
+                retry.failed(e)
+
+        print(f"Failed to retrieve TradingView data for {stock} after {retry.attempt} attempts: {retry.last_error}")
         return None
 
     async def run_TradingView(self):
         """批次執行 TradingView 數據抓取 - 先集中處理 CAPTCHA，再批次爬蟲"""
 
-        # 🔥 臨時保存原始 headless 設定
-        original_headless = self.headless
+        # 🔥 有快照的股票不需要再開頁面處理 CAPTCHA
+        cached, pending = self._split_snapshots('tradingview', self.stocks, self._tradingview_url)
+        if not pending:
+            return [{stock: cached[stock]} for stock in self.stocks]
 
-        # 🔥 強制使用有頭模式（顯示瀏覽器）
-        self.headless = False
+        # 🔥 強制使用有頭模式（顯示瀏覽器）- 向會話管理器借用長駐的有頭瀏覽器
+        await self._apply_har()
+        await self.setup_browser(headless=False)
 
-        try:
-            await self.setup_browser()
+        # 🔥 分批處理：每批最多同時開啟 max_open_pages 頁，記憶體不隨股票數量增加
+        batches = self.browser_session.memory.page_batches(pending)
+        result = []
 
+        for batch_index, batch in enumerate(batches):
             print("\n" + "=" * 60)
-            print("🚀 階段 1: 集中處理 TradingView CAPTCHA 驗證")
-            print("⚠️  即將打開所有股票的頁面")
+            print(f"🚀 階段 1: 集中處理 TradingView CAPTCHA 驗證（第 {batch_index + 1}/{len(batches)} 批）")
+            print(f"⚠️  即將打開 {len(batch)} 支股票的頁面")
             print("⚠️  請依序完成所有 CAPTCHA 驗證")
             print("⚠️  完成所有驗證後，程式將自動開始抓取數據")
             print("=" * 60 + "\n")
 
-            # 🔥 階段 1: 打開所有頁面並處理 CAPTCHA
-            pages_and_contexts = await self._open_all_tradingview_pages()
+            # 🔥 階段 1: 打開本批頁面並處理 CAPTCHA
+            pages_and_contexts = await self._open_all_tradingview_pages(batch)
 
             if not pages_and_contexts:
                 print("❌ 無法打開任何頁面")
-                return []
+                continue
 
             print("\n" + "=" * 60)
-            print("✅ 所有 CAPTCHA 已通過！")
+            print("✅ 本批 CAPTCHA 已通過！")
             print("🚀 階段 2: 開始批次抓取 TradingView 數據")
             print("=" * 60 + "\n")
 
             # 🔥 階段 2: 批次抓取數據
-            result = []
-            for i, (stock, page, context) in enumerate(pages_and_contexts):
-                print(f"\n{'=' * 50}")
-                print(f"抓取 {stock} 的 TradingView 數據 ({i + 1}/{len(pages_and_contexts)})")
-                print(f"{'=' * 50}")
-
-                try:
-                    tradingview_data = await self._extract_tradingview_from_page(stock, page)
-                    result.append({stock: tradingview_data})
-
-                    if tradingview_data is not None:
-                        print(f"✓ {stock}: 成功抓取 {tradingview_data.shape[1]} 年份數據")
-                    else:
-                        print(f"⚠️ {stock}: 無數據")
-                except Exception as e:
-                    print(f"❌ {stock} 抓取失敗: {e}")
-                    result.append({stock: None})
-
-                # 延遲（最後一個不延遲）
-                if i < len(pages_and_contexts) - 1:
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
+            try:
+                for i, (stock, page, context) in enumerate(pages_and_contexts):
+                    print(f"\n{'=' * 50}")
+                    print(f"抓取 {stock} 的 TradingView 數據 ({i + 1}/{len(pages_and_contexts)})")
+                    print(f"{'=' * 50}")
 
-            # 🔥 關閉所有頁面和 context
-            print("\n🧹 清理資源...")
-            for stock, page, context in pages_and_contexts:
-                try:
-                    await context.close()
-                except:
-                    pass
+                    try:
+                        tradingview_data = await self._extract_tradingview_from_page(stock, page)
+                        result.append({stock: tradingview_data})
+                        self._save_snapshot('tradingview', stock, self._tradingview_url(stock), tradingview_data)
 
-            return result
+                        if tradingview_data is not None:
+                            print(f"✓ {stock}: 成功抓取 {tradingview_data.shape[1]} 年份數據")
+                        else:
+                            print(f"⚠️ {stock}: 無數據")
+                    except Exception as e:
+                        print(f"❌ {stock} 抓取失敗: {e}")
+                        result.append({stock: None})
 
-        finally:
-            # 🔥 恢復原始設定
-            self.headless = original_headless
-            await self.cleanup()
+                    # 延遲（最後一個不延遲）
+                    if i < len(pages_and_contexts) - 1:
+                        await asyncio.sleep(random.uniform(0.5, 1.5))
+            finally:
+                # 🔥 關閉本批所有頁面和 context，下一批再開
+                print("\n🧹 清理資源...")
+                await self._close_page_contexts(pages_and_contexts)
+
+        # 🔥 合併快照結果（依原股票順序）
+        fetched = {stock: data for item in result for stock, data in item.items()}
+        return [{stock: cached[stock] if stock in cached else fetched[stock]}
+                for stock in self.stocks if stock in cached or stock in fetched]
+
+    @staticmethod
+    async def _close_page_contexts(pages_and_contexts):
+        """關閉 _open_all_*_pages 開啟的所有 context"""
+        for stock, page, context in pages_and_contexts:
+            try:
+                await context.close()
+            except Exception:
+                pass
 
-    async def _open_all_tradingview_pages(self):
+    async def _open_all_tradingview_pages(self, stocks=None):
         """打開所有股票的 TradingView 頁面 - 使用 Schwab API 的 exchangeName"""
+        stocks = self.stocks if stocks is None else stocks
         pages_and_contexts = []
 
-        for i, stock in enumerate(self.stocks):
+        for i, stock in enumerate(stocks):
             print(f"\n{'=' * 50}")
-            print(f"打開 {stock} 的 TradingView 頁面 ({i + 1}/{len(self.stocks)})")
+            print(f"打開 {stock} 的 TradingView 頁面 ({i + 1}/{len(stocks)})")
             print(f"{'=' * 50}")
 
+            context = None
             try:
-                # 創建新的 context
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    java_script_enabled=True,
-                    locale='zh-TW',
-                    timezone_id='Asia/Taipei',
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                        'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                    }
-                )
-
-                # 注入反偵測腳本
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                    window.chrome = {
-                        runtime: {},
-                        loadTimes: function() {},
-                        csi: function() {},
-                        app: {}
-                    };
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['zh-TW', 'zh', 'en-US', 'en']
-                    });
-                """)
+                # 🔥 依 SourceProfiles 建立 context（含反偵測腳本與請求攔截）
+                context = await self.browser_session.new_context('tradingview')
 
                 page = await context.new_page()
 
-                # 🔥 移除 yfinance，改用 stock_exchanges
-                exchange_name = self.stock_exchanges.get(stock, 'NYSE')  # 預設 NYSE
-
-                stock_symbol = ''.join(['.' if char == '-' else char for char in stock]) if '-' in stock else stock
-
                 # 🔥 直接使用 exchangeName
-                URL = f'https://www.tradingview.com/symbols/{exchange_name}-{stock_symbol}/financials-earnings/?earnings-period=FY&revenues-period=FY'
+                URL = self._tradingview_url(stock)
 
-                # 訪問頁面
-                await asyncio.sleep(random.uniform(2, 4))
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
-                await asyncio.sleep(random.uniform(2, 3))
+                # 訪問頁面（頁面之間的間隔由 _goto 的 TokenBucket 統一處理）
+                await self._goto(page, URL, 'tradingview', wait_until='domcontentloaded', timeout=60000)
+                await self._settle(page, 'tradingview', self.TRADINGVIEW_READY_SELECTOR, max_wait=3.0)
 
                 # 🔥 檢查 CAPTCHA（無限等待）
                 await self._wait_for_captcha_resolution(stock, page)
@@ -1664,10 +1809,6 @@ class StockScraper:
                 pages_and_contexts.append((stock, page, context))
                 print(f"✓ {stock} 頁面已就緒")
 
-                # 每個頁面之間延遲
-                if i < len(self.stocks) - 1:
-                    await asyncio.sleep(random.uniform(1, 2))
-
             except Exception as e:
                 print(f"❌ {stock} 頁面打開失敗: {e}")
                 if context:
@@ -1689,14 +1830,14 @@ class StockScraper:
 
             # 等待關鍵內容載入
             try:
-                await page.wait_for_selector('h1', timeout=30000)
-                await asyncio.sleep(3)
+                await page.wait_for_selector('h1', timeout=budget_ms(30000))
+                await self._settle(page, 'tradingview', self.TRADINGVIEW_READY_SELECTOR, max_wait=3.0)
             except Exception as e:
                 print(f"等待頁面載入時發生錯誤: {e}")
 
             # 獲取頁面內容
             content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
+            soup = self.html_parser.soup(content)
 
             # === 以下是原有的解析邏輯 ===
 
@@ -1796,128 +1937,91 @@ class StockScraper:
     async def run_beta(self):
         """批次執行 Beta 值抓取 - 先集中處理 CAPTCHA，再批次爬蟲"""
 
-        # 🔥 臨時保存原始 headless 設定
-        original_headless = self.headless
+        # 🔥 有快照的股票不需要再開頁面處理 CAPTCHA
+        cached, pending = self._split_snapshots('beta', self.stocks, self._beta_url)
+        if not pending:
+            return [{stock: cached[stock]} for stock in self.stocks]
 
-        # 🔥 強制使用有頭模式（顯示瀏覽器）
-        self.headless = False
+        # 🔥 強制使用有頭模式（顯示瀏覽器）- 向會話管理器借用長駐的有頭瀏覽器
+        await self._apply_har()
+        await self.setup_browser(headless=False)
 
-        try:
-            await self.setup_browser()
+        # 🔥 分批處理：每批最多同時開啟 max_open_pages 頁，記憶體不隨股票數量增加
+        batches = self.browser_session.memory.page_batches(pending)
+        result = []
 
+        for batch_index, batch in enumerate(batches):
             print("\n" + "=" * 60)
-            print("🚀 階段 1: 集中處理 CAPTCHA 驗證")
-            print("⚠️  即將打開所有股票的頁面")
+            print(f"🚀 階段 1: 集中處理 CAPTCHA 驗證（第 {batch_index + 1}/{len(batches)} 批）")
+            print(f"⚠️  即將打開 {len(batch)} 支股票的頁面")
             print("⚠️  請依序完成所有 CAPTCHA 驗證")
             print("⚠️  完成所有驗證後，程式將自動開始抓取數據")
             print("=" * 60 + "\n")
 
-            # 🔥 階段 1: 打開所有頁面並處理 CAPTCHA
-            pages_and_contexts = await self._open_all_beta_pages()
+            # 🔥 階段 1: 打開本批頁面並處理 CAPTCHA
+            pages_and_contexts = await self._open_all_beta_pages(batch)
 
             if not pages_and_contexts:
                 print("❌ 無法打開任何頁面")
-                return []
+                continue
 
             print("\n" + "=" * 60)
-            print("✅ 所有 CAPTCHA 已通過！")
+            print("✅ 本批 CAPTCHA 已通過！")
             print("🚀 階段 2: 開始批次抓取 Beta 值")
             print("=" * 60 + "\n")
 
             # 🔥 階段 2: 批次抓取數據
-            result = []
-            for i, (stock, page, context) in enumerate(pages_and_contexts):
-                print(f"\n{'=' * 50}")
-                print(f"抓取 {stock} 的 Beta 值 ({i + 1}/{len(pages_and_contexts)})")
-                print(f"{'=' * 50}")
-
-                try:
-                    beta_value = await self._extract_beta_from_page(stock, page)
-                    result.append({stock: beta_value})
-                    print(f"✓ {stock}: {beta_value}")
-                except Exception as e:
-                    print(f"❌ {stock} 抓取失敗: {e}")
-                    result.append({stock: None})
-
-                # 延遲（最後一個不延遲）
-                if i < len(pages_and_contexts) - 1:
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
+            try:
+                for i, (stock, page, context) in enumerate(pages_and_contexts):
+                    print(f"\n{'=' * 50}")
+                    print(f"抓取 {stock} 的 Beta 值 ({i + 1}/{len(pages_and_contexts)})")
+                    print(f"{'=' * 50}")
 
-            # 🔥 關閉所有頁面和 context
-            print("\n🧹 清理資源...")
-            for stock, page, context in pages_and_contexts:
-                try:
-                    await context.close()
-                except:
-                    pass
+                    try:
+                        beta_value = await self._extract_beta_from_page(stock, page)
+                        result.append({stock: beta_value})
+                        self._save_snapshot('beta', stock, self._beta_url(stock), beta_value)
+                        print(f"✓ {stock}: {beta_value}")
+                    except Exception as e:
+                        print(f"❌ {stock} 抓取失敗: {e}")
+                        result.append({stock: None})
 
-            return result
+                    # 延遲（最後一個不延遲）
+                    if i < len(pages_and_contexts) - 1:
+                        await asyncio.sleep(random.uniform(0.5, 1.5))
+            finally:
+                # 🔥 關閉本批所有頁面和 context，下一批再開
+                print("\n🧹 清理資源...")
+                await self._close_page_contexts(pages_and_contexts)
 
-        finally:
-            # 🔥 恢復原始設定
-            self.headless = original_headless
-            await self.cleanup()
+        # 🔥 合併快照結果（依原股票順序）
+        fetched = {stock: data for item in result for stock, data in item.items()}
+        return [{stock: cached[stock] if stock in cached else fetched[stock]}
+                for stock in self.stocks if stock in cached or stock in fetched]
 
-    async def _open_all_beta_pages(self):
+    async def _open_all_beta_pages(self, stocks=None):
         """打開所有股票的 Beta 頁面並等待 CAPTCHA 通過（無時間限制）"""
+        stocks = self.stocks if stocks is None else stocks
         pages_and_contexts = []
 
-        for i, stock in enumerate(self.stocks):
+        for i, stock in enumerate(stocks):
             print(f"\n{'=' * 50}")
-            print(f"打開 {stock} 的頁面 ({i + 1}/{len(self.stocks)})")
+            print(f"打開 {stock} 的頁面 ({i + 1}/{len(stocks)})")
             print(f"{'=' * 50}")
 
+            context = None
             try:
-                # 創建新的 context
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                    viewport={"width": 1280, "height": 960},
-                    java_script_enabled=True,
-                    locale='zh-TW',
-                    timezone_id='Asia/Taipei',
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                        'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                    }
-                )
-
-                # 注入反偵測腳本
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                    window.chrome = {
-                        runtime: {},
-                        loadTimes: function() {},
-                        csi: function() {},
-                        app: {}
-                    };
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['zh-TW', 'zh', 'en-US', 'en']
-                    });
-                """)
+                # 🔥 依 SourceProfiles 建立 context（含反偵測腳本與請求攔截）
+                context = await self.browser_session.new_context('beta')
 
                 page = await context.new_page()
 
-                # 🔥 移除 yfinance，改用 stock_exchanges
-                exchange_name = self.stock_exchanges.get(stock, 'NYSE')  # 預設 NYSE
-
-                stock_symbol = ''.join(['.' if char == '-' else char for char in stock]) if '-' in stock else stock
-
                 # 🔥 直接使用 exchangeName
-                URL = f'https://tw.tradingview.com/symbols/{exchange_name}-{stock_symbol}/'
+                URL = self._beta_url(stock)
 
-                # 訪問頁面
-                await asyncio.sleep(random.uniform(2, 4))
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
-                await asyncio.sleep(random.uniform(2, 3))
+                # 訪問頁面（頁面之間的間隔由 _goto 的 TokenBucket 統一處理）
+                await self._goto(page, URL, 'beta', wait_until='domcontentloaded', timeout=60000)
+                await self._settle(page, 'beta', self.BETA_READY_SELECTOR, max_wait=3.0)
 
                 # 🔥 檢查 CAPTCHA（無限等待）
                 await self._wait_for_captcha_resolution(stock, page)
@@ -1926,10 +2030,6 @@ class StockScraper:
                 pages_and_contexts.append((stock, page, context))
                 print(f"✓ {stock} 頁面已就緒")
 
-                # 每個頁面之間延遲
-                if i < len(self.stocks) - 1:
-                    await asyncio.sleep(random.uniform(1, 2))
-
             except Exception as e:
                 print(f"❌ {stock} 頁面打開失敗: {e}")
                 if context:
@@ -2181,7 +2281,7 @@ class StockScraper:
 
             # 獲取內容
             content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
+            soup = self.html_parser.soup(content)
 
             # 解析 Beta 值（使用原有邏輯）
             beta_section = None
@@ -2222,156 +2322,77 @@ class StockScraper:
             print(f"提取 Beta 值失敗: {e}")
             return None
 
+    @ticker_budget('barchart')
     async def fetch_barchart_data(self, stock, semaphore):
         """抓取單一股票的數據（Barchart Volatility）"""
         async with semaphore:
-            context = None  # 🔥 初始化
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    java_script_enabled=True,
-                )
-                # 🔥 追蹤 context
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-                try:
-                    page = await context.new_page()
+                # 🔥 從 barchart 的 context 池借用頁面，用完歸還
+                async with self._get_pool('barchart').leased() as page:
                     html_content = await self.get_barchart_html(stock, page)
                     return {stock: html_content}
-                finally:
-                    await context.close()
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
             except Exception as e:
-                # 確保 context 被關閉
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    # 🔥 移除追蹤
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {stock: {"error": str(e)}}
 
+    @snapshot('barchart', source_snapshot_url('barchart', '/stocks/quotes/{stock}/volatility-charts'))
     async def get_barchart_html(self, stock, page, retries=3):
         """抓取特定股票的Barchart頁面並回傳完整HTML"""
-        URL = f'https://www.barchart.com/stocks/quotes/{stock}/volatility-charts'
-        attempt = 0
+        URL = source_url('barchart', f'/stocks/quotes/{stock}/volatility-charts')
 
-        while attempt < retries:
+        # 🔥 伺服器端渲染：先以 HTTP 取得，沒有波動率區塊才開頁面
+        content = await self._fetch_http('barchart', stock)
+        if content is not None:
+            text = self.html_parser.select_text(content, 'div.bc-datatable-toolbar.bc-options-toolbar.volatility')
+            print(f"⚡ {stock} Barchart 由 HTTP 取得")
+            return text.replace('\xa0', ' ')
+
+        retry = self._retry('barchart', stock, retries)
+        while await retry.next_attempt():
             try:
-                print(f"正在嘗試抓取 {stock} 的Barchart頁面 (第 {attempt + 1} 次)...")
+                print(f"正在嘗試抓取 {stock} 的Barchart頁面 (第 {retry.attempt} 次)...")
 
-                await asyncio.sleep(random.uniform(2, 5))
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
+                await self._goto(page, URL, 'barchart', wait_until='domcontentloaded', timeout=60000)
 
-                # 等待頁面載入
-                await asyncio.sleep(3)
+                # 等待波動率工具列渲染完成
+                await self._settle(page, 'barchart', self.SUBTREE_SELECTORS['barchart'], max_wait=3.0)
 
-                # 獲取完整HTML內容
-                content = await page.content()
+                # 🔥 只取出波動率工具列區塊，不序列化整頁
+                content = await self._page_fragment(page, 'barchart')
 
                 # print(f"✓ 成功獲取 {stock} 的HTML，長度: {len(content)}")
-                bs = BeautifulSoup(content, 'html.parser')
-
-                div = bs.find('div', {'class':'bc-datatable-toolbar bc-options-toolbar volatility'})
-                # print(div)
-                return div.text.replace('\xa0', ' ')
+                text = self.html_parser.select_text(content, 'div.bc-datatable-toolbar.bc-options-toolbar.volatility')
+                return text.replace('\xa0', ' ')
                 # return content
 
             except Exception as e:
-                print(f"第 {attempt + 1} 次嘗試失敗: {e}")
-                attempt += 1
-                if attempt < retries:
-                    await asyncio.sleep(random.uniform(5, 10))
+                retry.failed(e)
 
         return None
 
     async def run_barchart(self):
         """執行Barchart數據抓取"""
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_barchart_data(stock, semaphore) for stock in self.stocks]
-            result = await asyncio.gather(*tasks)
-            return result
-        finally:
-            await self.cleanup()
+        await self._prepare_pool('barchart', self.stocks)
+        semaphore = self._get_limiter('barchart')
+        tasks = [self.fetch_barchart_data(stock, semaphore) for stock in self.stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('barchart')
+        return result
 
     # 在 StockScraper 類別中，加在 run_barchart() 方法之後
 
+    @ticker_budget('earningshub')
     async def fetch_earnings_date_data(self, stock, semaphore):
         """抓取單一股票的財報日期（earningshub）"""
         async with semaphore:
-            context = None
             try:
-                context = await self.browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    java_script_enabled=True,
-                    locale='zh-TW',
-                    timezone_id='Asia/Taipei',
-                    extra_http_headers={
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                    }
-                )
-
-                # 注入反偵測腳本
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-
-                    window.chrome = {
-                        runtime: {},
-                        loadTimes: function() {},
-                        csi: function() {},
-                        app: {}
-                    };
-
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['zh-TW', 'zh', 'en-US', 'en']
-                    });
-                """)
-
-                async with self.contexts_lock:
-                    self.contexts.append(context)
-
-                try:
-                    page = await context.new_page()
+                # 🔥 從 earningshub 的 context 池借用頁面（反偵測腳本已在建立 context 時注入）
+                async with self._get_pool('earningshub').leased() as page:
                     earnings_data = await self.get_earnings_date_earningshub(stock, page)
                     return {stock: earnings_data}
-                finally:
-                    await context.close()
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
-
             except Exception as e:
-                if context:
-                    try:
-                        await context.close()
-                    except:
-                        pass
-                    async with self.contexts_lock:
-                        if context in self.contexts:
-                            self.contexts.remove(context)
                 return {stock: None}
 
+    @snapshot('earningshub', source_snapshot_url('earningshub', '/quote/{symbol}'))
     async def get_earnings_date_earningshub(self, stock, page, retries=3):
         """
         從 earningshub.com 爬取財報日期 - 改進版
@@ -2386,7 +2407,6 @@ class StockScraper:
             dict: {'earnings_date': '2026年2月19日 週四 上午5:00', 'status': 'ESTIMATE'}
             None: 找不到未來財報
         """
-        from bs4 import BeautifulSoup
         import random
         from datetime import datetime
         import re
@@ -2397,34 +2417,41 @@ class StockScraper:
             stock = ''.join(['.' if char == '-' else char for char in stock])
             print(f"   股票代碼轉換: {original_stock} → {stock}")
 
-        URL = f'https://earningshub.com/quote/{stock}'
-        attempt = 0
+        URL = source_url('earningshub', f'/quote/{stock}')
+        retry = self._retry('earningshub', original_stock, retries)
+        try_http = True  # 🔥 第一次先走 HTTP，解析不到財報日期再開頁面（不計入重試次數）
 
-        while attempt < retries:
+        while await retry.next_attempt():
             try:
-                print(f"正在抓取 {original_stock} 的財報日期 (第 {attempt + 1} 次)...")
+                print(f"正在抓取 {original_stock} 的財報日期 (第 {retry.attempt} 次)...")
 
-                # 隨機延遲
-                await asyncio.sleep(random.uniform(2, 4))
+                content = None
+                from_http = False
+                if try_http:
+                    try_http = False
+                    content = await self._fetch_http('earningshub', original_stock)
+                    from_http = content is not None
 
-                # 前往頁面
-                await page.goto(URL, wait_until='domcontentloaded', timeout=60000)
+                if content is None:
+                    # 前往頁面（節流由 _goto 的 TokenBucket 統一處理）
+                    await self._goto(page, URL, 'earningshub', wait_until='domcontentloaded', timeout=60000)
 
-                # 模擬人類瀏覽行為
-                await asyncio.sleep(random.uniform(1, 2))
-                await page.evaluate('window.scrollTo(0, 200)')
-                await asyncio.sleep(random.uniform(0.5, 1))
+                    # 模擬人類瀏覽行為
+                    await asyncio.sleep(random.uniform(1, 2))
+                    await page.evaluate('window.scrollTo(0, 200)')
+                    await asyncio.sleep(random.uniform(0.5, 1))
 
-                # 等待關鍵元素載入
-                try:
-                    await page.wait_for_selector('div.MuiAlert-root', timeout=10000)
-                    await asyncio.sleep(2)
-                except Exception:
-                    print(f"   等待元素超時，繼續嘗試解析...")
+                    # 等待關鍵元素載入
+                    try:
+                        await page.wait_for_selector('div.MuiAlert-root', timeout=budget_ms(10000))
+                        await self._settle(page, 'earningshub', self.SUBTREE_SELECTORS['earningshub'])
+                    except Exception:
+                        print(f"   等待元素超時，繼續嘗試解析...")
 
-                # 獲取頁面內容
-                content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
+                    # 🔥 只取出 MuiAlert 區塊，不序列化整頁
+                    content = await self._page_fragment(page, 'earningshub')
+
+                soup = self.html_parser.soup(content)
 
                 # ===== 步驟 1: 找到所有 MuiAlert 區塊 =====
                 all_alerts = soup.find_all('div', class_='MuiAlert-root')
@@ -2491,13 +2518,14 @@ class StockScraper:
                         continue
 
                 # ===== 步驟 3: 過濾未來日期 =====
-                if not all_earnings_data:
-                    print(f"   ⚠️ 未找到任何有效的財報日期")
-                    attempt += 1
-                    if attempt >= retries:
-                        return None
+                if not all_earnings_data and from_http:
+                    print(f"   ↪️ HTTP 回應中沒有可解析的財報日期，改用瀏覽器")
+                    retry.again()
                     continue
 
+                if not all_earnings_data:
+                    raise ParseError("未找到任何有效的財報日期")
+
                 print(f"\n   📊 找到 {len(all_earnings_data)} 個財報日期：")
                 for i, data in enumerate(all_earnings_data, 1):
                     print(f"      {i}. {data['date_text']} ({data['status']})")
@@ -2515,6 +2543,12 @@ class StockScraper:
 
                 print(f"\n   🔮 未來財報: {len(future_dates)} 個")
 
+                if not future_dates and from_http:
+                    # 伺服器端 HTML 可能是快取過的舊版本，交給瀏覽器確認
+                    print(f"   ↪️ HTTP 回應中沒有未來的財報日期，改用瀏覽器")
+                    retry.again()
+                    continue
+
                 if not future_dates:
                     print(f"   ⚠️ 沒有找到未來的財報日期")
                     return None
@@ -2526,6 +2560,8 @@ class StockScraper:
                 print(f"      日期: {next_earnings['date_text']}")
                 print(f"      狀態: {next_earnings['status']}")
                 print(f"      距今: {(next_earnings['date'] - now).days} 天")
+                if from_http:
+                    print(f"   ⚡ 由 HTTP 取得（未開啟瀏覽器）")
 
                 return {
                     'earnings_date': next_earnings['date_text'],
@@ -2534,17 +2570,9 @@ class StockScraper:
                 }
 
             except Exception as e:
-                attempt += 1
-                print(f"   ❌ 第 {attempt} 次嘗試失敗: {e}")
-
-                if attempt >= retries:
-                    print(f"   ❌ {original_stock} 在 {retries} 次嘗試後仍無法獲取財報日期")
-                    return None
-
-                wait_time = random.uniform(5, 10)
-                print(f"   等待 {wait_time:.1f} 秒後重試...")
-                await asyncio.sleep(wait_time)
+                retry.failed(e)
 
+        print(f"   ❌ {original_stock} 在 {retry.attempt} 次嘗試後仍無法獲取財報日期: {retry.last_error}")
         return None
 
     def _parse_chinese_date(self, date_str):
@@ -2607,15 +2635,14 @@ class StockScraper:
 
     async def run_earnings_dates(self):
         """批次執行財報日期抓取"""
-        await self.setup_browser()
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        try:
-            tasks = [self.fetch_earnings_date_data(stock, semaphore) for stock in self.stocks]
-            result = await asyncio.gather(*tasks)
-            return result
-        finally:
-            await self.cleanup()
+        await self._prepare_pool('earningshub', self.stocks)
+        semaphore = self._get_limiter('earningshub')
+        tasks = [self.fetch_earnings_date_data(stock, semaphore) for stock in self.stocks]
+        result = await asyncio.gather(*tasks)
+        self._log_pool_stats('earningshub')
+        return result
 
+    @ticker_budget('schwab')
     async def fetch_option_chain_data(self, stock, semaphore):
         """抓取單一股票的選擇權鏈數據"""
         async with semaphore:
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    單一主機的導覽節流（token bucket），取代各 fetcher 在 page.goto 前各自的 random.uniform 等待
+
+    - 每秒補充 rate 個 token，最多累積 burst 個；每次導覽取用一個
+    - 所有協程共用同一個 bucket：並發再高，對同一主機的導覽頻率也不會超過 rate（閒置後最多連續 burst 次）
+    - 先到先得：排隊中的導覽依序取得 token，不會互相搶佔
+
+    原本每個協程各自 sleep，並發 15 時主機實際收到的請求是 15 倍；反過來並發低時又白白等待。
+
+    使用範例：
+        bucket = TokenBucket('www.roic.ai', rate=3.0, burst=6)
+        await bucket.acquire()
+        await page.goto(url)
+    """
+
+    def __init__(self, host, rate, burst=1):
+        """
+        Args:
+            host: 主機名稱（僅用於日誌 / 統計）
+            rate: 每秒可導覽的次數
+            burst: 閒置後可連續導覽的次數
+        """
+        self.host = host
+        self.rate = rate
+        self.burst = max(1, burst)
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+        # 統計
+        self.acquired = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _get_lock(self):
+        # 🔥 GUI 可能更換事件循環，Lock 跟著目前的循環建立
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def acquire(self):
+        """
+        取得一次導覽的 token（必要時等待）
+
+        Returns:
+            float: 等待的秒數
+        """
+        started = time.monotonic()
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+            self.waited += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'rate': self.rate,
+            'burst': self.burst,
+            'acquired': self.acquired,
+            'delayed': self.delayed,
+            'waited': round(self.waited, 2),
+            'max_wait': round(self.max_wait, 2),
+        }
+
+    def reset_stats(self):
+        self.acquired = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def describe(self):
+        average = self.waited / self.delayed if self.delayed else 0.0
+        return (f"每秒 {self.rate:g} 次（突發 {self.burst}）；導覽 {self.acquired} 次，"
+                f"等待 {self.delayed} 次、平均 {average:.2f} 秒、最長 {self.max_wait:.2f} 秒")